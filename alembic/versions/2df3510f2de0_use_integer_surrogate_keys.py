@@ -0,0 +1,155 @@
+"""Use integer surrogate keys for authors and commits
+
+Revision ID: 2df3510f2de0
+Revises: dd0649320541
+Create Date: 2026-10-19 11:03:27.540913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2df3510f2de0'
+down_revision = 'dd0649320541'
+branch_labels = None
+depends_on = None
+
+authors = sa.table('authors', sa.column('id', sa.Integer), sa.column('canonical_name', sa.String))
+commits = sa.table('commits', sa.column('id', sa.Integer), sa.column('hexsha', sa.String),
+                   sa.column('commit_time', sa.DateTime))
+
+
+def _number_rows(table, key_column, order_column):
+    bind = op.get_bind()
+    keys = [row[0] for row in bind.execute(sa.select(key_column).order_by(order_column, key_column))]
+    if keys:
+        bind.execute(table.update().where(key_column == sa.bindparam('key')).values(id=sa.bindparam('new_id')),
+                     [{'key': key, 'new_id': new_id} for new_id, key in enumerate(keys, 1)])
+
+
+def _create_id_sequence(table_name):
+    if op.get_bind().dialect.name == 'postgresql':
+        sequence_name = '{}_id_seq'.format(table_name)
+        op.execute('CREATE SEQUENCE {} OWNED BY {}.id'.format(sequence_name, table_name))
+        op.execute("SELECT setval('{}', COALESCE(MAX(id), 0) + 1, false) FROM {}".format(sequence_name, table_name))
+        op.execute("ALTER TABLE {} ALTER COLUMN id SET DEFAULT nextval('{}')".format(table_name, sequence_name))
+
+
+def _drop_id_sequence(table_name):
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('ALTER TABLE {} ALTER COLUMN id DROP DEFAULT'.format(table_name))
+        op.execute('DROP SEQUENCE {}_id_seq'.format(table_name))
+
+
+def upgrade():
+    with op.batch_alter_table('repositories') as batch_op:
+        batch_op.drop_constraint('fk_repositories_head_commit_id_commits', type_='foreignkey')
+    with op.batch_alter_table('authorcommit') as batch_op:
+        batch_op.drop_constraint('fk_authorcommit_author_name_authors', type_='foreignkey')
+        batch_op.drop_constraint('fk_authorcommit_commit_id_commits', type_='foreignkey')
+    with op.batch_alter_table('commits') as batch_op:
+        batch_op.drop_constraint('fk_commits_author_name_authors', type_='foreignkey')
+
+    op.add_column('authors', sa.Column('id', sa.Integer(), nullable=True))
+    _number_rows(authors, authors.c.canonical_name, authors.c.canonical_name)
+    with op.batch_alter_table('authors') as batch_op:
+        batch_op.drop_constraint('pk_authors', type_='primary')
+        batch_op.alter_column('id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_primary_key('pk_authors', ['id'])
+        batch_op.create_unique_constraint('uq_authors_canonical_name', ['canonical_name'])
+    _create_id_sequence('authors')
+
+    op.add_column('commits', sa.Column('id', sa.Integer(), nullable=True))
+    op.add_column('commits', sa.Column('author_id', sa.Integer(), nullable=True))
+    _number_rows(commits, commits.c.hexsha, commits.c.commit_time)
+    op.execute('UPDATE commits SET author_id = '
+               '(SELECT authors.id FROM authors WHERE authors.canonical_name = commits.author_name)')
+    with op.batch_alter_table('commits') as batch_op:
+        batch_op.drop_constraint('pk_commits', type_='primary')
+        batch_op.drop_column('author_name')
+        batch_op.alter_column('id', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('author_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_primary_key('pk_commits', ['id'])
+        batch_op.create_unique_constraint('uq_commits_hexsha', ['hexsha'])
+        batch_op.create_foreign_key('fk_commits_author_id_authors', 'authors', ['author_id'], ['id'])
+    _create_id_sequence('commits')
+
+    op.add_column('authorcommit', sa.Column('author_id', sa.Integer(), nullable=True))
+    op.add_column('authorcommit', sa.Column('commit_key', sa.Integer(), nullable=True))
+    op.execute('UPDATE authorcommit SET '
+               'author_id = (SELECT authors.id FROM authors WHERE authors.canonical_name = authorcommit.author_name), '
+               'commit_key = (SELECT commits.id FROM commits WHERE commits.hexsha = authorcommit.commit_id)')
+    with op.batch_alter_table('authorcommit') as batch_op:
+        batch_op.drop_constraint('pk_authorcommit', type_='primary')
+        batch_op.drop_column('author_name')
+        batch_op.drop_column('commit_id')
+    with op.batch_alter_table('authorcommit') as batch_op:
+        batch_op.alter_column('commit_key', new_column_name='commit_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('author_id', existing_type=sa.Integer(), nullable=False)
+    with op.batch_alter_table('authorcommit') as batch_op:
+        batch_op.create_primary_key('pk_authorcommit', ['author_id', 'commit_id'])
+        batch_op.create_foreign_key('fk_authorcommit_author_id_authors', 'authors', ['author_id'], ['id'])
+        batch_op.create_foreign_key('fk_authorcommit_commit_id_commits', 'commits', ['commit_id'], ['id'])
+
+    with op.batch_alter_table('repositories') as batch_op:
+        batch_op.create_foreign_key('fk_repositories_head_commit_id_commits', 'commits', ['head_commit_id'],
+                                    ['hexsha'])
+    with op.batch_alter_table('projectrepository') as batch_op:
+        batch_op.alter_column('repository_id', existing_type=sa.String(), type_=sa.Integer(),
+                              postgresql_using='repository_id::integer')
+
+
+def downgrade():
+    with op.batch_alter_table('projectrepository') as batch_op:
+        batch_op.alter_column('repository_id', existing_type=sa.Integer(), type_=sa.String())
+    with op.batch_alter_table('repositories') as batch_op:
+        batch_op.drop_constraint('fk_repositories_head_commit_id_commits', type_='foreignkey')
+
+    op.add_column('authorcommit', sa.Column('author_name', sa.String(), nullable=True))
+    op.add_column('authorcommit', sa.Column('commit_hexsha', sa.String(), nullable=True))
+    op.execute('UPDATE authorcommit SET '
+               'author_name = (SELECT authors.canonical_name FROM authors WHERE authors.id = authorcommit.author_id), '
+               'commit_hexsha = (SELECT commits.hexsha FROM commits WHERE commits.id = authorcommit.commit_id)')
+    with op.batch_alter_table('authorcommit') as batch_op:
+        batch_op.drop_constraint('fk_authorcommit_author_id_authors', type_='foreignkey')
+        batch_op.drop_constraint('fk_authorcommit_commit_id_commits', type_='foreignkey')
+        batch_op.drop_constraint('pk_authorcommit', type_='primary')
+        batch_op.drop_column('author_id')
+        batch_op.drop_column('commit_id')
+    with op.batch_alter_table('authorcommit') as batch_op:
+        batch_op.alter_column('commit_hexsha', new_column_name='commit_id', existing_type=sa.String(),
+                              nullable=False)
+        batch_op.alter_column('author_name', existing_type=sa.String(), nullable=False)
+    with op.batch_alter_table('authorcommit') as batch_op:
+        batch_op.create_primary_key('pk_authorcommit', ['author_name', 'commit_id'])
+
+    op.add_column('commits', sa.Column('author_name', sa.String(), nullable=True))
+    op.execute('UPDATE commits SET author_name = '
+               '(SELECT authors.canonical_name FROM authors WHERE authors.id = commits.author_id)')
+    _drop_id_sequence('commits')
+    with op.batch_alter_table('commits') as batch_op:
+        batch_op.drop_constraint('fk_commits_author_id_authors', type_='foreignkey')
+        batch_op.drop_constraint('uq_commits_hexsha', type_='unique')
+        batch_op.drop_constraint('pk_commits', type_='primary')
+        batch_op.drop_column('author_id')
+        batch_op.drop_column('id')
+        batch_op.alter_column('author_name', existing_type=sa.String(), nullable=False)
+        batch_op.create_primary_key('pk_commits', ['hexsha'])
+
+    _drop_id_sequence('authors')
+    with op.batch_alter_table('authors') as batch_op:
+        batch_op.drop_constraint('uq_authors_canonical_name', type_='unique')
+        batch_op.drop_constraint('pk_authors', type_='primary')
+        batch_op.drop_column('id')
+        batch_op.create_primary_key('pk_authors', ['canonical_name'])
+
+    with op.batch_alter_table('commits') as batch_op:
+        batch_op.create_foreign_key('fk_commits_author_name_authors', 'authors', ['author_name'], ['canonical_name'])
+    with op.batch_alter_table('authorcommit') as batch_op:
+        batch_op.create_foreign_key('fk_authorcommit_author_name_authors', 'authors', ['author_name'],
+                                    ['canonical_name'])
+        batch_op.create_foreign_key('fk_authorcommit_commit_id_commits', 'commits', ['commit_id'], ['hexsha'])
+    with op.batch_alter_table('repositories') as batch_op:
+        batch_op.create_foreign_key('fk_repositories_head_commit_id_commits', 'commits', ['head_commit_id'],
+                                    ['hexsha'])
@@ -0,0 +1,32 @@
+"""Add tracked branches of repositories
+
+Revision ID: 4c2f7a9e1b3d
+Revises: 69f96cf4b4da
+Create Date: 2026-10-19 17:41:08.215734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c2f7a9e1b3d'
+down_revision = '69f96cf4b4da'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('branches',
+                    sa.Column('repository_id', sa.Integer(), nullable=False),
+                    sa.Column('name', sa.String(), nullable=False),
+                    sa.Column('head_commit_id', sa.String(), nullable=True),
+                    sa.ForeignKeyConstraint(['head_commit_id'], ['commits.hexsha'],
+                                            name=op.f('fk_branches_head_commit_id_commits')),
+                    sa.ForeignKeyConstraint(['repository_id'], ['repositories.id'],
+                                            name=op.f('fk_branches_repository_id_repositories')),
+                    sa.PrimaryKeyConstraint('repository_id', 'name', name=op.f('pk_branches')))
+
+
+def downgrade():
+    op.drop_table('branches')
@@ -0,0 +1,34 @@
+"""Add configuration hash to Repository object
+
+Revision ID: 69f96cf4b4da
+Revises: 8531609acbea
+Create Date: 2026-10-19 14:02:17.664310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from githammer.config import Configuration
+
+
+# revision identifiers, used by Alembic.
+revision = '69f96cf4b4da'
+down_revision = '8531609acbea'
+branch_labels = None
+depends_on = None
+
+repositories = sa.table('repositories', sa.column('id', sa.Integer), sa.column('configuration_file_path', sa.String),
+                        sa.column('configuration_hash', sa.String))
+
+
+def upgrade():
+    op.add_column('repositories', sa.Column('configuration_hash', sa.String(), nullable=True))
+    bind = op.get_bind()
+    for repository_id, configuration_file_path in bind.execute(
+            sa.select(repositories.c.id, repositories.c.configuration_file_path)):
+        bind.execute(repositories.update().where(repositories.c.id == repository_id).values(
+            configuration_hash=Configuration(configuration_file_path).digest))
+
+
+def downgrade():
+    op.drop_column('repositories', 'configuration_hash')
@@ -0,0 +1,47 @@
+"""Add first-parent chain position to Commit object
+
+Revision ID: 8531609acbea
+Revises: 2df3510f2de0
+Create Date: 2026-10-19 12:41:55.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy_utils import JSONType
+
+
+# revision identifiers, used by Alembic.
+revision = '8531609acbea'
+down_revision = '2df3510f2de0'
+branch_labels = None
+depends_on = None
+
+repositories = sa.table('repositories', sa.column('id', sa.Integer), sa.column('head_commit_id', sa.String))
+commits = sa.table('commits', sa.column('hexsha', sa.String), sa.column('parent_ids', JSONType),
+                   sa.column('repository_id', sa.Integer), sa.column('chain_position', sa.Integer))
+
+
+def upgrade():
+    op.add_column('commits', sa.Column('chain_position', sa.Integer(), nullable=True))
+    op.create_index('ix_commits_repository_id_chain_position', 'commits', ['repository_id', 'chain_position'])
+    bind = op.get_bind()
+    for repository_id, head_commit_id in bind.execute(sa.select(repositories.c.id, repositories.c.head_commit_id)):
+        first_parents = {}
+        for hexsha, parent_ids in bind.execute(sa.select(commits.c.hexsha, commits.c.parent_ids).where(
+                commits.c.repository_id == repository_id)):
+            first_parents[hexsha] = parent_ids[0] if parent_ids else None
+        chain = []
+        commit_id = head_commit_id
+        while commit_id in first_parents:
+            chain.append(commit_id)
+            commit_id = first_parents[commit_id]
+        chain.reverse()
+        if chain:
+            bind.execute(commits.update().where(commits.c.hexsha == sa.bindparam('commit_hexsha')).values(
+                chain_position=sa.bindparam('position')),
+                [{'commit_hexsha': hexsha, 'position': position} for position, hexsha in enumerate(chain)])
+
+
+def downgrade():
+    op.drop_index('ix_commits_repository_id_chain_position', 'commits')
+    op.drop_column('commits', 'chain_position')
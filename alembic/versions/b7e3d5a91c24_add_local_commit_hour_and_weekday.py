@@ -0,0 +1,45 @@
+"""Add local hour and weekday to Commit object
+
+Revision ID: b7e3d5a91c24
+Revises: 4c2f7a9e1b3d
+Create Date: 2026-10-19 19:02:37.540318
+
+"""
+import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e3d5a91c24'
+down_revision = '4c2f7a9e1b3d'
+branch_labels = None
+depends_on = None
+
+commits = sa.table('commits', sa.column('id', sa.Integer), sa.column('commit_time', sa.DateTime),
+                   sa.column('commit_time_utc_offset', sa.Integer), sa.column('local_hour', sa.Integer),
+                   sa.column('local_weekday', sa.Integer))
+
+
+def _local_time(commit_time, offset):
+    return commit_time.replace(tzinfo=None) + datetime.timedelta(seconds=offset)
+
+
+def upgrade():
+    op.add_column('commits', sa.Column('local_hour', sa.Integer(), nullable=True))
+    op.add_column('commits', sa.Column('local_weekday', sa.Integer(), nullable=True))
+    bind = op.get_bind()
+    rows = []
+    for commit_id, commit_time, offset in bind.execute(sa.select(commits.c.id, commits.c.commit_time,
+                                                                 commits.c.commit_time_utc_offset)):
+        local_time = _local_time(commit_time, offset)
+        rows.append({'commit_id': commit_id, 'hour': local_time.hour, 'weekday': local_time.weekday()})
+    if rows:
+        bind.execute(commits.update().where(commits.c.id == sa.bindparam('commit_id')).values(
+            local_hour=sa.bindparam('hour'), local_weekday=sa.bindparam('weekday')), rows)
+
+
+def downgrade():
+    op.drop_column('commits', 'local_weekday')
+    op.drop_column('commits', 'local_hour')
@@ -0,0 +1,26 @@
+"""Add snapshot sampling to Repository and Commit objects
+
+Revision ID: dd0649320541
+Revises: d95efca6f334
+Create Date: 2026-10-19 09:12:41.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'dd0649320541'
+down_revision = 'd95efca6f334'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('repositories', sa.Column('snapshot_frequency', sa.String(), nullable=True))
+    op.add_column('commits', sa.Column('has_snapshot', sa.Boolean(), nullable=False, server_default=sa.true()))
+
+
+def downgrade():
+    op.drop_column('commits', 'has_snapshot')
+    op.drop_column('repositories', 'snapshot_frequency')
@@ -0,0 +1,33 @@
+"""Add cache of summary and graph results
+
+Revision ID: e41c6f08d2a7
+Revises: b7e3d5a91c24
+Create Date: 2026-10-19 20:15:52.604193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e41c6f08d2a7'
+down_revision = 'b7e3d5a91c24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('resultcache',
+                    sa.Column('key', sa.String(), nullable=False),
+                    sa.Column('project_name', sa.String(), nullable=False),
+                    sa.Column('command', sa.String(), nullable=False),
+                    sa.Column('value', sa.LargeBinary(), nullable=False),
+                    sa.Column('size', sa.Integer(), nullable=False),
+                    sa.Column('last_used', sa.DateTime(), nullable=False),
+                    sa.PrimaryKeyConstraint('key', name=op.f('pk_resultcache')))
+    op.create_index(op.f('ix_resultcache_project_name'), 'resultcache', ['project_name'])
+
+
+def downgrade():
+    op.drop_index(op.f('ix_resultcache_project_name'), 'resultcache')
+    op.drop_table('resultcache')
@@ -1,3 +1,32 @@
-from .frequency import Frequency
-from .hammer import Hammer, DatabaseNotInitializedError, OldDatabaseSchemaError
-from .hammer import iter_all_project_names, iter_sources_and_tests
+import importlib
+
+_lazy_attributes = {
+    'Frequency': '.frequency',
+    'Hammer': '.hammer',
+    'DatabaseNotInitializedError': '.hammer',
+    'OldDatabaseSchemaError': '.hammer',
+    'RepositoryConfigurationConflictError': '.hammer',
+    'BranchNotFoundError': '.hammer',
+    'iter_all_project_names': '.hammer',
+    'iter_sources_and_tests': '.sources',
+    'export_project': '.export',
+    'export_formats': '.export',
+    'ExportFormatError': '.export',
+    'DatabaseVerifier': '.verify',
+    'merge_databases': '.merge'
+}
+
+__all__ = list(_lazy_attributes)
+
+
+def __getattr__(name):
+    module_name = _lazy_attributes.get(name)
+    if module_name is None:
+        raise AttributeError('module {} has no attribute {}'.format(__name__, name))
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -16,39 +16,109 @@ import argparse
 import datetime
 import os
 import sys
-import matplotlib.pyplot as plt
 
-from dateutil.parser import parse
+from .frequency import Frequency
 
-from .hammer import Hammer, iter_all_project_names, iter_sources_and_tests
-from .summary import *
+_export_formats = ['csv', 'parquet', 'arrow']
 
 
-def make_hammer(project):
+def make_hammer(project, **kwargs):
+    from .hammer import Hammer
     database_url = os.environ.get('DATABASE_URL')
     if database_url:
-        return Hammer(project, database_url=database_url)
+        return Hammer(project, database_url=database_url, **kwargs)
     else:
-        return Hammer(project)
+        return Hammer(project, **kwargs)
+
+
+def parse_shard(shard_string):
+    index, _, count = shard_string.partition('/')
+    try:
+        return int(index), int(count)
+    except ValueError:
+        raise argparse.ArgumentTypeError('Shard must be given as INDEX/COUNT')
+
+
+def parse_date(date_string):
+    from dateutil.parser import parse
+    date = parse(date_string)
+    if date.tzinfo is None or date.tzinfo.utcoffset(date) is None:
+        date = date.replace(tzinfo=datetime.timezone.utc)
+    return date
+
+
+def query_options(options):
+    kwargs = {}
+    if options.since:
+        kwargs['since'] = parse_date(options.since)
+    if options.until:
+        kwargs['until'] = parse_date(options.until)
+    if options.authors:
+        kwargs['authors'] = options.authors
+    if options.repositories:
+        kwargs['repositories'] = options.repositories
+    if options.branch:
+        kwargs['branch'] = options.branch
+    return kwargs
+
+
+def add_query_arguments(command_parser):
+    command_parser.add_argument('--since', help='Include only commits made at or after this date')
+    command_parser.add_argument('--until', help='Include only commits made before this date')
+    command_parser.add_argument('--author', dest='authors', action='append',
+                                help='Include only this author. Can be given multiple times')
+    command_parser.add_argument('--repository', dest='repositories', action='append',
+                                help='Include only this repository path. Can be given multiple times')
+    command_parser.add_argument('--branch', help='Follow this tracked branch instead of the checked-out one')
 
 
 def update_project(options):
-    hammer = make_hammer(options.project)
+    hammer = make_hammer(options.project, bounded_memory=options.bounded_memory)
     hammer.update_data()
 
 
 def add_repository(options):
+    hammer = make_hammer(options.project, bounded_memory=options.bounded_memory)
+    kwargs = {}
+    if options.earliest_commit_date:
+        kwargs['earliest_date'] = parse_date(options.earliest_commit_date)
+    if options.snapshot_frequency:
+        kwargs['snapshot_frequency'] = Frequency[options.snapshot_frequency]
+    if options.branches:
+        kwargs['branches'] = options.branches
+    if options.shard:
+        kwargs['shard'] = options.shard
+    hammer.add_repository(options.repository, options.configuration, **kwargs)
+
+
+def plan_repository(options):
+    from .plan import plan_repository
     hammer = make_hammer(options.project)
+    kwargs = {}
     if options.earliest_commit_date:
-        date = parse(options.earliest_commit_date)
-        if date.tzinfo is None or date.tzinfo.utcoffset(date) is None:
-            date = date.replace(tzinfo=datetime.timezone.utc)
-        hammer.add_repository(options.repository, options.configuration, earliest_date=date)
-    else:
-        hammer.add_repository(options.repository, options.configuration)
+        kwargs['earliest_date'] = parse_date(options.earliest_commit_date)
+    if options.snapshot_frequency:
+        kwargs['snapshot_frequency'] = Frequency[options.snapshot_frequency]
+    plan = plan_repository(hammer, options.repository, options.configuration, **kwargs)
+    print('Repository {}'.format(plan.repository_path))
+    print('Commits to process: {} ({} with line counts, {} from full trees)'.format(
+        plan.commit_count, plan.snapshot_count, plan.full_snapshot_count))
+    print('Files to blame: {}, files to read: {}, skipped files: {}'.format(plan.blame_count, plan.read_count,
+                                                                          plan.skipped_file_count))
+    print('Bytes to read: {}'.format(plan.byte_count))
+    print('Measured time per commit {:.4f} s, per blame {:.4f} s'.format(plan.seconds_per_commit,
+                                                                      plan.seconds_per_blame))
+    print('Estimated time with {} processes: {}'.format(options.processes, plan.estimated_time(options.processes)))
+    expensive_commits = plan.most_expensive_commits(options.top)
+    if expensive_commits:
+        print('Most expensive commits:')
+        for commit in expensive_commits:
+            print('{}  {:>6} blames  {:>10} bytes  {}'.format(commit.hexsha, commit.blame_count, commit.byte_count,
+                                                               plan.commit_time(commit)))
 
 
 def list_projects(_):
+    from .hammer import iter_all_project_names
     database_url = os.environ.get('DATABASE_URL')
     if database_url:
         iterator = iter_all_project_names(database_url=database_url)
@@ -59,6 +129,7 @@ def list_projects(_):
 
 
 def list_sources(options):
+    from .sources import iter_sources_and_tests
     for item_type, item in iter_sources_and_tests(options.repository, options.configuration):
         if item_type == 'source-file':
             print('S: {}'.format(item))
@@ -66,45 +137,113 @@ def list_sources(options):
             print('T: {}'.format(item))
         elif item_type == 'test-line':
             print('|---{}'.format(item))
+        elif item_type == 'skipped-file':
+            print('X: {}'.format(item))
 
 
 def plot_graph(options):
+    from .summary import graph
     hammer = make_hammer(options.project)
+    kwargs = query_options(options)
+    if options.output_file:
+        kwargs['headless'] = True
     figure = None
     if options.type == 'line-count':
-        figure = total_lines(hammer)
+        figure = graph.total_lines(hammer, **kwargs)
     elif options.type == 'line-author-count':
-        figure = lines_per_author(hammer)
+        figure = graph.lines_per_author(hammer, **kwargs)
     elif options.type == 'test-count':
-        figure = total_tests(hammer)
+        figure = graph.total_tests(hammer, **kwargs)
     elif options.type == 'test-author-count':
-        figure = tests_per_author(hammer)
+        figure = graph.tests_per_author(hammer, **kwargs)
     elif options.type == 'day-of-week':
-        figure = commits_per_weekday(hammer)
+        figure = graph.commits_per_weekday(hammer, **kwargs)
     elif options.type == 'time-of-day':
-        figure = commits_per_hour(hammer)
+        figure = graph.commits_per_hour(hammer, **kwargs)
     if figure:
         if options.output_file:
             figure.savefig(options.output_file)
         else:
+            import matplotlib.pyplot as plt
             plt.show()
 
 
 def print_summary(options):
+    from .summary.table import summary_text
     hammer = make_hammer(options.project)
+    kwargs = query_options(options)
     handle = open(options.output_file, 'w') if options.output_file else sys.stdout
-    handle.write(str(commit_count_table(hammer)))
-    handle.write('\n\n')
-    handle.write(str(line_count_table(hammer)))
-    test_counts = test_count_table(hammer)
-    if test_counts:
-        handle.write('\n\n')
-        handle.write(str(test_counts))
-    handle.write('\n')
+    handle.write(summary_text(hammer, **kwargs))
     if handle is not sys.stdout:
         handle.close()
 
 
+def write_report(options):
+    from .summary.report import write_report
+    hammer = make_hammer(options.project)
+    for path in write_report(hammer, options.output_directory, image_format=options.format,
+                             processes=options.processes, **query_options(options)):
+        print(path)
+
+
+def export_data(options):
+    from .export import ExportFormatError, export_project
+    hammer = make_hammer(options.project)
+    kwargs = query_options(options)
+    if options.frequency:
+        kwargs['frequency'] = Frequency[options.frequency]
+    try:
+        commit_count, count_row_count = export_project(hammer, options.output_directory, file_format=options.format,
+                                                       chunk_size=options.chunk_size, **kwargs)
+    except ExportFormatError as error:
+        sys.exit(str(error))
+    print('Exported {} commits and {} count rows to {}'.format(commit_count, count_row_count,
+                                                                options.output_directory))
+
+
+def verify_database(options):
+    from .verify import DatabaseVerifier
+    from .storage import _default_database_url
+    database_url = os.environ.get('DATABASE_URL') or _default_database_url
+    verifier = DatabaseVerifier(options.expected_project or options.project, options.expected_database_url,
+                                options.project, database_url, max_loaded_commits=options.max_loaded_commits)
+    for hexsha, attribute, expected, actual in verifier.iter_differences():
+        print('Commit {}: Incorrect {} {} (expected {})'.format(hexsha, attribute, actual, expected))
+    if verifier.difference_count:
+        sys.exit('Found {} differences in {} of {} commit ranges'.format(verifier.difference_count,
+                                                                       verifier.differing_bucket_count,
+                                                                       verifier.bucket_count))
+    print('OK, checked {} commits'.format(verifier.commit_count))
+
+
+def merge_databases(options):
+    from .merge import merge_databases
+    from .storage import _default_database_url
+    database_url = os.environ.get('DATABASE_URL') or _default_database_url
+    merge_databases(options.project, database_url, options.shard_database_urls)
+
+
+def serve(options):
+    from .hammer import iter_all_project_names
+    from .server import HammerServer
+    database_url = os.environ.get('DATABASE_URL')
+    if options.projects:
+        project_names = options.projects
+    elif database_url:
+        project_names = list(iter_all_project_names(database_url=database_url))
+    else:
+        project_names = list(iter_all_project_names())
+    server = HammerServer(project_names, database_url=database_url, update_interval=options.update_interval)
+    host, port = server.start(options.host, options.port)
+    print('Serving {} on http://{}:{}/'.format(', '.join(project_names), host, port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
 parser = argparse.ArgumentParser(prog='githammer',
                                  description='Extract statistics from Git repositories')
 command_parsers = parser.add_subparsers()
@@ -114,10 +253,20 @@ init_parser.add_argument('project', help='Name of the project to create')
 init_parser.add_argument('repository', help='Git repository to create the project from')
 init_parser.add_argument('-c', '--configuration', help='Path to the repository configuration file')
 init_parser.add_argument('--earliest-commit-date', help='Ignore commits prior to this date')
+init_parser.add_argument('--snapshot-frequency', choices=[frequency.name for frequency in Frequency],
+                         help='Compute line counts only for the last commit in each interval')
+init_parser.add_argument('--branch', dest='branches', action='append',
+                         help='Also track this branch. Can be given multiple times')
+init_parser.add_argument('--bounded-memory', action='store_true',
+                         help='Keep line counts in memory only for commits that later commits are diffed against')
+init_parser.add_argument('--shard', type=parse_shard, metavar='INDEX/COUNT',
+                         help='Process only this contiguous part of the unprocessed commits')
 init_parser.set_defaults(func=add_repository)
 
 update_parser = command_parsers.add_parser('update-project', help='Update an existing project with new commits')
 update_parser.add_argument('project', help='Name of the project to update')
+update_parser.add_argument('--bounded-memory', action='store_true',
+                           help='Keep line counts in memory only for commits that later commits are diffed against')
 update_parser.set_defaults(func=update_project)
 
 add_parser = command_parsers.add_parser('add-repository', help='Add a repository to an existing project')
@@ -125,8 +274,28 @@ add_parser.add_argument('project', help='Project to add the repository to')
 add_parser.add_argument('repository', help='Path to the git repository to add')
 add_parser.add_argument('-c', '--configuration', help='Path to the repository configuration file')
 add_parser.add_argument('--earliest-commit-date', help='Ignore commits prior to this date')
+add_parser.add_argument('--snapshot-frequency', choices=[frequency.name for frequency in Frequency],
+                        help='Compute line counts only for the last commit in each interval')
+add_parser.add_argument('--branch', dest='branches', action='append',
+                        help='Also track this branch. Can be given multiple times')
+add_parser.add_argument('--bounded-memory', action='store_true',
+                        help='Keep line counts in memory only for commits that later commits are diffed against')
+add_parser.add_argument('--shard', type=parse_shard, metavar='INDEX/COUNT',
+                        help='Process only this contiguous part of the unprocessed commits')
 add_parser.set_defaults(func=add_repository)
 
+plan_parser = command_parsers.add_parser('plan', help='Estimate the work needed to add or update a repository')
+plan_parser.add_argument('project', help='Project the repository would be added to')
+plan_parser.add_argument('repository', help='Path to the git repository to examine')
+plan_parser.add_argument('-c', '--configuration', help='Path to the repository configuration file')
+plan_parser.add_argument('--earliest-commit-date', help='Ignore commits prior to this date')
+plan_parser.add_argument('--snapshot-frequency', choices=[frequency.name for frequency in Frequency],
+                         help='Compute line counts only for the last commit in each interval')
+plan_parser.add_argument('-j', '--processes', type=int, default=1,
+                         help='Number of processes to estimate the processing time for')
+plan_parser.add_argument('--top', type=int, default=10, help='Number of most expensive commits to list')
+plan_parser.set_defaults(func=plan_repository)
+
 project_list_parser = command_parsers.add_parser('list-projects', help='List names of existing projects')
 project_list_parser.set_defaults(func=list_projects)
 
@@ -142,6 +311,7 @@ graph_parser.add_argument('type', help='The type of graph to make',
                                    'time-of-day'])
 graph_parser.add_argument('-o', '--output-file',
                           help='Name of the file to save the graph to. If omitted, graph is displayed on screen')
+add_query_arguments(graph_parser)
 graph_parser.set_defaults(func=plot_graph)
 
 summary_parser = command_parsers.add_parser('summary',
@@ -149,7 +319,51 @@ summary_parser = command_parsers.add_parser('summary',
 summary_parser.add_argument('project', help='Name of the project to summarize')
 summary_parser.add_argument('-o', '--output-file',
                             help='Name of the file to print the summary to. If omitted, summary is printed to standard output')
+add_query_arguments(summary_parser)
 summary_parser.set_defaults(func=print_summary)
 
+report_parser = command_parsers.add_parser('report', help='Write the summary and all graphs to a directory')
+report_parser.add_argument('project', help='Name of the project to report')
+report_parser.add_argument('output_directory', help='Directory to write the report files to')
+report_parser.add_argument('-f', '--format', default='png', help='Image format of the graphs')
+report_parser.add_argument('-j', '--processes', type=int, default=1,
+                           help='Number of processes to render the graphs in parallel')
+add_query_arguments(report_parser)
+report_parser.set_defaults(func=write_report)
+
+export_parser = command_parsers.add_parser('export', help='Export commits and line counts to files')
+export_parser.add_argument('project', help='Name of the project to export')
+export_parser.add_argument('output_directory', help='Directory to write the exported files to')
+export_parser.add_argument('-f', '--format', choices=_export_formats, default='csv',
+                           help='File format of the exported files. parquet and arrow require pyarrow')
+export_parser.add_argument('--frequency', choices=[frequency.name for frequency in Frequency],
+                           help='Export line counts only for snapshots sampled at this frequency')
+export_parser.add_argument('--chunk-size', type=int, default=10000, help='Number of rows to write at a time')
+add_query_arguments(export_parser)
+export_parser.set_defaults(func=export_data)
+
+verify_parser = command_parsers.add_parser('verify', help='Compare a project against a known good database')
+verify_parser.add_argument('project', help='Name of the project to verify')
+verify_parser.add_argument('expected_database_url', help='URL of the database containing the known good project')
+verify_parser.add_argument('--expected-project', help='Name of the known good project, if different from project')
+verify_parser.add_argument('--max-loaded-commits', type=int, default=100000,
+                           help='Maximum number of commits to load at a time when locating differences')
+verify_parser.set_defaults(func=verify_database)
+
+merge_parser = command_parsers.add_parser('merge-databases',
+                                          help='Merge a project processed in shards into the database')
+merge_parser.add_argument('project', help='Name of the project to merge')
+merge_parser.add_argument('shard_database_urls', nargs='+', metavar='shard_database_url',
+                          help='URL of a database containing one shard of the project')
+merge_parser.set_defaults(func=merge_databases)
+
+serve_parser = command_parsers.add_parser('serve', help='Keep projects loaded and answer queries over HTTP')
+serve_parser.add_argument('projects', nargs='*', help='Names of the projects to serve. If omitted, all projects are served')
+serve_parser.add_argument('--host', default='127.0.0.1', help='Address to listen on')
+serve_parser.add_argument('-p', '--port', type=int, default=8080, help='Port to listen on')
+serve_parser.add_argument('--update-interval', type=float,
+                          help='Seconds between automatic updates. If omitted, projects are updated only on request')
+serve_parser.set_defaults(func=serve)
+
 parsed_args = parser.parse_args()
 parsed_args.func(parsed_args)
@@ -17,8 +17,8 @@ from operator import attrgetter
 from .countdict import add_count_dict
 
 
-def _iter_combined_commits(iterators):
-    current_values = [None] * len(iterators)
+def _iter_combined_commits(iterators, initial_values=None):
+    current_values = list(initial_values) if initial_values else [None] * len(iterators)
     has_finished = [False] * len(iterators)
     next_values = [None] * len(iterators)
     for index, iterator in enumerate(iterators):
@@ -50,9 +50,12 @@ class CombinedCommit:
 
     def __init__(self, commits):
         actual_commits = [commit for commit in commits if commit is not None]
-        max_index, max_commit = max(enumerate(actual_commits), key=lambda pair: pair[1].commit_time)
-        self.commit_time = max_commit.commit_time
-        self.commit_time_utc_offset = actual_commits[max_index].commit_time_utc_offset
+        self.commit_time = None
+        self.commit_time_utc_offset = None
+        if actual_commits:
+            max_commit = max(actual_commits, key=attrgetter('commit_time'))
+            self.commit_time = max_commit.commit_time
+            self.commit_time_utc_offset = max_commit.commit_time_utc_offset
         self.line_counts = {}
         self.test_counts = {}
         for commit in commits:
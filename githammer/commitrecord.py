@@ -0,0 +1,166 @@
+# Copyright 2019 Jaakko Kangasharju
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+import sys
+import threading
+from array import array
+
+from .dbtypes import _time_offset_to_local_time
+
+
+def _pack_counts(author_table, counts):
+    if not counts:
+        return None
+    packed = array('i')
+    for author_index, count in sorted((author_table.index(author), count) for author, count in counts.items()):
+        packed.append(author_index)
+        packed.append(count)
+    return packed
+
+
+def _unpack_counts(author_table, packed):
+    if packed is None:
+        return {}
+    return {author_table[packed[index]]: packed[index + 1] for index in range(0, len(packed), 2)}
+
+
+def _iter_packed_counts(packed):
+    if packed is not None:
+        for index in range(0, len(packed), 2):
+            yield packed[index], packed[index + 1]
+
+
+def _sum_packed_counts(packed, author_indices):
+    return sum(count for author_index, count in _iter_packed_counts(packed) if author_index in author_indices)
+
+
+def _as_utc(time):
+    if time.tzinfo is None:
+        return time.replace(tzinfo=datetime.timezone.utc)
+    else:
+        return time.astimezone(datetime.timezone.utc)
+
+
+class AuthorTable:
+
+    def __init__(self):
+        self._authors = []
+        self._indices = {}
+        self._lock = threading.Lock()
+
+    def index(self, author):
+        index = self._indices.get(author.canonical_name)
+        if index is None:
+            with self._lock:
+                index = self._indices.get(author.canonical_name)
+                if index is None:
+                    index = len(self._authors)
+                    self._authors.append(author)
+                    self._indices[author.canonical_name] = index
+        return index
+
+    def find(self, canonical_name):
+        return self._indices.get(canonical_name)
+
+    def __getitem__(self, index):
+        return self._authors[index]
+
+    def __len__(self):
+        return len(self._authors)
+
+
+class CommitRecord:
+    __slots__ = ('hexsha', 'commit_time', 'commit_time_utc_offset', 'added_lines', 'deleted_lines', 'parent_ids',
+                 'repository_id', 'has_snapshot', '_author_table', '_author_index', '_line_counts', '_test_counts',
+                 '_count_loader')
+
+    def __init__(self, author_table, hexsha, author, commit_time, commit_time_utc_offset, parent_ids, repository_id,
+                 added_lines=None, deleted_lines=None, has_snapshot=True):
+        self.hexsha = sys.intern(hexsha)
+        self.commit_time = _as_utc(commit_time)
+        self.commit_time_utc_offset = commit_time_utc_offset
+        self.added_lines = added_lines
+        self.deleted_lines = deleted_lines
+        self.parent_ids = tuple(sys.intern(parent_id) for parent_id in parent_ids)
+        self.repository_id = repository_id
+        self.has_snapshot = has_snapshot
+        self._author_table = author_table
+        self._author_index = author_table.index(author)
+        self._line_counts = None
+        self._test_counts = None
+        self._count_loader = None
+
+    def _load_counts(self):
+        if self._count_loader is not None:
+            count_loader = self._count_loader
+            self._count_loader = None
+            self.set_packed_counts(*count_loader(self))
+
+    @property
+    def author(self):
+        return self._author_table[self._author_index]
+
+    @property
+    def author_name(self):
+        return self.author.canonical_name
+
+    @property
+    def line_counts(self):
+        self._load_counts()
+        return _unpack_counts(self._author_table, self._line_counts)
+
+    @line_counts.setter
+    def line_counts(self, line_counts):
+        self._line_counts = _pack_counts(self._author_table, line_counts)
+        self._count_loader = None
+
+    @property
+    def test_counts(self):
+        self._load_counts()
+        return _unpack_counts(self._author_table, self._test_counts)
+
+    @test_counts.setter
+    def test_counts(self, test_counts):
+        self._test_counts = _pack_counts(self._author_table, test_counts)
+        self._count_loader = None
+
+    def set_packed_counts(self, line_counts, test_counts):
+        self._line_counts = line_counts if line_counts else None
+        self._test_counts = test_counts if test_counts else None
+        self._count_loader = None
+
+    def evict_counts(self, count_loader):
+        self._line_counts = None
+        self._test_counts = None
+        self._count_loader = count_loader
+
+    @property
+    def has_evicted_counts(self):
+        return self._count_loader is not None
+
+    def indexed_counts(self):
+        self._load_counts()
+        counts = {author_index: (count, 0) for author_index, count in _iter_packed_counts(self._line_counts)}
+        for author_index, count in _iter_packed_counts(self._test_counts):
+            counts[author_index] = (counts.get(author_index, (0, 0))[0], count)
+        return counts
+
+    def counts_for_authors(self, author_indices):
+        self._load_counts()
+        return (_sum_packed_counts(self._line_counts, author_indices),
+                _sum_packed_counts(self._test_counts, author_indices))
+
+    def commit_time_tz(self):
+        return _time_offset_to_local_time(self.commit_time, self.commit_time_utc_offset)
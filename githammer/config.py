@@ -1,19 +1,84 @@
 import re
 import errno
+import hashlib
 import json
 
 from globber import globber
 
+_binary_attributes = ['binary', 'diff', 'text']
 
-def _matches_file_pattern(file, pattern):
+
+def _glob_component_regex(component):
+    parts = []
+    index = 0
+    while index < len(component):
+        character = component[index]
+        if character == '*':
+            parts.append('[^/]*')
+        elif character == '?':
+            parts.append('[^/]')
+        elif character == '\\':
+            if index + 1 == len(component):
+                return '(?!)'
+            index += 1
+            parts.append(re.escape(component[index]))
+        else:
+            parts.append(re.escape(character))
+        index += 1
+    return ''.join(parts)
+
+
+def _glob_regex(pattern):
+    globber.match(pattern, '')
+    pattern = pattern.rstrip('/')
+    while '**/**' in pattern:
+        pattern = pattern.replace('**/**', '**')
+    components = pattern.split('/')
+    if components == ['**']:
+        return '.*'
+    parts = []
+    for index, component in enumerate(components):
+        if component == '**':
+            if index == 0:
+                parts.append('(?:[^/]*/)*')
+            elif index == len(components) - 1:
+                parts.append('(?:/[^/]*)*')
+            else:
+                parts.append('/(?:[^/]*/)*')
+        else:
+            if index > 0 and components[index - 1] != '**':
+                parts.append('/')
+            parts.append(_glob_component_regex(component))
+    return ''.join(parts)
+
+
+def _iter_glob_regexes(pattern):
     if type(pattern) is str:
-        return globber.match(pattern, file)
+        yield _glob_regex(pattern)
     elif type(pattern) is list:
-        return any(_matches_file_pattern(file, p) for p in pattern)
+        for subpattern in pattern:
+            yield from _iter_glob_regexes(subpattern)
     else:
         raise TypeError('Pattern {} not list or string'.format(pattern))
 
 
+def _compile_file_pattern(pattern):
+    if pattern is None:
+        return None
+    regexes = list(_iter_glob_regexes(pattern))
+    if not regexes:
+        return re.compile('(?!)')
+    return re.compile('|'.join('(?:{})'.format(regex) for regex in regexes), re.DOTALL)
+
+
+def _matches_file_pattern(file, pattern):
+    return _compile_file_pattern(pattern).fullmatch(file.rstrip('/')) is not None
+
+
+def _is_attribute_set(value):
+    return value is not None and value not in ('unset', 'unspecified', 'false')
+
+
 class Configuration:
     def __init__(self, file_path=None):
         if file_path:
@@ -31,6 +96,7 @@ class Configuration:
                     fp.close()
         else:
             config_json = {}
+        self.digest = hashlib.sha256(json.dumps(config_json, sort_keys=True).encode('utf-8')).hexdigest()
         if 'sourceFiles' in config_json:
             self.source_files = config_json['sourceFiles']
         else:
@@ -47,16 +113,53 @@ class Configuration:
             self.test_line_regex = re.compile(config_json['testLineRegex'])
         else:
             self.test_line_regex = None
+        if 'maxFileSizeBytes' in config_json:
+            self.max_file_size_bytes = config_json['maxFileSizeBytes']
+        else:
+            self.max_file_size_bytes = None
+        self.skip_binary = config_json.get('skipBinary', False)
+        self.honor_gitattributes_generated = config_json.get('honorGitattributesGenerated', False)
+        self.honor_gitattributes_vendored = config_json.get('honorGitattributesVendored', False)
+        self._source_file_regex = _compile_file_pattern(self.source_files)
+        self._excluded_source_file_regex = _compile_file_pattern(self.excluded_source_files)
+        self._test_file_regex = _compile_file_pattern(self.test_files)
 
     def is_source_file(self, path):
-        is_included = self.source_files is None or _matches_file_pattern(path, self.source_files)
-        is_excluded = self.excluded_source_files is not None and _matches_file_pattern(path, self.excluded_source_files)
+        path = path.rstrip('/')
+        is_included = self._source_file_regex is None or self._source_file_regex.fullmatch(path) is not None
+        is_excluded = self._excluded_source_file_regex is not None and \
+            self._excluded_source_file_regex.fullmatch(path) is not None
         return is_included and not is_excluded
 
+    def has_skip_rules(self):
+        return self.max_file_size_bytes is not None or self.skip_binary or bool(self.attribute_names())
+
+    def attribute_names(self):
+        names = []
+        if self.skip_binary:
+            names.extend(_binary_attributes)
+        if self.honor_gitattributes_generated:
+            names.append('linguist-generated')
+        if self.honor_gitattributes_vendored:
+            names.append('linguist-vendored')
+        return names
+
+    def skip_reason(self, size, attributes):
+        if self.max_file_size_bytes is not None and size > self.max_file_size_bytes:
+            return 'size {} bytes'.format(size)
+        if self.skip_binary and (attributes.get('binary') == 'set' or attributes.get('diff') == 'unset' or
+                                 attributes.get('text') == 'unset'):
+            return 'binary'
+        if self.honor_gitattributes_generated and _is_attribute_set(attributes.get('linguist-generated')):
+            return 'generated'
+        if self.honor_gitattributes_vendored and _is_attribute_set(attributes.get('linguist-vendored')):
+            return 'vendored'
+        return None
+
     def is_test_file(self, path):
         if not self.is_source_file(path):
             return False
-        return self.test_files is not None and _matches_file_pattern(path, self.test_files)
+        return self._test_file_regex is not None and self._test_file_regex.fullmatch(path.rstrip('/')) is not None
 
     def iter_test_lines(self, path, lines):
         if not self.is_test_file(path):
@@ -16,13 +16,14 @@ import datetime
 import re
 
 import git
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, orm
+from sqlalchemy import Column, String, Integer, DateTime, Boolean, ForeignKey, Index, LargeBinary, orm, true
 from sqlalchemy_utils import JSONType
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.schema import MetaData
 
 from .config import Configuration
+from .frequency import Frequency
 
 
 def _time_offset_to_local_time(time, offset):
@@ -53,15 +54,19 @@ class Repository(Base):
     id = Column(Integer, primary_key=True)
     repository_path = Column(String)
     configuration_file_path = Column(String)
+    configuration_hash = Column(String)
     head_commit_id = Column(String, ForeignKey('commits.hexsha'))
     start_time = Column(DateTime())
     start_time_utc_offset = Column(Integer)
+    snapshot_frequency = Column(String)
 
     head_commit = relationship('Commit', foreign_keys=[head_commit_id])
 
     def __init__(self, **kwargs):
         super(Repository, self).__init__(**kwargs)
         self._init_properties()
+        if self.configuration_hash is None:
+            self.configuration_hash = self.configuration.digest
 
     @orm.reconstructor
     def _init_properties(self):
@@ -74,19 +79,34 @@ class Repository(Base):
         else:
             return None
 
+    def sampling_frequency(self):
+        if self.snapshot_frequency:
+            return Frequency[self.snapshot_frequency]
+        else:
+            return None
+
+
+class Branch(Base):
+    __tablename__ = 'branches'
+
+    repository_id = Column(Integer, ForeignKey('repositories.id'), primary_key=True)
+    name = Column(String, primary_key=True)
+    head_commit_id = Column(String, ForeignKey('commits.hexsha'))
+
 
 class ProjectRepository(Base):
     __tablename__ = 'projectrepository'
 
     project_name = Column(String, ForeignKey('projects.project_name'), primary_key=True)
-    repository_id = Column(String, ForeignKey('repositories.id'), primary_key=True)
+    repository_id = Column(Integer, ForeignKey('repositories.id'), primary_key=True)
 
 
 class Author(Base):
     __tablename__ = 'authors'
     _name_regex = re.compile('^(.*)\\s+(<.*>)$')
 
-    canonical_name = Column(String, primary_key=True)
+    id = Column(Integer, primary_key=True)
+    canonical_name = Column(String, unique=True, nullable=False)
     aliases = Column(JSONType)
 
     @property
@@ -109,27 +129,24 @@ class Author(Base):
 
 class Commit(Base):
     __tablename__ = 'commits'
+    __table_args__ = (Index('ix_commits_repository_id_chain_position', 'repository_id', 'chain_position'),)
 
-    hexsha = Column(String, primary_key=True)
-    author_name = Column(String, ForeignKey('authors.canonical_name'), nullable=False)
+    id = Column(Integer, primary_key=True)
+    hexsha = Column(String, unique=True, nullable=False)
+    author_id = Column(Integer, ForeignKey('authors.id'), nullable=False)
     added_lines = Column(Integer)
     deleted_lines = Column(Integer)
     commit_time = Column(DateTime(), nullable=False)
     commit_time_utc_offset = Column(Integer, nullable=False)
     parent_ids = Column(JSONType)
     repository_id = Column(Integer, ForeignKey('repositories.id'))
+    has_snapshot = Column(Boolean, nullable=False, default=True, server_default=true())
+    chain_position = Column(Integer)
+    local_hour = Column(Integer)
+    local_weekday = Column(Integer)
 
     author = relationship('Author', back_populates='commits', lazy='joined')
 
-    def __init__(self, **kwargs):
-        super(Commit, self).__init__(**kwargs)
-        self._init_properties()
-
-    @orm.reconstructor
-    def _init_properties(self):
-        self.line_counts = {}
-        self.test_counts = {}
-
     def commit_time_tz(self):
         return _time_offset_to_local_time(self.commit_time, self.commit_time_utc_offset)
 
@@ -140,10 +157,21 @@ Author.commits = relationship('Commit', order_by=Commit.commit_time, back_popula
 class AuthorCommitDetail(Base):
     __tablename__ = 'authorcommit'
 
-    author_name = Column(String, ForeignKey('authors.canonical_name'), primary_key=True)
-    commit_id = Column(String, ForeignKey('commits.hexsha'), primary_key=True)
+    author_id = Column(Integer, ForeignKey('authors.id'), primary_key=True)
+    commit_id = Column(Integer, ForeignKey('commits.id'), primary_key=True)
     line_count = Column(Integer, nullable=False)
     test_count = Column(Integer)
 
     author = relationship('Author')
     commit = relationship('Commit')
+
+
+class CachedResult(Base):
+    __tablename__ = 'resultcache'
+
+    key = Column(String, primary_key=True)
+    project_name = Column(String, nullable=False, index=True)
+    command = Column(String, nullable=False)
+    value = Column(LargeBinary, nullable=False)
+    size = Column(Integer, nullable=False)
+    last_used = Column(DateTime(), nullable=False)
@@ -0,0 +1,155 @@
+# Copyright 2019 Jaakko Kangasharju
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import csv
+import os
+
+export_formats = ['csv', 'parquet', 'arrow']
+_default_chunk_size = 10000
+
+_commit_columns = [
+    ('hexsha', 'string'),
+    ('repository', 'string'),
+    ('author', 'string'),
+    ('commit_time', 'time'),
+    ('commit_time_utc_offset', 'int'),
+    ('added_lines', 'int'),
+    ('deleted_lines', 'int'),
+    ('has_snapshot', 'bool')
+]
+_author_count_columns = [
+    ('hexsha', 'string'),
+    ('author', 'string'),
+    ('line_count', 'int'),
+    ('test_count', 'int')
+]
+_snapshot_count_columns = [
+    ('commit_time', 'time'),
+    ('author', 'string'),
+    ('line_count', 'int'),
+    ('test_count', 'int')
+]
+
+
+class ExportFormatError(Exception):
+    pass
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    elif hasattr(value, 'isoformat'):
+        return value.isoformat()
+    else:
+        return value
+
+
+class _CsvWriter:
+
+    def __init__(self, path, columns):
+        self._file = open(path, 'w', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow([name for name, _ in columns])
+
+    def write(self, rows):
+        self._writer.writerows([_csv_value(value) for value in row] for row in rows)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class _ArrowWriter:
+
+    def __init__(self, path, columns, file_format):
+        try:
+            import pyarrow
+        except ImportError:
+            raise ExportFormatError('Exporting to {} requires pyarrow to be installed'.format(file_format))
+        arrow_types = {
+            'string': pyarrow.string(),
+            'time': pyarrow.timestamp('us', tz='UTC'),
+            'int': pyarrow.int64(),
+            'bool': pyarrow.bool_()
+        }
+        self._pyarrow = pyarrow
+        self._schema = pyarrow.schema([(name, arrow_types[kind]) for name, kind in columns])
+        if file_format == 'parquet':
+            import pyarrow.parquet
+            self._writer = pyarrow.parquet.ParquetWriter(path, self._schema)
+        else:
+            import pyarrow.ipc
+            self._writer = pyarrow.ipc.new_file(path, self._schema)
+
+    def write(self, rows):
+        columns = list(zip(*rows))
+        arrays = [self._pyarrow.array(column, type=field.type) for column, field in zip(columns, self._schema)]
+        self._writer.write_table(self._pyarrow.Table.from_arrays(arrays, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def _make_writer(output_directory, name, columns, file_format):
+    path = os.path.join(output_directory, '{}.{}'.format(name, file_format))
+    if file_format == 'csv':
+        return _CsvWriter(path, columns)
+    elif file_format in export_formats:
+        return _ArrowWriter(path, columns, file_format)
+    else:
+        raise ExportFormatError('Unknown export format {}'.format(file_format))
+
+
+def _write_in_chunks(writer, rows, chunk_size):
+    chunk = []
+    row_count = 0
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            writer.write(chunk)
+            row_count += len(chunk)
+            chunk = []
+    if chunk:
+        writer.write(chunk)
+        row_count += len(chunk)
+    return row_count
+
+
+def _iter_snapshot_count_rows(hammer, frequency, **kwargs):
+    for commit in hammer.iter_commits(frequency=frequency, **kwargs):
+        line_counts = commit.line_counts
+        test_counts = commit.test_counts
+        for author in sorted(set(line_counts) | set(test_counts), key=lambda a: a.canonical_name):
+            yield commit.commit_time, author.canonical_name, line_counts.get(author, 0), test_counts.get(author, 0)
+
+
+def export_project(hammer, output_directory, file_format='csv', frequency=None, chunk_size=_default_chunk_size,
+                   **kwargs):
+    os.makedirs(output_directory, exist_ok=True)
+    writer = _make_writer(output_directory, 'commits', _commit_columns, file_format)
+    try:
+        commit_count = _write_in_chunks(writer, hammer.iter_commit_rows(chunk_size, **kwargs), chunk_size)
+    finally:
+        writer.close()
+    if frequency:
+        writer = _make_writer(output_directory, 'snapshot_counts', _snapshot_count_columns, file_format)
+        rows = _iter_snapshot_count_rows(hammer, frequency, **kwargs)
+    else:
+        writer = _make_writer(output_directory, 'author_counts', _author_count_columns, file_format)
+        rows = hammer.iter_author_count_rows(chunk_size, **kwargs)
+    try:
+        count_row_count = _write_in_chunks(writer, rows, chunk_size)
+    finally:
+        writer.close()
+    return commit_count, count_row_count
@@ -0,0 +1,79 @@
+# Copyright 2019 Jaakko Kangasharju
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+class CountFrontier:
+
+    def __init__(self, commits, pending_children, evict):
+        self._commits = commits
+        self._pending_children = pending_children
+        self._evict = evict
+        self._anchors = {}
+        self._holds = {}
+
+    def _find_anchor(self, commit_id):
+        while commit_id:
+            commit = self._commits.get(commit_id)
+            if commit is None:
+                return None
+            if commit.has_snapshot:
+                return commit
+            commit_id = commit.parent_ids[0] if commit.parent_ids else None
+        return None
+
+    def _hold(self, commit_id, anchor):
+        self._anchors[commit_id] = anchor
+        self._holds[anchor] = self._holds.get(anchor, 0) + 1
+
+    def _release_child(self, parent_id):
+        child_count = self._pending_children.get(parent_id)
+        if child_count is None:
+            return
+        if child_count > 1:
+            self._pending_children[parent_id] = child_count - 1
+            return
+        del self._pending_children[parent_id]
+        anchor = self._anchors.pop(parent_id, None)
+        if anchor is None:
+            return
+        hold_count = self._holds[anchor] - 1
+        if hold_count:
+            self._holds[anchor] = hold_count
+        else:
+            del self._holds[anchor]
+            self._evict(anchor)
+
+    @property
+    def retained_count(self):
+        return len(self._holds)
+
+    def retain_processed(self):
+        for commit_id in self._pending_children:
+            if commit_id in self._commits:
+                anchor = self._find_anchor(commit_id)
+                if anchor is not None:
+                    self._hold(commit_id, anchor)
+        return list(self._holds)
+
+    def add(self, commit):
+        if commit.has_snapshot:
+            anchor = commit
+        else:
+            anchor = self._anchors.get(commit.parent_ids[0]) if commit.parent_ids else None
+        if anchor is not None and self._pending_children.get(commit.hexsha):
+            self._hold(commit.hexsha, anchor)
+        if commit.parent_ids:
+            self._release_child(commit.parent_ids[0])
+        if commit.has_snapshot and commit not in self._holds:
+            self._evict(commit)
@@ -0,0 +1,201 @@
+# Copyright 2019 Jaakko Kangasharju
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import subprocess
+import tempfile
+import threading
+from collections import namedtuple
+
+_binary_check_size = 8000
+_discard_chunk_size = 65536
+_read_chunk_size = 65536
+_null_blob_id = '0' * 40
+
+DiffEntry = namedtuple('DiffEntry', ['change_type', 'old_path', 'new_path', 'old_blob_id', 'new_blob_id'])
+TreeEntry = namedtuple('TreeEntry', ['path', 'hexsha', 'size'])
+BlameCount = namedtuple('BlameCount', ['author', 'line_count', 'lines'])
+
+
+def _git_command(git_repository, *args):
+    return ['git', '--git-dir', git_repository.git_dir] + list(args)
+
+
+def _working_directory(git_repository):
+    return git_repository.working_tree_dir or git_repository.git_dir
+
+
+def _check_attributes(git_repository, source_args, paths, attribute_names, environment=None):
+    process = subprocess.run(_git_command(git_repository, 'check-attr', '--stdin', '-z', *source_args,
+                                          *attribute_names),
+                             cwd=_working_directory(git_repository), env=environment,
+                             input=b'\0'.join(path.encode('utf-8') for path in paths) + b'\0',
+                             stdout=subprocess.PIPE, check=True)
+    fields = process.stdout.decode('utf-8').split('\0')
+    attributes = {}
+    for index in range(0, len(fields) - 2, 3):
+        path, name, value = fields[index:index + 3]
+        attributes.setdefault(path, {})[name] = value
+    return attributes
+
+
+def read_attributes(git_repository, commit_id, paths, attribute_names):
+    if not paths or not attribute_names:
+        return {}
+    if git_repository.git.version_info >= (2, 40):
+        return _check_attributes(git_repository, ['--source={}'.format(commit_id)], paths, attribute_names)
+    with tempfile.TemporaryDirectory(prefix='git-hammer-') as index_directory:
+        environment = dict(os.environ, GIT_INDEX_FILE=os.path.join(index_directory, 'index'))
+        subprocess.run(_git_command(git_repository, 'read-tree', commit_id), cwd=_working_directory(git_repository),
+                       env=environment, check=True)
+        return _check_attributes(git_repository, ['--cached'], paths, attribute_names, environment)
+
+
+def is_binary_data(data):
+    return b'\0' in data[:_binary_check_size]
+
+
+def is_binary_blob(blob):
+    stream = blob.data_stream
+    is_binary = is_binary_data(stream.read(_binary_check_size))
+    while stream.read(_discard_chunk_size):
+        pass
+    return is_binary
+
+
+def _iter_null_terminated(stream):
+    pending = b''
+    for chunk in iter(lambda: stream.read(_read_chunk_size), b''):
+        fields = (pending + chunk).split(b'\0')
+        pending = fields.pop()
+        yield from fields
+
+
+def _iter_lines(stream):
+    for line in stream:
+        yield line[:-1] if line.endswith(b'\n') else line
+
+
+def _decode_path(path):
+    return path.decode('utf-8', 'surrogateescape')
+
+
+def _blob_id(blob_id):
+    return None if blob_id == _null_blob_id else blob_id
+
+
+def _iter_command_output(git_repository, iter_records, *args):
+    command = _git_command(git_repository, *args)
+    process = subprocess.Popen(command, cwd=_working_directory(git_repository), stdout=subprocess.PIPE)
+    try:
+        yield from iter_records(process.stdout)
+    finally:
+        process.stdout.close()
+        return_code = process.wait()
+    if return_code != 0:
+        raise subprocess.CalledProcessError(return_code, command)
+
+
+def _iter_command_fields(git_repository, *args):
+    return _iter_command_output(git_repository, _iter_null_terminated, *args)
+
+
+def iter_raw_diff(git_repository, old_commit_id, new_commit_id):
+    fields = _iter_command_fields(git_repository, 'diff-tree', '-r', '--raw', '-z', '-M', '--abbrev=40',
+                                  '--full-index', '-w', '--ignore-submodules', '--no-color', old_commit_id,
+                                  new_commit_id)
+    for header in fields:
+        _, _, old_blob_id, new_blob_id, status = header.decode('ascii')[1:].split(' ')
+        change_type = status[0]
+        old_path = new_path = _decode_path(next(fields))
+        if change_type in 'RC':
+            new_path = _decode_path(next(fields))
+        elif change_type == 'A':
+            old_path = None
+        elif change_type == 'D':
+            new_path = None
+        yield DiffEntry(change_type, old_path, new_path, _blob_id(old_blob_id), _blob_id(new_blob_id))
+
+
+def iter_tree_blobs(git_repository, commit_id):
+    for record in _iter_command_fields(git_repository, 'ls-tree', '-r', '-l', '-z', '--full-tree', commit_id):
+        metadata, path = record.split(b'\t', 1)
+        _, object_type, hexsha, size = metadata.split()
+        if object_type == b'blob':
+            yield TreeEntry(_decode_path(path), hexsha.decode('ascii'), int(size))
+
+
+def iter_blame_counts(git_repository, commit_id, path, keep_lines=False):
+    output_format = '--porcelain' if keep_lines else '--incremental'
+    names = {}
+    emails = {}
+    line_counts = {}
+    lines = {}
+    blamed_id = None
+    expects_header = True
+    for line in _iter_command_output(git_repository, _iter_lines, 'blame', '-w', output_format, commit_id, '--',
+                                     path):
+        if expects_header:
+            fields = line.split(b' ')
+            blamed_id = fields[0]
+            if not keep_lines:
+                line_counts[blamed_id] = line_counts.get(blamed_id, 0) + int(fields[3])
+            expects_header = False
+        elif line.startswith(b'\t'):
+            line_counts[blamed_id] = line_counts.get(blamed_id, 0) + 1
+            lines.setdefault(blamed_id, []).append(line[1:].decode('utf-8', 'ignore'))
+            expects_header = True
+        elif line.startswith(b'author '):
+            names[blamed_id] = line[7:]
+        elif line.startswith(b'author-mail '):
+            emails[blamed_id] = line[12:]
+        elif line.startswith(b'filename ') and not keep_lines:
+            expects_header = True
+    for blamed_id, line_count in line_counts.items():
+        author = _decode_path(names[blamed_id] + b' ' + emails[blamed_id])
+        yield BlameCount(author, line_count, lines.get(blamed_id) if keep_lines else None)
+
+
+def _write_object_ids(stream, hexshas):
+    try:
+        for hexsha in hexshas:
+            stream.write(hexsha.encode('ascii') + b'\n')
+        stream.close()
+    except (BrokenPipeError, ValueError):
+        pass
+
+
+def iter_blob_contents(git_repository, hexshas):
+    if not hexshas:
+        return
+    process = subprocess.Popen(_git_command(git_repository, 'cat-file', '--batch'),
+                               cwd=_working_directory(git_repository), stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    writer = threading.Thread(target=_write_object_ids, args=(process.stdin, hexshas), daemon=True)
+    writer.start()
+    is_complete = False
+    try:
+        for _ in hexshas:
+            header = process.stdout.readline().split()
+            if len(header) != 3:
+                raise ValueError('Object {} not found'.format(header[0].decode('ascii') if header else ''))
+            data = process.stdout.read(int(header[2]))
+            process.stdout.read(1)
+            yield data
+        is_complete = True
+    finally:
+        if not is_complete:
+            process.kill()
+        process.stdout.close()
+        process.wait()
+        writer.join()
@@ -13,24 +13,36 @@
 # limitations under the License.
 
 import datetime
-import io
+import heapq
+import itertools
 import os
 import re
+from array import array
+from bisect import bisect_left
 from operator import itemgetter
 
 import git
-from sqlalchemy import create_engine
+from sqlalchemy import bindparam, func
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy_utils import create_database, database_exists
 
 from .combinedcommit import _iter_combined_commits, CombinedCommit
-from .config import Configuration
+from .commitrecord import AuthorTable, CommitRecord, _as_utc
 from .countdict import add_count_dict, subtract_count_dict, normalize_count_dict
-from .dbtypes import Author, Base, Commit, AuthorCommitDetail, Repository, Project, ProjectRepository
+from .dbtypes import Author, Base, Branch, Commit, AuthorCommitDetail, Repository, Project, ProjectRepository
+from .frontier import CountFrontier
+from .gitreader import iter_blame_counts, iter_raw_diff
+from .pipeline import Pipeline
+from .resultcache import ResultCache, _default_result_cache_size
+from .sources import _filter_skipped_blobs, _iter_blob_lines, _source_blobs, iter_sources_and_tests
+from .storage import _default_database_url, create_storage_engine
 
 _diff_stat_regex = re.compile('^([0-9]+|-)\t([0-9]+|-)\t(.*)$')
-_default_database_url = 'sqlite:///git-hammer.sqlite'
+_default_pipeline_queue_size = 64
+_bounded_flush_interval = 1000
+_count_reload_chunk_size = 500
+_default_row_chunk_size = 10000
 
 
 def _time_to_utc_offset(time):
@@ -39,12 +51,38 @@ def _time_to_utc_offset(time):
     return utc_time, offset
 
 
-def _commit_exists(repository, hexsha):
-    status, out, err = repository.git_repository.git.cat_file('-e', hexsha, with_extended_output=True,
-                                                              with_exceptions=False)
+def _object_exists(git_repository, hexsha):
+    status, out, err = git_repository.git.cat_file('-e', hexsha, with_extended_output=True, with_exceptions=False)
     return status == 0
 
 
+def _commit_exists(repository, hexsha):
+    return _object_exists(repository.git_repository, hexsha)
+
+
+def _resolve_branch(repository, branch):
+    status, out, err = repository.git_repository.git.rev_parse('--verify', '--quiet', '{}^{{commit}}'.format(branch),
+                                                               with_extended_output=True, with_exceptions=False)
+    return out.strip() if status == 0 else None
+
+
+def _check_branches_exist(repository, branches):
+    for branch in branches:
+        if not _resolve_branch(repository, branch):
+            raise BranchNotFoundError('Branch {} not found in {}'.format(branch, repository.repository_path))
+
+
+def _check_shard(shard):
+    index, count = shard
+    if not 1 <= index <= count:
+        raise ValueError('Shard {} is not between 1 and {}'.format(index, count))
+
+
+def _shard_range(commit_count, shard):
+    index, count = shard
+    return commit_count * (index - 1) // count, commit_count * index // count
+
+
 def _is_commit_in_range(repository, commit):
     if not repository.start_time:
         return True
@@ -61,13 +99,57 @@ def _author_line(commit):
     return '{} <{}>'.format(commit.author.name, commit.author.email)
 
 
+def _as_query_time(time):
+    return _as_utc(time).replace(tzinfo=None)
+
+
+def _restrict_counts_to_authors(commit, author_names):
+    if author_names is not None:
+        commit.line_counts = {author: count for author, count in commit.line_counts.items()
+                              if author.canonical_name in author_names}
+        commit.test_counts = {author: count for author, count in commit.test_counts.items()
+                              if author.canonical_name in author_names}
+    return commit
+
+
+def _filter_skipped_paths(repository, commit, paths, skipped_paths):
+    if not repository.configuration.has_skip_rules():
+        return paths
+    blobs = [commit.tree[path] for path in paths if repository.configuration.is_source_file(path)]
+    return [blob.path for blob in _filter_skipped_blobs(repository, commit, blobs, skipped_paths)]
+
+
+def _print_skipped_paths(commit, skipped_paths):
+    for path, reason in skipped_paths:
+        print('Commit {} skipped {} ({})'.format(commit.hexsha, path, reason))
+
+
+def _make_repository(repository_path, configuration_file_path=None, **kwargs):
+    if not configuration_file_path:
+        configuration_file_path = os.path.join(repository_path, 'git-hammer-config.json')
+    else:
+        configuration_file_path = os.path.abspath(configuration_file_path)
+    repository = Repository(repository_path=repository_path, configuration_file_path=configuration_file_path)
+    if kwargs.get('earliest_date'):
+        start_time, start_time_utc_offset = _time_to_utc_offset(kwargs.get('earliest_date'))
+        repository.start_time = start_time
+        repository.start_time_utc_offset = start_time_utc_offset
+    if kwargs.get('snapshot_frequency'):
+        repository.snapshot_frequency = kwargs.get('snapshot_frequency').name
+    return repository
+
+
+def _chain_key(repository_id, branch=None):
+    return repository_id if branch is None else (repository_id, branch)
+
+
 def _fail_unless_database_exists(engine):
     if not database_exists(engine.url):
         raise DatabaseNotInitializedError('Database must be created for this operation')
 
 
 def iter_all_project_names(database_url=_default_database_url):
-    engine = create_engine(database_url)
+    engine, _ = create_storage_engine(database_url)
     _fail_unless_database_exists(engine)
     Session = sessionmaker(bind=engine)
     session = Session()
@@ -76,25 +158,6 @@ def iter_all_project_names(database_url=_default_database_url):
     session.close()
 
 
-def iter_sources_and_tests(repository_path, configuration_file_path=None):
-    if configuration_file_path is None:
-        configuration_file_path = os.path.join(repository_path, 'git-hammer-config.json')
-    configuration = Configuration(configuration_file_path)
-    repository = git.Repo(repository_path)
-    for git_object in repository.tree().traverse(visit_once=True):
-        if git_object.type != 'blob':
-            continue
-        if configuration.is_source_file(git_object.path):
-            if configuration.is_test_file(git_object.path):
-                yield 'test-file', git_object.path
-                lines = [line.decode('utf-8', 'ignore') for line in
-                         io.BytesIO(git_object.data_stream.read()).readlines()]
-                for line in configuration.iter_test_lines(git_object.path, lines):
-                    yield 'test-line', line.rstrip()
-            else:
-                yield 'source-file', git_object.path
-
-
 class DatabaseNotInitializedError(Exception):
     pass
 
@@ -103,6 +166,14 @@ class OldDatabaseSchemaError(Exception):
     pass
 
 
+class BranchNotFoundError(Exception):
+    pass
+
+
+class RepositoryConfigurationConflictError(Exception):
+    pass
+
+
 class Hammer:
 
     def _ensure_project_exists(self):
@@ -120,11 +191,51 @@ class Hammer:
         self._repositories = []
         self._names_to_authors = {}
         self._shas_to_commits = {}
+        self._author_table = AuthorTable()
+        self._chains = {}
+        self._branches = {}
+        self._chain_time_bounds = {}
+        self._author_history = {}
 
     def _commit_query(self, session):
         return session.query(Commit).select_from(Commit).join(Repository, Commit.repository_id == Repository.id).join(
             ProjectRepository).filter(ProjectRepository.project_name == self.project_name)
 
+    def _filter_commit_query(self, query, **kwargs):
+        if kwargs.get('since'):
+            query = query.filter(Commit.commit_time >= _as_query_time(kwargs['since']))
+        if kwargs.get('until'):
+            query = query.filter(Commit.commit_time < _as_query_time(kwargs['until']))
+        author_names = self._resolve_author_names(kwargs.get('authors'))
+        if author_names is not None:
+            author_ids = {self._names_to_authors[author_name].id for author_name in author_names}
+            query = query.filter(Commit.author_id.in_(author_ids))
+        if kwargs.get('repositories') is not None:
+            repository_ids = [repository.id for repository in self._select_repositories(kwargs['repositories'])]
+            query = query.filter(Commit.repository_id.in_(repository_ids))
+        return query
+
+    def _resolve_author_names(self, authors):
+        if authors is None:
+            return None
+        author_names = set()
+        for author in authors:
+            if isinstance(author, Author):
+                author_names.add(author.canonical_name)
+            elif author in self._names_to_authors:
+                author_names.add(self._names_to_authors[author].canonical_name)
+            else:
+                author_names.update(known_author.canonical_name for known_author in self._names_to_authors.values()
+                                    if known_author.name == author)
+        return author_names
+
+    def _select_repositories(self, repositories):
+        if repositories is None:
+            return self._repositories
+        repository_paths = {os.path.abspath(getattr(repository, 'repository_path', repository))
+                            for repository in repositories}
+        return [repository for repository in self._repositories if repository.repository_path in repository_paths]
+
     def _is_commit_processed(self, commit_id):
         return commit_id in self._shas_to_commits
 
@@ -133,6 +244,9 @@ class Hammer:
             for dbrepo in session.query(Repository).join(ProjectRepository).filter(
                     ProjectRepository.project_name == self.project_name):
                 self._repositories.append(dbrepo)
+            for branch in session.query(Branch).filter(
+                    Branch.repository_id.in_([repository.id for repository in self._repositories])):
+                self._branches.setdefault(branch.repository_id, {})[branch.name] = branch.head_commit_id
         except OperationalError:
             raise OldDatabaseSchemaError('Database created with too-old version of Git Hammer')
 
@@ -142,66 +256,186 @@ class Hammer:
             for alias in dbauthor.aliases:
                 self._names_to_authors[alias] = dbauthor
 
+    def _author_indices(self):
+        return {author.id: self._author_table.index(author) for author in self._names_to_authors.values()}
+
+    def _iter_packed_counts(self, session, commit_query, author_indices):
+        commits = commit_query.with_entities(Commit.id, Commit.hexsha).subquery()
+        detail_rows = session.query(commits.c.hexsha, AuthorCommitDetail.author_id,
+                                    AuthorCommitDetail.line_count, AuthorCommitDetail.test_count).select_from(
+            AuthorCommitDetail).join(commits, AuthorCommitDetail.commit_id == commits.c.id).order_by(
+            AuthorCommitDetail.commit_id)
+        for hexsha, rows in itertools.groupby(detail_rows.yield_per(1000), key=itemgetter(0)):
+            line_counts = array('i')
+            test_counts = array('i')
+            for _, author_id, line_count, test_count in rows:
+                author_index = author_indices[author_id]
+                line_counts.extend((author_index, line_count))
+                if test_count:
+                    test_counts.extend((author_index, test_count))
+            yield hexsha, line_counts, test_counts
+
+    def _read_packed_counts(self, session, commit_records):
+        query = self._commit_query(session).filter(
+            Commit.hexsha.in_([commit_record.hexsha for commit_record in commit_records]))
+        return {hexsha: (line_counts, test_counts) for hexsha, line_counts, test_counts
+                in self._iter_packed_counts(session, query, self._author_indices())}
+
+    def _load_evicted_counts(self, commit_record):
+        session = self._Session()
+        try:
+            return self._read_packed_counts(session, [commit_record]).get(commit_record.hexsha, (None, None))
+        finally:
+            session.close()
+
+    def _reload_counts(self, commit_records, session):
+        evicted_records = [commit_record for commit_record in commit_records if commit_record.has_evicted_counts]
+        for start in range(0, len(evicted_records), _count_reload_chunk_size):
+            chunk = evicted_records[start:start + _count_reload_chunk_size]
+            packed_counts = self._read_packed_counts(session, chunk)
+            for commit_record in chunk:
+                commit_record.set_packed_counts(*packed_counts.get(commit_record.hexsha, (None, None)))
+
+    def _evict_counts(self, commit_record):
+        commit_record.evict_counts(self._evicted_count_loader)
+
     def _build_commit_map(self, session):
-        for dbcommit in self._commit_query(session):
-            self._shas_to_commits[dbcommit.hexsha] = dbcommit
-        commits = self._commit_query(session).subquery()
-        for db_detail in session.query(AuthorCommitDetail).join(commits):
-            self._shas_to_commits[db_detail.commit_id].line_counts[db_detail.author] = db_detail.line_count
-            if db_detail.test_count:
-                self._shas_to_commits[db_detail.commit_id].test_counts[db_detail.author] = db_detail.test_count
+        author_indices = self._author_indices()
+        chain_entries = {}
+        for row in self._commit_query(session).with_entities(
+                Commit.hexsha, Commit.author_id, Commit.commit_time, Commit.commit_time_utc_offset, Commit.parent_ids,
+                Commit.repository_id, Commit.added_lines, Commit.deleted_lines, Commit.has_snapshot,
+                Commit.chain_position).yield_per(1000):
+            commit_record = CommitRecord(
+                self._author_table, row.hexsha, self._author_table[author_indices[row.author_id]], row.commit_time,
+                row.commit_time_utc_offset, row.parent_ids, row.repository_id, added_lines=row.added_lines,
+                deleted_lines=row.deleted_lines, has_snapshot=row.has_snapshot)
+            self._shas_to_commits[row.hexsha] = commit_record
+            if row.chain_position is not None:
+                chain_entries.setdefault(row.repository_id, []).append((row.chain_position, commit_record))
+        for repository_id, entries in chain_entries.items():
+            entries.sort(key=itemgetter(0))
+            self._chains[repository_id] = [commit_record for _, commit_record in entries]
+        if self._bounded_memory:
+            for commit_record in self._shas_to_commits.values():
+                if commit_record.has_snapshot:
+                    self._evict_counts(commit_record)
+        else:
+            for hexsha, line_counts, test_counts in self._iter_packed_counts(session, self._commit_query(session),
+                                                                             author_indices):
+                self._shas_to_commits[hexsha].set_packed_counts(line_counts, test_counts)
+        for repository_id in self._branches:
+            self._build_branch_chains(repository_id, session)
+
+    def _head_ids(self):
+        head_ids = []
+        for repository in self._repositories:
+            head_ids.append((repository.id, '', repository.head_commit_id))
+            for branch, head_commit_id in self._branches.get(repository.id, {}).items():
+                head_ids.append((repository.id, branch, head_commit_id))
+        return sorted(head_ids)
+
+    def _invalidate_results(self, previous_head_ids, session):
+        changed_repository_ids = {repository_id for repository_id, _, _ in
+                                  set(previous_head_ids).symmetric_difference(self._head_ids())}
+        if changed_repository_ids:
+            project_names = {project_name for project_name, in session.query(ProjectRepository.project_name).filter(
+                ProjectRepository.repository_id.in_(list(changed_repository_ids)))}
+            self._result_cache.invalidate(project_names)
+
+    def _load_data(self, session):
+        self._init_properties()
+        self._build_repository_map(session)
+        self._build_author_map(session)
+        self._build_commit_map(session)
+
+    def _is_data_current(self, session):
+        repository_ids = [repository.id for repository in self._repositories]
+        stored_head_commit_ids = dict(session.query(Repository.id, Repository.head_commit_id).filter(
+            Repository.id.in_(repository_ids)))
+        stored_branches = {}
+        for branch in session.query(Branch).filter(Branch.repository_id.in_(repository_ids)):
+            stored_branches.setdefault(branch.repository_id, {})[branch.name] = branch.head_commit_id
+        current_branches = {repository_id: branches for repository_id, branches in self._branches.items() if branches}
+        return stored_branches == current_branches and \
+            all(stored_head_commit_ids.get(repository.id) == repository.head_commit_id
+                for repository in self._repositories)
+
+    def _find_shared_repository(self, repository, session):
+        stored_repositories = session.query(Repository).filter(
+            Repository.repository_path == repository.repository_path).all()
+        for stored_repository in stored_repositories:
+            if stored_repository.configuration_hash == repository.configuration_hash and \
+                    stored_repository.start_time == repository.start_time and \
+                    stored_repository.snapshot_frequency == repository.snapshot_frequency:
+                return stored_repository
+        if stored_repositories:
+            raise RepositoryConfigurationConflictError(
+                'Repository {} is already processed with a different configuration'.format(
+                    repository.repository_path))
+        return None
+
+    def _add_line_counts(self, repository, author_line, path, line_count, lines, line_counts, test_counts):
+        author = self._names_to_authors[author_line]
+        line_counts[author] = line_counts.get(author, 0) + line_count
+        test_count = len(list(repository.configuration.iter_test_lines(path, lines))) if lines else 0
+        test_counts[author] = test_counts.get(author, 0) + test_count
 
     def _process_lines_into_line_counts(self, repository, commit, path, lines, line_counts, test_counts):
-        author = self._names_to_authors[_author_line(commit)]
-        line_counts[author] = line_counts.get(author, 0) + len(lines)
-        test_counts[author] = test_counts.get(author, 0) + len(list(repository.configuration.iter_test_lines(path, lines)))
+        self._add_line_counts(repository, _author_line(commit), path, len(lines), lines, line_counts, test_counts)
+
+    def _blame_blob(self, repository, commit, path):
+        return iter_blame_counts(repository.git_repository, str(commit), path,
+                                 keep_lines=repository.configuration.is_test_file(path))
 
     def _blame_blob_into_line_counts(self, repository, commit_to_blame, path, line_counts, test_counts):
         if not repository.configuration.is_source_file(path):
             return
-        blame = repository.git_repository.blame(commit_to_blame, path, w=True)
-        for commit, lines in blame:
-            self._process_lines_into_line_counts(repository, commit, path, lines, line_counts, test_counts)
+        for blame in self._blame_blob(repository, commit_to_blame, path):
+            self._add_line_counts(repository, blame.author, path, blame.line_count, blame.lines, line_counts,
+                                  test_counts)
+
+    def _source_blobs(self, repository, commit, skipped_paths):
+        return _source_blobs(repository, commit, skipped_paths)
 
     def _make_full_commit_stats(self, repository, commit, need_full_blame=False):
         stats_start_time = datetime.datetime.now()
         line_counts = {}
         test_counts = {}
-        for git_object in commit.tree.traverse(prune=lambda i, d: i is git.Submodule):
-            if git_object.type != 'blob':
-                continue
-            if not repository.configuration.is_source_file(git_object.path):
-                continue
-            if need_full_blame:
-                self._blame_blob_into_line_counts(repository, commit, git_object.path, line_counts, test_counts)
-            else:
-                lines = [line.decode('utf-8', 'ignore') for line in
-                         io.BytesIO(git_object.data_stream.read()).readlines()]
-                self._process_lines_into_line_counts(repository, commit, git_object.path, lines, line_counts,
-                                                     test_counts)
+        skipped_paths = []
+        source_blobs = self._source_blobs(repository, commit, skipped_paths)
+        if need_full_blame:
+            for blob in source_blobs:
+                self._blame_blob_into_line_counts(repository, commit, blob.path, line_counts, test_counts)
+        else:
+            for blob, lines in zip(source_blobs, _iter_blob_lines(repository, source_blobs)):
+                self._process_lines_into_line_counts(repository, commit, blob.path, lines, line_counts, test_counts)
+        _print_skipped_paths(commit, skipped_paths)
         print('Commit {} stats time: {}'.format(commit.hexsha,
                                                 datetime.datetime.now() - stats_start_time))
         return normalize_count_dict(line_counts), normalize_count_dict(test_counts)
 
-    def _make_diffed_commit_stats(self, repository, commit, previous_commit, previous_commit_line_counts,
-                                  previous_commit_test_counts):
-        diff_index = previous_commit.diff(commit, w=True, ignore_submodules=True)
+    def _changed_source_paths(self, repository, commit, previous_commit, skipped_paths):
         current_files = set()
         previous_files = set()
-        for add_diff in diff_index.iter_change_type('A'):
-            current_files.add(add_diff.b_path)
-        for delete_diff in diff_index.iter_change_type('D'):
-            previous_files.add(delete_diff.a_path)
-        for rename_diff in diff_index.iter_change_type('R'):
-            current_files.add(rename_diff.b_path)
-            previous_files.add(rename_diff.a_path)
-        for modify_diff in diff_index.iter_change_type('M'):
-            current_files.add(modify_diff.b_path)
-            previous_files.add(modify_diff.a_path)
+        for entry in iter_raw_diff(repository.git_repository, previous_commit.hexsha, commit.hexsha):
+            is_content_change = entry.old_blob_id and entry.new_blob_id and entry.old_blob_id != entry.new_blob_id
+            if entry.change_type in ('A', 'R') or is_content_change:
+                current_files.add(entry.new_path)
+            if entry.change_type in ('D', 'R') or is_content_change:
+                previous_files.add(entry.old_path)
+        return (_filter_skipped_paths(repository, commit, current_files, skipped_paths),
+                _filter_skipped_paths(repository, previous_commit, previous_files, skipped_paths))
+
+    def _make_diffed_commit_stats(self, repository, commit, previous_commit, previous_commit_line_counts,
+                                  previous_commit_test_counts):
         previous_line_counts = {}
         current_line_counts = {}
         previous_test_counts = {}
         current_test_counts = {}
+        skipped_paths = []
+        current_files, previous_files = self._changed_source_paths(repository, commit, previous_commit, skipped_paths)
+        _print_skipped_paths(commit, skipped_paths)
         for current_file in current_files:
             self._blame_blob_into_line_counts(repository, commit, current_file, current_line_counts,
                                               current_test_counts)
@@ -214,41 +448,42 @@ class Hammer:
         test_counts = add_count_dict(previous_commit_test_counts, test_difference)
         return line_counts, test_counts
 
-    def _add_author_alias_if_needed(self, repository, commit):
-        author_line = _author_line(commit)
-        if not self._names_to_authors.get(author_line):
-            canonical_name = repository.git_repository.git.show(commit.hexsha, format='%aN <%aE>', no_patch=True)
-            author = self._names_to_authors[canonical_name]
-            author.aliases.append(author_line)
-            self._names_to_authors[author_line] = author
-
     def _add_canonical_authors(self, repository, session):
-        author_lines = repository.git_repository.git.log(format='%aN <%aE>')
-        for author_line in set(author_lines.splitlines()):
+        author_lines = repository.git_repository.git.log(*self._tracked_revisions(repository),
+                                                         format='%an <%ae>%x00%aN <%aE>')
+        author_names = sorted({tuple(line.split('\x00')) for line in author_lines.splitlines()})
+        for _, canonical_name in author_names:
+            if not self._names_to_authors.get(canonical_name):
+                author = session.query(Author).filter_by(canonical_name=canonical_name).one_or_none()
+                if author is None:
+                    author = Author(canonical_name=canonical_name, aliases=[])
+                    session.add(author)
+                self._names_to_authors[canonical_name] = author
+        for author_line, canonical_name in author_names:
             if not self._names_to_authors.get(author_line):
-                author = Author(canonical_name=author_line, aliases=[])
+                author = self._names_to_authors[canonical_name]
+                author.aliases = author.aliases + [author_line]
                 self._names_to_authors[author_line] = author
-                session.add(author)
+        session.flush()
+        for _, canonical_name in author_names:
+            self._author_table.index(self._names_to_authors[canonical_name])
 
-    def _add_commit_object(self, repository, commit, session):
-        self._add_author_alias_if_needed(repository, commit)
-        author_line = _author_line(commit)
-        author = self._names_to_authors[author_line]
-        author = session.merge(author)
+    def _diff_stat(self, git_repository, commit):
+        if len(commit.parents) == 1 and _object_exists(git_repository, commit.parents[0].hexsha):
+            return git_repository.git.diff(commit.parents[0], commit, numstat=True, ignore_submodules=True)
+        else:
+            return git_repository.git.show(commit, numstat=True, format='')
+
+    def _make_commit_record(self, repository, commit, snapshot_commit_ids):
+        author = self._names_to_authors[_author_line(commit)]
         commit_time, commit_time_utc_offset = _time_to_utc_offset(commit.authored_datetime)
-        commit_object = Commit(hexsha=commit.hexsha, author=author,
-                               commit_time=commit_time,
-                               commit_time_utc_offset=commit_time_utc_offset,
-                               parent_ids=[], repository_id=repository.id)
+        commit_record = CommitRecord(self._author_table, commit.hexsha, author, commit_time, commit_time_utc_offset,
+                                     [parent.hexsha for parent in commit.parents], repository.id,
+                                     has_snapshot=snapshot_commit_ids is None or commit.hexsha in snapshot_commit_ids)
         if len(commit.parents) <= 1:
-            if len(commit.parents) == 1 and _commit_exists(repository, commit.parents[0]):
-                diff_stat = repository.git_repository.git.diff(
-                    commit.parents[0], commit, numstat=True, ignore_submodules=True)
-            else:
-                diff_stat = repository.git_repository.git.show(commit, numstat=True, format='')
             added_lines = 0
             deleted_lines = 0
-            for line in diff_stat.splitlines():
+            for line in self._diff_stat(commit.repo, commit).splitlines():
                 match = re.fullmatch(_diff_stat_regex, line)
                 if match:
                     if match.group(1) == '-' or match.group(2) == '-':
@@ -257,154 +492,542 @@ class Hammer:
                         continue
                     added_lines += int(match.group(1))
                     deleted_lines += int(match.group(2))
-            commit_object.added_lines = added_lines
-            commit_object.deleted_lines = deleted_lines
-        self._shas_to_commits[commit.hexsha] = commit_object
-        session.add(commit_object)
+            commit_record.added_lines = added_lines
+            commit_record.deleted_lines = deleted_lines
+        return commit_record
 
-    def _add_commit_line_counts(self, commit, line_counts, test_counts, session):
-        self._shas_to_commits[commit.hexsha].line_counts = line_counts
-        self._shas_to_commits[commit.hexsha].test_counts = test_counts
-        for author, count in line_counts.items():
-            detail = AuthorCommitDetail(
-                author_name=author.canonical_name, commit_id=commit.hexsha, line_count=count)
+    def _add_commit_stats(self, repository, commit_record):
+        if commit_record.has_snapshot:
+            commit = repository.git_repository.commit(commit_record.hexsha)
+            commit_record.line_counts, commit_record.test_counts = self._make_commit_stats(repository, commit)
+        self._shas_to_commits[commit_record.hexsha] = commit_record
+        return commit_record
+
+    def _add_commit_object(self, commit_record, session):
+        local_time = commit_record.commit_time_tz()
+        commit_object = Commit(hexsha=commit_record.hexsha, author=session.merge(commit_record.author),
+                               added_lines=commit_record.added_lines, deleted_lines=commit_record.deleted_lines,
+                               commit_time=commit_record.commit_time,
+                               commit_time_utc_offset=commit_record.commit_time_utc_offset,
+                               parent_ids=list(commit_record.parent_ids), repository_id=commit_record.repository_id,
+                               has_snapshot=commit_record.has_snapshot, local_hour=local_time.hour,
+                               local_weekday=local_time.weekday())
+        session.add(commit_object)
+        test_counts = commit_record.test_counts
+        for author, count in commit_record.line_counts.items():
+            detail = AuthorCommitDetail(author_id=author.id, commit=commit_object, line_count=count)
             if test_counts.get(author):
                 detail.test_count = test_counts[author]
             session.add(detail)
 
-    def _process_repository(self, repository, session):
+    def _find_snapshot_ancestor(self, commit, commits=None):
+        if commits is None:
+            commits = self._shas_to_commits
+        commit_id = commit.parents[0].hexsha if commit.parents else None
+        while commit_id:
+            ancestor = commits.get(commit_id)
+            if not ancestor:
+                return None
+            if ancestor.has_snapshot:
+                return ancestor
+            commit_id = ancestor.parent_ids[0] if ancestor.parent_ids else None
+        return None
+
+    def _resolve_branch_heads(self, repository):
+        branch_heads = {}
+        for branch in sorted(self._branches.get(repository.id, {})):
+            branch_head_commit_id = _resolve_branch(repository, branch)
+            if branch_head_commit_id:
+                branch_heads[branch] = branch_head_commit_id
+            else:
+                print('Branch {} not found in {}'.format(branch, repository.repository_path))
+        return branch_heads
+
+    def _tracked_revisions(self, repository):
+        return ['HEAD'] + list(self._resolve_branch_heads(repository).values())
+
+    def _select_snapshot_commit_ids(self, repository):
+        frequency = repository.sampling_frequency()
+        if not frequency:
+            return None
+        snapshot_commit_ids = set()
+        for revision in self._tracked_revisions(repository):
+            newer_interval_start = None
+            for line in repository.git_repository.git.log(revision, first_parent=True,
+                                                          format='%H %at').splitlines():
+                commit_id, timestamp = line.split()
+                if self._is_commit_processed(commit_id):
+                    break
+                commit_time = datetime.datetime.fromtimestamp(int(timestamp), datetime.timezone.utc)
+                interval_start = frequency.start_of_interval(commit_time)
+                if interval_start != newer_interval_start:
+                    snapshot_commit_ids.add(commit_id)
+                    newer_interval_start = interval_start
+        return snapshot_commit_ids
+
+    def _make_commit_stats(self, repository, commit):
+        if not commit.parents:
+            return self._make_full_commit_stats(repository, commit)
+        previous_commit = self._find_snapshot_ancestor(commit)
+        if previous_commit and not previous_commit.has_evicted_counts:
+            return self._make_diffed_commit_stats(repository, commit,
+                                                  repository.git_repository.commit(previous_commit.hexsha),
+                                                  previous_commit.line_counts, previous_commit.test_counts)
+        else:
+            need_full_blame = _commit_exists(repository, commit.parents[0].hexsha)
+            return self._make_full_commit_stats(repository, commit, need_full_blame=need_full_blame)
+
+    def _update_chain(self, repository, session):
+        chain = self._chains.setdefault(repository.id, [])
+        previous_head = chain[-1] if chain else None
+        new_commits = []
+        reached_previous_head = False
+        commit_id = repository.head_commit_id
+        while commit_id:
+            commit = self._shas_to_commits.get(commit_id)
+            if commit is None:
+                break
+            if commit is previous_head:
+                reached_previous_head = True
+                break
+            new_commits.append(commit)
+            commit_id = commit.parent_ids[0] if commit.parent_ids else None
+        if not new_commits:
+            return
+        self._chain_time_bounds.pop(repository.id, None)
+        session.flush()
+        if previous_head is not None and not reached_previous_head:
+            session.execute(Commit.__table__.update().where(Commit.repository_id == repository.id).values(
+                chain_position=None))
+            chain.clear()
+            self._author_history.pop(repository.id, None)
+        first_position = len(chain)
+        chain.extend(reversed(new_commits))
+        if repository.id in self._author_history:
+            self._index_author_history(repository.id, first_position, session)
+        session.execute(Commit.__table__.update().where(Commit.hexsha == bindparam('commit_hexsha')).values(
+            chain_position=bindparam('position')),
+            [{'commit_hexsha': commit.hexsha, 'position': position}
+             for position, commit in enumerate(chain[first_position:], first_position)])
+
+    def _is_processed_snapshot(self, commit_id):
+        commit = self._shas_to_commits.get(commit_id)
+        return commit is not None and commit.has_snapshot
+
+    def _update_heads(self, repository, session):
+        head_commit_id = repository.git_repository.head.commit.hexsha
+        if self._is_processed_snapshot(head_commit_id):
+            repository.head_commit_id = head_commit_id
+        branches = self._branches.get(repository.id, {})
+        for branch, branch_head_commit_id in self._resolve_branch_heads(repository).items():
+            if self._is_processed_snapshot(branch_head_commit_id) and branches[branch] != branch_head_commit_id:
+                branches[branch] = branch_head_commit_id
+                session.merge(Branch(repository_id=repository.id, name=branch, head_commit_id=branch_head_commit_id))
+
+    def _build_branch_chains(self, repository_id, session):
+        for branch, head_commit_id in self._branches.get(repository_id, {}).items():
+            chain_key = _chain_key(repository_id, branch)
+            chain = []
+            commit_id = head_commit_id
+            while commit_id:
+                commit = self._shas_to_commits.get(commit_id)
+                if commit is None:
+                    break
+                chain.append(commit)
+                commit_id = commit.parent_ids[0] if commit.parent_ids else None
+            chain.reverse()
+            if self._chains.get(chain_key) == chain:
+                continue
+            self._chains[chain_key] = chain
+            self._chain_time_bounds.pop(chain_key, None)
+            self._author_history.pop(chain_key, None)
+
+    def _add_branches(self, repository, branches, session):
+        branch_heads = self._branches.setdefault(repository.id, {})
+        new_branches = [branch for branch in branches if branch not in branch_heads]
+        for branch in new_branches:
+            branch_heads[branch] = None
+            session.add(Branch(repository_id=repository.id, name=branch))
+        return new_branches
+
+    def _make_count_frontier(self, repository, session):
+        pending_children = {}
+        for line in repository.git_repository.git.log(*self._tracked_revisions(repository),
+                                                      format='%H %P').splitlines():
+            commit_id, *parent_ids = line.split()
+            if parent_ids and not self._is_commit_processed(commit_id):
+                pending_children[parent_ids[0]] = pending_children.get(parent_ids[0], 0) + 1
+        frontier = CountFrontier(self._shas_to_commits, pending_children, self._evict_counts)
+        self._reload_counts(frontier.retain_processed(), session)
+        return frontier
+
+    def _process_repository(self, repository, session, shard=None):
         print('Repository {}'.format(repository.repository_path))
         repository = session.merge(repository, load=False)
         start_time = datetime.datetime.now()
         last_session_commit_time = start_time
         self._add_canonical_authors(repository, session)
+        snapshot_commit_ids = self._select_snapshot_commit_ids(repository)
+        frontier = self._make_count_frontier(repository, session) if self._bounded_memory else None
+        enumeration_repository = git.Repo(repository.repository_path)
+        pipeline = Pipeline(self._pipeline_queue_size)
+        pipeline.add_source('enumerate', lambda: (
+            self._make_commit_record(repository, commit, snapshot_commit_ids)
+            for commit in self._iter_unprocessed_commits(repository, enumeration_repository, shard)))
+        pipeline.add_stage('stats', lambda commit_record: self._add_commit_stats(repository, commit_record))
+        commit_records = pipeline.run('write')
         commit_count = 0
-        for commit in self._iter_unprocessed_commits(repository):
-            self._add_commit_object(repository, commit, session)
-            if commit.parents:
-                for parent in commit.parents:
-                    self._shas_to_commits[commit.hexsha].parent_ids.append(parent.hexsha)
-                parent_commit = self._shas_to_commits.get(commit.parents[0].hexsha)
-                if parent_commit:
-                    line_counts, test_counts = self._make_diffed_commit_stats(repository, commit, commit.parents[0],
-                                                                              parent_commit.line_counts,
-                                                                              parent_commit.test_counts)
-                else:
-                    need_full_blame = _commit_exists(repository, commit.parents[0].hexsha)
-                    line_counts, test_counts = self._make_full_commit_stats(repository, commit,
-                                                                            need_full_blame=need_full_blame)
-            else:
-                line_counts, test_counts = self._make_full_commit_stats(repository, commit)
-            self._add_commit_line_counts(commit, line_counts, test_counts, session)
-            repository.head_commit_id = commit.hexsha
-            commit_count += 1
-            if commit_count % 20 == 0:
-                print('Commit {:>5}: {}'.format(commit_count, datetime.datetime.now() - start_time))
-            if datetime.datetime.now() - last_session_commit_time >= datetime.timedelta(minutes=5):
-                session_commit_start_time = datetime.datetime.now()
-                session.commit()
-                print('Commit {:>5}: Database commit time {}'.format(commit_count,
-                                                                     datetime.datetime.now() - session_commit_start_time))
-                last_session_commit_time = datetime.datetime.now()
+        try:
+            for commit_record in commit_records:
+                self._add_commit_object(commit_record, session)
+                if commit_record.has_snapshot:
+                    repository.head_commit_id = commit_record.hexsha
+                commit_count += 1
+                if frontier is not None:
+                    if commit_count % _bounded_flush_interval == 0:
+                        session.flush()
+                    frontier.add(commit_record)
+                if commit_count % 20 == 0:
+                    print('Commit {:>5}: {} (queue depths {})'.format(commit_count,
+                                                                     datetime.datetime.now() - start_time,
+                                                                     pipeline.queue_depths()))
+                if datetime.datetime.now() - last_session_commit_time >= datetime.timedelta(minutes=5):
+                    session_commit_start_time = datetime.datetime.now()
+                    session.commit()
+                    print('Commit {:>5}: Database commit time {}'.format(commit_count,
+                                                                         datetime.datetime.now() - session_commit_start_time))
+                    last_session_commit_time = datetime.datetime.now()
+        finally:
+            commit_records.close()
+        self._update_heads(repository, session)
+        self._update_chain(repository, session)
+        self._build_branch_chains(repository.id, session)
+        self.pipeline_stages = pipeline.stages
+        for stage in pipeline.stages:
+            print('Stage {}'.format(stage))
         print('Commit processing time {}'.format(datetime.datetime.now() - start_time))
+        return repository
 
-    def _iter_branch(self, repository):
-        commits = []
-        commit_id = repository.head_commit_id
-        while commit_id:
-            commit = self._shas_to_commits.get(commit_id)
-            if commit:
-                commits.append(commit)
-                commit_id = commit.parent_ids[0] if commit.parent_ids else None
-            else:
+    def _index_author_history(self, chain_key, first_position, session):
+        chain = self._chains.get(chain_key, [])
+        history = self._author_history.setdefault(chain_key, {})
+        previous_counts = {}
+        for position in range(first_position - 1, -1, -1):
+            if chain[position].has_snapshot:
+                previous_counts = next(self._iter_indexed_counts([chain[position]], session))
                 break
-        return reversed(commits).__iter__()
+        positions = [position for position in range(first_position, len(chain)) if chain[position].has_snapshot]
+        for position, counts in zip(positions,
+                                    self._iter_indexed_counts([chain[position] for position in positions], session)):
+            for author_index in counts.keys() | previous_counts.keys():
+                if counts.get(author_index) != previous_counts.get(author_index):
+                    history.setdefault(author_index, array('i')).append(position)
+            previous_counts = counts
+
+    def _chain_author_history(self, chain_key, session):
+        if chain_key not in self._author_history:
+            self._index_author_history(chain_key, 0, session)
+        return self._author_history[chain_key]
+
+    def _iter_indexed_counts(self, commit_records, session):
+        if not self._bounded_memory:
+            for commit_record in commit_records:
+                yield commit_record.indexed_counts()
+            return
+        for start in range(0, len(commit_records), _count_reload_chunk_size):
+            chunk = commit_records[start:start + _count_reload_chunk_size]
+            self._reload_counts(chunk, session)
+            for commit_record in chunk:
+                yield commit_record.indexed_counts()
+                self._evict_counts(commit_record)
+
+    def _chain_range(self, chain_key, since, until):
+        chain = self._chains.get(chain_key, [])
+        bounds = self._chain_time_bounds.get(chain_key)
+        if bounds is None:
+            commit_times = [commit.commit_time for commit in chain]
+            latest_times = list(itertools.accumulate(commit_times, max))
+            earliest_times = list(itertools.accumulate(reversed(commit_times), min))
+            earliest_times.reverse()
+            bounds = latest_times, earliest_times
+            self._chain_time_bounds[chain_key] = bounds
+        start = bisect_left(bounds[0], since) if since else 0
+        end = bisect_left(bounds[1], until) if until else len(chain)
+        return start, max(start, end)
+
+    def _last_snapshot_before(self, chain_key, time):
+        chain = self._chains.get(chain_key, [])
+        start, _ = self._chain_range(chain_key, time, None)
+        for index in range(start - 1, -1, -1):
+            if chain[index].has_snapshot:
+                return chain[index]
+        return None
+
+    def _iter_branch(self, chain_key, since=None, until=None):
+        chain = self._chains.get(chain_key, [])
+        start, end = self._chain_range(chain_key, since, until)
+        for index in range(start, end):
+            commit = chain[index]
+            if not commit.has_snapshot:
+                continue
+            if since and commit.commit_time < since:
+                continue
+            if until and commit.commit_time >= until:
+                continue
+            yield commit
 
-    def _iter_unprocessed_commits(self, repository):
-        for commit_id in repository.git_repository.git.log(reverse=True, date_order=True, format='%H').splitlines():
-            if not self._is_commit_processed(commit_id):
-                commit = repository.git_repository.commit(commit_id)
-                if _is_commit_in_range(repository, commit):
-                    yield commit
+    def _select_chain_keys(self, **kwargs):
+        branch = kwargs.get('branch')
+        repositories = self._select_repositories(kwargs.get('repositories'))
+        if branch is None:
+            return [(repository, repository.id) for repository in repositories]
+        return [(repository, _chain_key(repository.id, branch)) for repository in repositories
+                if branch in self._branches.get(repository.id, {})]
 
-    def __init__(self, project_name, database_url=_default_database_url):
+    def _count_commits_by(self, column, bucket_count, **kwargs):
+        _fail_unless_database_exists(self._engine)
+        session = self._Session()
+        query = self._filter_commit_query(self._commit_query(session), **kwargs)
+        count_array = [0] * bucket_count
+        for value, count in query.with_entities(column, func.count(Commit.id)).group_by(column):
+            count_array[value] = count
+        session.close()
+        return count_array
+
+    def _iter_unprocessed_commits(self, repository, git_repository, shard=None):
+        commit_ids = [commit_id for commit_id in git_repository.git.log(*self._tracked_revisions(repository),
+                                                                        reverse=True, date_order=True,
+                                                                        format='%H').splitlines()
+                      if not self._is_commit_processed(commit_id)]
+        if shard:
+            start, end = _shard_range(len(commit_ids), shard)
+            print('Shard {} of {}: commits {} to {} of {}'.format(shard[0], shard[1], start + 1, end, len(commit_ids)))
+            commit_ids = commit_ids[start:end]
+        for commit_id in commit_ids:
+            commit = git_repository.commit(commit_id)
+            if _is_commit_in_range(repository, commit):
+                yield commit
+
+    def __init__(self, project_name, database_url=_default_database_url,
+                 pipeline_queue_size=_default_pipeline_queue_size, bounded_memory=False,
+                 result_cache_size=_default_result_cache_size):
         start_time = datetime.datetime.now()
         self.project_name = project_name
-        self._engine = create_engine(database_url)
+        self.pipeline_stages = []
+        self._pipeline_queue_size = pipeline_queue_size
+        self._bounded_memory = bounded_memory
+        self._evicted_count_loader = self._load_evicted_counts
+        self._engine, self._storage = create_storage_engine(database_url)
         self._Session = sessionmaker(bind=self._engine)
+        self._result_cache = ResultCache(self._storage, result_cache_size)
         self._init_properties()
         if database_exists(self._engine.url):
             session = self._Session()
-            self._build_repository_map(session)
-            self._build_author_map(session)
-            self._build_commit_map(session)
+            self._load_data(session)
             session.close()
         print('Init time {}'.format(datetime.datetime.now() - start_time))
 
     def add_repository(self, repository_path, configuration_file_path=None, **kwargs):
         self._ensure_project_exists()
         repository_path = os.path.abspath(repository_path)
-        if not next((repo for repo in self._repositories if repo.repository_path == repository_path), None):
-            if not configuration_file_path:
-                configuration_file_path = os.path.join(repository_path, 'git-hammer-config.json')
-            else:
-                configuration_file_path = os.path.abspath(configuration_file_path)
+        previous_head_ids = self._head_ids()
+        branches = kwargs.get('branches') or []
+        shard = kwargs.get('shard')
+        if shard:
+            _check_shard(shard)
+        existing_repository = next((repo for repo in self._repositories if repo.repository_path == repository_path),
+                                   None)
+        if existing_repository:
+            _check_branches_exist(existing_repository, branches)
+            with self._storage.bulk_load():
+                session = self._Session(expire_on_commit=False)
+                if self._add_branches(existing_repository, branches, session):
+                    repository = self._process_repository(existing_repository, session)
+                    self._repositories = [repository if repo is existing_repository else repo
+                                          for repo in self._repositories]
+                session.commit()
+                self._invalidate_results(previous_head_ids, session)
+        else:
+            with self._storage.bulk_load():
+                session = self._Session(expire_on_commit=False)
+                dbrepo = _make_repository(repository_path, configuration_file_path, **kwargs)
+                _check_branches_exist(dbrepo, branches)
+                shared_repository = self._find_shared_repository(dbrepo, session)
+                if shared_repository:
+                    print('Repository {} shared with other projects'.format(repository_path))
+                    session.add(ProjectRepository(project_name=self.project_name, repository_id=shared_repository.id))
+                    session.commit()
+                    self._load_data(session)
+                    dbrepo = next(repo for repo in self._repositories if repo.id == shared_repository.id)
+                else:
+                    session.add(dbrepo)
+                    session.flush()
+                    self._repositories.append(dbrepo)
+                    project_repo = ProjectRepository(project_name=self.project_name, repository_id=dbrepo.id)
+                    session.add(project_repo)
+                    session.flush()
+                self._add_branches(dbrepo, branches, session)
+                self._process_repository(dbrepo, session, shard)
+                session.commit()
+                self._invalidate_results(previous_head_ids, session)
+
+    def update_data(self):
+        _fail_unless_database_exists(self._engine)
+        with self._storage.bulk_load():
             session = self._Session(expire_on_commit=False)
-            dbrepo = Repository(repository_path=repository_path, configuration_file_path=configuration_file_path)
-            if kwargs.get('earliest_date'):
-                start_time, start_time_utc_offset = _time_to_utc_offset(kwargs.get('earliest_date'))
-                dbrepo.start_time = start_time
-                dbrepo.start_time_utc_offset = start_time_utc_offset
-            session.add(dbrepo)
-            session.flush()
-            self._repositories.append(dbrepo)
-            project_repo = ProjectRepository(project_name=self.project_name, repository_id=dbrepo.id)
-            session.add(project_repo)
-            session.flush()
-            self._process_repository(dbrepo, session)
+            if not self._is_data_current(session):
+                self._load_data(session)
+            previous_head_ids = self._head_ids()
+            self._repositories = [self._process_repository(repository, session)
+                                  for repository in self._repositories]
+            start_time = datetime.datetime.now()
             session.commit()
+            print('Database commit time {}'.format(datetime.datetime.now() - start_time))
+            self._invalidate_results(previous_head_ids, session)
 
-    def update_data(self):
+    def _has_moved_branches(self, repository):
+        branches = self._branches.get(repository.id, {})
+        for branch, branch_head_commit_id in self._resolve_branch_heads(repository).items():
+            if self._is_commit_processed(branch_head_commit_id):
+                if self._is_processed_snapshot(branch_head_commit_id) and \
+                        branches.get(branch) != branch_head_commit_id:
+                    return True
+            elif _is_commit_in_range(repository, repository.git_repository.commit(branch_head_commit_id)):
+                return True
+        return False
+
+    def has_unprocessed_commits(self):
+        return any(not self._is_commit_processed(repository.git_repository.head.commit.hexsha) or
+                   self._has_moved_branches(repository) for repository in self._repositories)
+
+    def head_commit(self, **kwargs):
         _fail_unless_database_exists(self._engine)
-        session = self._Session(expire_on_commit=False)
-        for repository in self._repositories:
-            self._process_repository(repository, session)
-        start_time = datetime.datetime.now()
-        session.commit()
-        print('Database commit time {}'.format(datetime.datetime.now() - start_time))
+        chain_keys = self._select_chain_keys(**kwargs)
+        if kwargs.get('until'):
+            until = _as_utc(kwargs['until'])
+            head_commits = [self._last_snapshot_before(chain_key, until) for _, chain_key in chain_keys]
+        elif kwargs.get('branch') is not None:
+            if not chain_keys:
+                raise BranchNotFoundError('Branch {} is not tracked in project {}'.format(kwargs['branch'],
+                                                                                          self.project_name))
+            head_commits = [self._shas_to_commits.get(self._branches[repository.id][kwargs['branch']])
+                            for repository, _ in chain_keys]
+        else:
+            head_commits = [self._shas_to_commits[repository.head_commit_id] for repository, _ in chain_keys]
+        return _restrict_counts_to_authors(CombinedCommit(head_commits),
+                                           self._resolve_author_names(kwargs.get('authors')))
 
-    def head_commit(self):
+    def author_timeline(self, author, **kwargs):
         _fail_unless_database_exists(self._engine)
-        head_commit_ids = [repository.head_commit_id for repository in self._repositories]
-        head_commits = [self._shas_to_commits[commit_id] for commit_id in head_commit_ids]
-        return CombinedCommit(head_commits)
+        author_indices = {self._author_table.find(author_name) for author_name in self._resolve_author_names([author])}
+        author_indices.discard(None)
+        repository_changes = []
+        session = self._Session()
+        try:
+            for repository, chain_key in self._select_chain_keys(**kwargs):
+                chain = self._chains.get(chain_key, [])
+                history = self._chain_author_history(chain_key, session)
+                positions = sorted(set(itertools.chain.from_iterable(
+                    history.get(author_index, ()) for author_index in author_indices)))
+                repository_changes.append([(chain[position].commit_time, repository.id, chain[position])
+                                           for position in positions])
+        finally:
+            session.close()
+        current_counts = {}
+        timeline = []
+        for commit_time, repository_id, commit in heapq.merge(*repository_changes, key=itemgetter(0)):
+            current_counts[repository_id] = commit.counts_for_authors(author_indices)
+            step = (commit_time, sum(counts[0] for counts in current_counts.values()),
+                    sum(counts[1] for counts in current_counts.values()))
+            if timeline and timeline[-1][0] == commit_time:
+                timeline[-1] = step
+            elif not timeline or timeline[-1][1:] != step[1:]:
+                timeline.append(step)
+        return timeline
 
-    def iter_authors(self):
+    def iter_authors(self, **kwargs):
         _fail_unless_database_exists(self._engine)
         session = self._Session()
-        for dbauthor in self._commit_query(session).join(Author).with_entities(Author).distinct():
+        query = self._filter_commit_query(self._commit_query(session), **kwargs)
+        for dbauthor in query.join(Author).with_entities(Author).distinct():
             yield self._names_to_authors.get(dbauthor.canonical_name)
         session.close()
 
     def iter_commits(self, **kwargs):
         _fail_unless_database_exists(self._engine)
-        iterators = [self._iter_branch(repository) for repository in self._repositories]
-        commit_iterator = _iter_combined_commits(iterators)
+        since = _as_utc(kwargs['since']) if kwargs.get('since') else None
+        until = _as_utc(kwargs['until']) if kwargs.get('until') else None
+        author_names = self._resolve_author_names(kwargs.get('authors'))
+        chain_keys = [chain_key for _, chain_key in self._select_chain_keys(**kwargs)]
+        iterators = [self._iter_branch(chain_key, since, until) for chain_key in chain_keys]
+        initial_commits = [self._last_snapshot_before(chain_key, since) for chain_key in chain_keys] \
+            if since else None
+        commit_iterator = _iter_combined_commits(iterators, initial_commits)
         if not kwargs.get('frequency'):
             for commit in commit_iterator:
-                yield commit
+                yield _restrict_counts_to_authors(commit, author_names)
         else:
             next_commit_time = None
             frequency = kwargs['frequency']
             for commit in commit_iterator:
                 if not next_commit_time or commit.commit_time >= next_commit_time:
-                    yield commit
+                    yield _restrict_counts_to_authors(commit, author_names)
                     start = frequency.start_of_interval(commit.commit_time)
                     next_commit_time = frequency.next_instance(start)
 
-    def iter_individual_commits(self):
+    def cached_result(self, command, compute_function, **kwargs):
+        _fail_unless_database_exists(self._engine)
+        try:
+            return self._result_cache.result(self.project_name, self._head_ids(), command, compute_function,
+                                             **kwargs)
+        except OperationalError:
+            if not self._result_cache.has_table():
+                raise OldDatabaseSchemaError('Database created with too-old version of Git Hammer')
+            raise
+
+    def commit_counts_per_hour(self, **kwargs):
+        return self._count_commits_by(Commit.local_hour, 24, **kwargs)
+
+    def commit_counts_per_weekday(self, **kwargs):
+        return self._count_commits_by(Commit.local_weekday, 7, **kwargs)
+
+    def iter_individual_commits(self, **kwargs):
         _fail_unless_database_exists(self._engine)
         session = self._Session()
-        for commit in self._commit_query(session).order_by(Commit.commit_time):
-            yield self._shas_to_commits.get(commit.hexsha)
+        query = self._filter_commit_query(self._commit_query(session), **kwargs)
+        for hexsha, in query.with_entities(Commit.hexsha).order_by(Commit.commit_time):
+            yield self._shas_to_commits.get(hexsha)
         session.close()
+
+    def iter_commit_rows(self, chunk_size=_default_row_chunk_size, **kwargs):
+        _fail_unless_database_exists(self._engine)
+        session = self._Session()
+        try:
+            query = self._filter_commit_query(self._commit_query(session), **kwargs).join(
+                Author, Commit.author_id == Author.id).with_entities(
+                Commit.hexsha, Repository.repository_path, Author.canonical_name, Commit.commit_time,
+                Commit.commit_time_utc_offset, Commit.added_lines, Commit.deleted_lines, Commit.has_snapshot).order_by(
+                Commit.commit_time)
+            for row in query.yield_per(chunk_size):
+                yield (row[0], row[1], row[2], _as_utc(row[3])) + tuple(row[4:])
+        finally:
+            session.close()
+
+    def iter_author_count_rows(self, chunk_size=_default_row_chunk_size, **kwargs):
+        _fail_unless_database_exists(self._engine)
+        author_names = self._resolve_author_names(kwargs.get('authors'))
+        commit_kwargs = {key: value for key, value in kwargs.items() if key != 'authors'}
+        session = self._Session()
+        try:
+            commits = self._filter_commit_query(self._commit_query(session), **commit_kwargs).with_entities(
+                Commit.id, Commit.hexsha).subquery()
+            query = session.query(commits.c.hexsha, Author.canonical_name, AuthorCommitDetail.line_count,
+                                  AuthorCommitDetail.test_count).select_from(AuthorCommitDetail).join(
+                commits, AuthorCommitDetail.commit_id == commits.c.id).join(
+                Author, AuthorCommitDetail.author_id == Author.id).order_by(AuthorCommitDetail.commit_id)
+            if author_names is not None:
+                query = query.filter(Author.canonical_name.in_(author_names))
+            for hexsha, author_name, line_count, test_count in query.yield_per(chunk_size):
+                yield hexsha, author_name, line_count, test_count or 0
+        finally:
+            session.close()
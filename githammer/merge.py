@@ -0,0 +1,129 @@
+# Copyright 2019 Jaakko Kangasharju
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import datetime
+
+from sqlalchemy.orm import sessionmaker
+
+from .dbtypes import Author, AuthorCommitDetail, Branch, Commit, ProjectRepository, Repository
+from .hammer import Hammer
+from .storage import create_storage_engine
+
+_merge_chunk_size = 1000
+_commit_columns = ['hexsha', 'added_lines', 'deleted_lines', 'commit_time', 'commit_time_utc_offset', 'parent_ids',
+                   'has_snapshot', 'local_hour', 'local_weekday']
+
+
+def _iter_chunks(items, chunk_size=_merge_chunk_size):
+    for index in range(0, len(items), chunk_size):
+        yield items[index:index + chunk_size]
+
+
+def _merge_repositories(hammer, project_name, shard_session, session):
+    repository_ids = {}
+    for shard_repository in shard_session.query(Repository).join(ProjectRepository).filter(
+            ProjectRepository.project_name == project_name):
+        repository = Repository(repository_path=shard_repository.repository_path,
+                                configuration_file_path=shard_repository.configuration_file_path,
+                                configuration_hash=shard_repository.configuration_hash,
+                                start_time=shard_repository.start_time,
+                                start_time_utc_offset=shard_repository.start_time_utc_offset,
+                                snapshot_frequency=shard_repository.snapshot_frequency)
+        stored_repository = hammer._find_shared_repository(repository, session)
+        if stored_repository:
+            repository = stored_repository
+        else:
+            session.add(repository)
+            session.flush()
+        if not session.query(ProjectRepository).get((project_name, repository.id)):
+            session.add(ProjectRepository(project_name=project_name, repository_id=repository.id))
+        for branch_name, in shard_session.query(Branch.name).filter(Branch.repository_id == shard_repository.id):
+            if not session.query(Branch).get((repository.id, branch_name)):
+                session.add(Branch(repository_id=repository.id, name=branch_name))
+        repository_ids[shard_repository.id] = repository.id
+    session.flush()
+    return repository_ids
+
+
+def _merge_authors(shard_session, session):
+    authors = {author.canonical_name: author for author in session.query(Author)}
+    shard_authors = {}
+    for shard_author in shard_session.query(Author):
+        author = authors.get(shard_author.canonical_name)
+        if author is None:
+            author = Author(canonical_name=shard_author.canonical_name, aliases=list(shard_author.aliases))
+            session.add(author)
+            authors[author.canonical_name] = author
+        else:
+            new_aliases = [alias for alias in shard_author.aliases if alias not in author.aliases]
+            if new_aliases:
+                author.aliases = author.aliases + new_aliases
+        shard_authors[shard_author.id] = author
+    session.flush()
+    return {shard_author_id: author.id for shard_author_id, author in shard_authors.items()}
+
+
+def _merge_commits(shard_session, session, repository_ids, author_ids):
+    shard_commits = shard_session.query(Commit.id, Commit.author_id, Commit.repository_id,
+                                        *[getattr(Commit, column) for column in _commit_columns]).filter(
+        Commit.repository_id.in_(list(repository_ids))).order_by(Commit.id).all()
+    commit_count = 0
+    for commits in _iter_chunks(shard_commits):
+        existing_hexshas = {hexsha for hexsha, in session.query(Commit.hexsha).filter(
+            Commit.hexsha.in_([commit.hexsha for commit in commits]))}
+        new_commits = [commit for commit in commits if commit.hexsha not in existing_hexshas]
+        if not new_commits:
+            continue
+        session.execute(Commit.__table__.insert(), [
+            dict({column: getattr(commit, column) for column in _commit_columns},
+                 author_id=author_ids[commit.author_id], repository_id=repository_ids[commit.repository_id])
+            for commit in new_commits])
+        commit_ids = dict(session.query(Commit.hexsha, Commit.id).filter(
+            Commit.hexsha.in_([commit.hexsha for commit in new_commits])))
+        shard_commit_ids = {commit.id: commit_ids[commit.hexsha] for commit in new_commits}
+        detail_rows = [{'author_id': author_ids[author_id], 'commit_id': shard_commit_ids[commit_id],
+                        'line_count': line_count, 'test_count': test_count}
+                       for author_id, commit_id, line_count, test_count in shard_session.query(
+                           AuthorCommitDetail.author_id, AuthorCommitDetail.commit_id, AuthorCommitDetail.line_count,
+                           AuthorCommitDetail.test_count).filter(AuthorCommitDetail.commit_id.in_(list(shard_commit_ids)))]
+        if detail_rows:
+            session.execute(AuthorCommitDetail.__table__.insert(), detail_rows)
+        commit_count += len(new_commits)
+    return commit_count
+
+
+def merge_databases(project_name, database_url, shard_database_urls):
+    start_time = datetime.datetime.now()
+    hammer = Hammer(project_name, database_url)
+    hammer._ensure_project_exists()
+    with hammer._storage.bulk_load():
+        session = hammer._Session()
+        for shard_database_url in shard_database_urls:
+            shard_engine, _ = create_storage_engine(shard_database_url)
+            shard_session = sessionmaker(bind=shard_engine)()
+            try:
+                repository_ids = _merge_repositories(hammer, project_name, shard_session, session)
+                author_ids = _merge_authors(shard_session, session)
+                commit_count = _merge_commits(shard_session, session, repository_ids, author_ids)
+                print('Merged {} commits from {}'.format(commit_count, shard_database_url))
+            finally:
+                shard_session.close()
+                shard_engine.dispose()
+        session.commit()
+        session.close()
+    print('Merge time {}'.format(datetime.datetime.now() - start_time))
+    merged_hammer = Hammer(project_name, database_url)
+    merged_hammer.update_data()
+    return merged_hammer
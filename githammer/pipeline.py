@@ -0,0 +1,143 @@
+# Copyright 2019 Jaakko Kangasharju
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+import queue
+import threading
+
+_end_of_stream = object()
+_poll_interval = 0.1
+
+
+class PipelineStage:
+
+    def __init__(self, name):
+        self.name = name
+        self.busy_time = datetime.timedelta()
+        self.item_count = 0
+        self.max_queue_depth = 0
+
+    def __repr__(self):
+        return '{}: {} items, busy {}, max queue depth {}'.format(self.name, self.item_count, self.busy_time,
+                                                                 self.max_queue_depth)
+
+
+class Pipeline:
+
+    def __init__(self, queue_size):
+        self.stages = []
+        self._queue_size = queue_size
+        self._queues = []
+        self._threads = []
+        self._stopped = threading.Event()
+        self._error = None
+
+    def _put(self, stage, output_queue, item):
+        while not self._stopped.is_set():
+            try:
+                output_queue.put(item, timeout=_poll_interval)
+                stage.max_queue_depth = max(stage.max_queue_depth, output_queue.qsize())
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _get(self, input_queue):
+        while not self._stopped.is_set():
+            try:
+                return input_queue.get(timeout=_poll_interval)
+            except queue.Empty:
+                pass
+        return _end_of_stream
+
+    def _fail(self, error):
+        if self._error is None:
+            self._error = error
+
+    def _run_source(self, stage, make_iterable, output_queue):
+        try:
+            iterator = iter(make_iterable())
+            while True:
+                start_time = datetime.datetime.now()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                stage.busy_time += datetime.datetime.now() - start_time
+                stage.item_count += 1
+                if not self._put(stage, output_queue, item):
+                    return
+        except BaseException as error:
+            self._fail(error)
+        finally:
+            self._put(stage, output_queue, _end_of_stream)
+
+    def _run_stage(self, stage, function, input_queue, output_queue):
+        try:
+            while True:
+                item = self._get(input_queue)
+                if item is _end_of_stream:
+                    break
+                start_time = datetime.datetime.now()
+                result = function(item)
+                stage.busy_time += datetime.datetime.now() - start_time
+                stage.item_count += 1
+                if not self._put(stage, output_queue, result):
+                    return
+        except BaseException as error:
+            self._fail(error)
+        finally:
+            self._put(stage, output_queue, _end_of_stream)
+
+    def _add_thread(self, target, *args):
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        self._threads.append(thread)
+
+    def add_source(self, name, make_iterable):
+        stage = PipelineStage(name)
+        output_queue = queue.Queue(maxsize=self._queue_size)
+        self._add_thread(self._run_source, stage, make_iterable, output_queue)
+        self.stages.append(stage)
+        self._queues.append(output_queue)
+
+    def add_stage(self, name, function):
+        stage = PipelineStage(name)
+        output_queue = queue.Queue(maxsize=self._queue_size)
+        self._add_thread(self._run_stage, stage, function, self._queues[-1], output_queue)
+        self.stages.append(stage)
+        self._queues.append(output_queue)
+
+    def queue_depths(self):
+        return [output_queue.qsize() for output_queue in self._queues]
+
+    def run(self, sink_name):
+        stage = PipelineStage(sink_name)
+        self.stages.append(stage)
+        for thread in self._threads:
+            thread.start()
+        try:
+            while True:
+                item = self._get(self._queues[-1])
+                if item is _end_of_stream:
+                    break
+                start_time = datetime.datetime.now()
+                yield item
+                stage.busy_time += datetime.datetime.now() - start_time
+                stage.item_count += 1
+        finally:
+            self._stopped.set()
+            for thread in self._threads:
+                thread.join()
+        if self._error is not None:
+            raise self._error
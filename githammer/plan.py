@@ -0,0 +1,218 @@
+# Copyright 2019 Jaakko Kangasharju
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+import heapq
+import os
+import random
+import time
+from collections import ChainMap, namedtuple
+
+from .hammer import _commit_exists, _make_repository
+
+_calibration_sample_size = 32
+_random_seed = 1
+
+_PlannedCommit = namedtuple('_PlannedCommit', ['hexsha', 'parent_ids', 'has_snapshot'])
+
+
+class CommitEstimate:
+    __slots__ = ['hexsha', 'has_snapshot', 'is_full_snapshot', 'blame_count', 'read_count', 'blame_byte_count',
+                 'read_byte_count', 'skipped_file_count']
+
+    def __init__(self, hexsha, has_snapshot):
+        self.hexsha = hexsha
+        self.has_snapshot = has_snapshot
+        self.is_full_snapshot = False
+        self.blame_count = 0
+        self.read_count = 0
+        self.blame_byte_count = 0
+        self.read_byte_count = 0
+        self.skipped_file_count = 0
+
+    @property
+    def byte_count(self):
+        return self.blame_byte_count + self.read_byte_count
+
+
+class _Sample:
+
+    def __init__(self, size, random_generator):
+        self.items = []
+        self._size = size
+        self._seen = 0
+        self._random = random_generator
+
+    def add(self, item):
+        self._seen += 1
+        if len(self.items) < self._size:
+            self.items.append(item)
+        else:
+            index = self._random.randrange(self._seen)
+            if index < self._size:
+                self.items[index] = item
+
+
+class RepositoryPlan:
+
+    def __init__(self, repository_path):
+        self.repository_path = repository_path
+        self.commits = []
+        self.seconds_per_commit = 0.0
+        self.seconds_per_snapshot = 0.0
+        self.seconds_per_blame = 0.0
+        self.seconds_per_byte = 0.0
+        random_generator = random.Random(_random_seed)
+        self._commit_sample = _Sample(_calibration_sample_size, random_generator)
+        self._blame_sample = _Sample(_calibration_sample_size, random_generator)
+        self._read_sample = _Sample(_calibration_sample_size, random_generator)
+
+    @property
+    def commit_count(self):
+        return len(self.commits)
+
+    @property
+    def snapshot_count(self):
+        return sum(1 for commit in self.commits if commit.has_snapshot)
+
+    @property
+    def full_snapshot_count(self):
+        return sum(1 for commit in self.commits if commit.is_full_snapshot)
+
+    @property
+    def blame_count(self):
+        return sum(commit.blame_count for commit in self.commits)
+
+    @property
+    def read_count(self):
+        return sum(commit.read_count for commit in self.commits)
+
+    @property
+    def byte_count(self):
+        return sum(commit.byte_count for commit in self.commits)
+
+    @property
+    def skipped_file_count(self):
+        return sum(commit.skipped_file_count for commit in self.commits)
+
+    def _stats_seconds(self, commit):
+        if not commit.has_snapshot:
+            return 0.0
+        return self.seconds_per_snapshot + commit.blame_count * self.seconds_per_blame + \
+            commit.read_byte_count * self.seconds_per_byte
+
+    def commit_time(self, commit):
+        return datetime.timedelta(seconds=self._stats_seconds(commit))
+
+    def estimated_time(self, processes=1):
+        enumeration_seconds = self.commit_count * self.seconds_per_commit
+        stats_seconds = sum(self._stats_seconds(commit) for commit in self.commits)
+        return datetime.timedelta(seconds=(enumeration_seconds + stats_seconds) / processes)
+
+    def most_expensive_commits(self, count):
+        return heapq.nlargest(count, (commit for commit in self.commits if commit.has_snapshot),
+                              key=lambda commit: (self._stats_seconds(commit), commit.byte_count))
+
+
+def _plan_commit_stats(hammer, repository, commit, estimate, planned_commits, plan):
+    skipped_paths = []
+    previous_commit = hammer._find_snapshot_ancestor(commit, planned_commits) if commit.parents else None
+    if previous_commit:
+        previous_commit = repository.git_repository.commit(previous_commit.hexsha)
+        current_paths, previous_paths = hammer._changed_source_paths(repository, commit, previous_commit,
+                                                                     skipped_paths)
+        for blamed_commit, paths in ((commit, current_paths), (previous_commit, previous_paths)):
+            for path in paths:
+                if repository.configuration.is_source_file(path):
+                    size = blamed_commit.tree[path].size
+                    estimate.blame_count += 1
+                    estimate.blame_byte_count += size
+                    plan._blame_sample.add((blamed_commit.hexsha, path))
+    else:
+        estimate.is_full_snapshot = True
+        need_full_blame = bool(commit.parents) and _commit_exists(repository, commit.parents[0].hexsha)
+        for blob in hammer._source_blobs(repository, commit, skipped_paths):
+            if need_full_blame:
+                estimate.blame_count += 1
+                estimate.blame_byte_count += blob.size
+                plan._blame_sample.add((commit.hexsha, blob.path))
+            else:
+                estimate.read_count += 1
+                estimate.read_byte_count += blob.size
+                plan._read_sample.add(blob.hexsha)
+    estimate.skipped_file_count = len(skipped_paths)
+
+
+def _average_seconds(function, items):
+    if not items:
+        return 0.0
+    start_time = time.perf_counter()
+    for item in items:
+        function(item)
+    return (time.perf_counter() - start_time) / len(items)
+
+
+def _count_blamed_lines(hammer, repository, commit_id, path):
+    line_count = 0
+    test_count = 0
+    for blame in hammer._blame_blob(repository, commit_id, path):
+        line_count += blame.line_count
+        if blame.lines:
+            test_count += len(list(repository.configuration.iter_test_lines(path, blame.lines)))
+    return line_count, test_count
+
+
+def _calibrate(hammer, repository, plan):
+    git_repository = repository.git_repository
+    plan.seconds_per_commit = _average_seconds(
+        lambda hexsha: hammer._diff_stat(git_repository, git_repository.commit(hexsha)), plan._commit_sample.items)
+    plan.seconds_per_blame = _average_seconds(
+        lambda item: _count_blamed_lines(hammer, repository, item[0], item[1]), plan._blame_sample.items)
+    read_bytes = 0
+    read_start_time = time.perf_counter()
+    for hexsha in plan._read_sample.items:
+        read_bytes += len(git_repository.odb.stream(bytes.fromhex(hexsha)).read())
+    if read_bytes:
+        plan.seconds_per_byte = (time.perf_counter() - read_start_time) / read_bytes
+
+
+def plan_repository(hammer, repository_path, configuration_file_path=None, **kwargs):
+    start_time = datetime.datetime.now()
+    repository_path = os.path.abspath(repository_path)
+    repository = next((repo for repo in hammer._repositories if repo.repository_path == repository_path), None)
+    if repository is None:
+        repository = _make_repository(repository_path, configuration_file_path, **kwargs)
+    plan = RepositoryPlan(repository_path)
+    snapshot_commit_ids = hammer._select_snapshot_commit_ids(repository)
+    planned_commits = ChainMap({}, hammer._shas_to_commits)
+    snapshot_seconds = 0.0
+    for commit in hammer._iter_unprocessed_commits(repository, repository.git_repository):
+        has_snapshot = snapshot_commit_ids is None or commit.hexsha in snapshot_commit_ids
+        estimate = CommitEstimate(commit.hexsha, has_snapshot)
+        if has_snapshot:
+            stats_start_time = time.perf_counter()
+            _plan_commit_stats(hammer, repository, commit, estimate, planned_commits, plan)
+            snapshot_seconds += time.perf_counter() - stats_start_time
+        planned_commits.maps[0][commit.hexsha] = _PlannedCommit(commit.hexsha,
+                                                                [parent.hexsha for parent in commit.parents],
+                                                                has_snapshot)
+        plan.commits.append(estimate)
+        plan._commit_sample.add(commit.hexsha)
+    if plan.snapshot_count:
+        plan.seconds_per_snapshot = snapshot_seconds / plan.snapshot_count
+    print('Planning time {}'.format(datetime.datetime.now() - start_time))
+    calibration_start_time = datetime.datetime.now()
+    _calibrate(hammer, repository, plan)
+    print('Calibration time {}'.format(datetime.datetime.now() - calibration_start_time))
+    return plan
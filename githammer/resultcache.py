@@ -0,0 +1,112 @@
+# Copyright 2019 Jaakko Kangasharju
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import datetime
+import hashlib
+import json
+import pickle
+
+from sqlalchemy import func, inspect
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from .dbtypes import CachedResult
+
+_default_result_cache_size = 64 * 1024 * 1024
+
+
+def _option_value(value):
+    return getattr(value, 'canonical_name', None) or str(value)
+
+
+def _result_key(project_name, head_ids, command, options):
+    key_data = json.dumps([project_name, head_ids, command, options], sort_keys=True, default=_option_value)
+    return hashlib.sha256(key_data.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+
+    def __init__(self, storage, max_size=_default_result_cache_size):
+        self._storage = storage
+        self._Session = sessionmaker(bind=storage.engine)
+        self.max_size = max_size
+        self._used_keys = {}
+
+    def has_table(self):
+        return inspect(self._storage.engine).has_table(CachedResult.__tablename__)
+
+    def _evict(self, session):
+        total_size = session.query(func.sum(CachedResult.size)).scalar() or 0
+        if total_size <= self.max_size:
+            return
+        for key, size in session.query(CachedResult.key, CachedResult.size).order_by(CachedResult.last_used).all():
+            if total_size <= self.max_size:
+                break
+            session.query(CachedResult).filter(CachedResult.key == key).delete()
+            total_size -= size
+
+    def _store(self, cached_result):
+        with self._storage.engine.connect() as connection, self._storage.without_busy_wait(connection):
+            session = self._Session(bind=connection)
+            try:
+                for key, last_used in self._used_keys.items():
+                    session.query(CachedResult).filter(CachedResult.key == key).update(
+                        {CachedResult.last_used: last_used}, synchronize_session=False)
+                if cached_result is not None:
+                    session.add(cached_result)
+                    session.flush()
+                    self._evict(session)
+                session.commit()
+                self._used_keys.clear()
+            except IntegrityError:
+                session.rollback()
+            except OperationalError as error:
+                session.rollback()
+                print('Result cache not updated: {}'.format(error.orig))
+            finally:
+                session.close()
+
+    def result(self, project_name, head_ids, command, compute_function, **options):
+        key = _result_key(project_name, head_ids, command, options)
+        session = self._Session()
+        try:
+            cached_value, = session.query(CachedResult.value).filter(CachedResult.key == key).first() or (None,)
+        except OperationalError as error:
+            if not self.has_table():
+                raise
+            print('Result cache not read: {}'.format(error.orig))
+            cached_value = None
+        finally:
+            session.close()
+        if cached_value is not None:
+            self._used_keys[key] = datetime.datetime.now()
+            return pickle.loads(cached_value)
+        value = compute_function()
+        data = pickle.dumps(value)
+        self._store(CachedResult(key=key, project_name=project_name, command=command, value=data, size=len(data),
+                                 last_used=datetime.datetime.now()) if len(data) <= self.max_size else None)
+        return value
+
+    def invalidate(self, project_names):
+        session = self._Session()
+        try:
+            session.query(CachedResult).filter(CachedResult.project_name.in_(list(project_names))).delete(
+                synchronize_session=False)
+            session.commit()
+        except OperationalError as error:
+            session.rollback()
+            print('Result cache not invalidated: {}'.format(error.orig))
+        finally:
+            session.close()
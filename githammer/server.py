@@ -0,0 +1,228 @@
+# Copyright 2019 Jaakko Kangasharju
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+import json
+import threading
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from .frequency import Frequency
+from .hammer import Hammer
+
+_series_types = {
+    'line-count': ('line_counts', False),
+    'test-count': ('test_counts', False),
+    'line-author-count': ('line_counts', True),
+    'test-author-count': ('test_counts', True)
+}
+
+
+class RequestError(Exception):
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _author_count_list(counts):
+    return sorted(({'author': author.name, 'count': count} for author, count in counts.items()),
+                  key=lambda item: item['count'], reverse=True)
+
+
+def _isoformat(time):
+    return time.isoformat() if time else None
+
+
+def _summary_data(hammer):
+    commit_counts = {}
+    for commit in hammer.iter_individual_commits():
+        commit_counts[commit.author] = commit_counts.get(commit.author, 0) + 1
+    head_commit = hammer.head_commit()
+    return {
+        'head_commit_time': _isoformat(head_commit.commit_time),
+        'commits': _author_count_list(commit_counts),
+        'lines': _author_count_list(head_commit.line_counts),
+        'tests': _author_count_list(head_commit.test_counts)
+    }
+
+
+def _series_data(hammer, series_type, frequency):
+    counts_property, per_author = _series_types[series_type]
+    points = []
+    for commit in hammer.iter_commits(frequency=frequency):
+        counts = getattr(commit, counts_property)
+        point = {'time': commit.commit_time.isoformat()}
+        if per_author:
+            author_counts = {}
+            for author, count in counts.items():
+                author_counts[author.name] = author_counts.get(author.name, 0) + count
+            point['counts'] = author_counts
+        else:
+            point['count'] = sum(counts.values())
+        points.append(point)
+    return {'type': series_type, 'frequency': frequency.name if frequency else None, 'points': points}
+
+
+def _single_query_value(query, name, default=None):
+    values = query.get(name)
+    return values[-1] if values else default
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+
+    def _send_json(self, status, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method):
+        url = urlparse(self.path)
+        path = [part for part in url.path.split('/') if part]
+        query = parse_qs(url.query)
+        try:
+            status, data = self.server.hammer_server.handle_request(method, path, query)
+        except RequestError as error:
+            status, data = error.status, {'error': str(error)}
+        except Exception as error:
+            traceback.print_exc()
+            status, data = 500, {'error': str(error)}
+        self._send_json(status, data)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+
+class HammerServer:
+
+    def _make_hammer(self, project_name):
+        if self._database_url:
+            return Hammer(project_name, database_url=self._database_url)
+        else:
+            return Hammer(project_name)
+
+    def _project_hammer(self, project_name):
+        hammer = self._hammers.get(project_name)
+        if hammer is None:
+            raise RequestError(404, 'Unknown project {}'.format(project_name))
+        return hammer
+
+    def _project_lock(self, project_name):
+        self._project_hammer(project_name)
+        return self._project_locks[project_name]
+
+    def _project_status(self, project_name):
+        hammer = self._project_hammer(project_name)
+        return {
+            'project': project_name,
+            'head_commit_time': _isoformat(hammer.head_commit().commit_time),
+            'last_update_time': _isoformat(self._last_update_times.get(project_name))
+        }
+
+    def _project_series(self, project_name, query):
+        series_type = _single_query_value(query, 'type', 'line-count')
+        if series_type not in _series_types:
+            raise RequestError(400, 'Unknown series type {}'.format(series_type))
+        frequency_name = _single_query_value(query, 'frequency', Frequency.daily.name)
+        if frequency_name not in Frequency.__members__:
+            raise RequestError(400, 'Unknown frequency {}'.format(frequency_name))
+        hammer = self._project_hammer(project_name)
+        return hammer.cached_result('series', lambda: _series_data(hammer, series_type, Frequency[frequency_name]),
+                                    type=series_type, frequency=frequency_name)
+
+    def _run_updates(self):
+        while not self._stopped.is_set():
+            self._update_requested.wait(self._update_interval)
+            if self._stopped.is_set():
+                break
+            self._update_requested.clear()
+            self.update_projects()
+
+    def __init__(self, project_names, database_url=None, update_interval=None):
+        self._database_url = database_url
+        self._update_interval = update_interval
+        self._hammers = {project_name: self._make_hammer(project_name) for project_name in project_names}
+        self._project_locks = {project_name: threading.Lock() for project_name in project_names}
+        self._last_update_times = {}
+        self._update_lock = threading.Lock()
+        self._update_requested = threading.Event()
+        self._stopped = threading.Event()
+        self._update_thread = None
+        self._http_server = None
+
+    def update_project(self, project_name):
+        with self._update_lock:
+            with self._project_lock(project_name):
+                has_unprocessed_commits = self._project_hammer(project_name).has_unprocessed_commits()
+            if has_unprocessed_commits:
+                hammer = self._make_hammer(project_name)
+                hammer.update_data()
+                with self._project_lock(project_name):
+                    self._hammers[project_name] = hammer
+            self._last_update_times[project_name] = datetime.datetime.now(datetime.timezone.utc)
+
+    def update_projects(self):
+        for project_name in list(self._hammers):
+            try:
+                self.update_project(project_name)
+            except Exception:
+                traceback.print_exc()
+
+    def request_update(self):
+        self._update_requested.set()
+
+    def handle_request(self, method, path, query):
+        if method == 'GET':
+            if path in ([], ['projects']):
+                return 200, {'projects': sorted(self._hammers)}
+            if len(path) == 2 and path[0] == 'projects':
+                with self._project_lock(path[1]):
+                    return 200, self._project_status(path[1])
+            if len(path) == 3 and path[0] == 'projects' and path[2] == 'summary':
+                with self._project_lock(path[1]):
+                    hammer = self._project_hammer(path[1])
+                    return 200, hammer.cached_result('summary-data', lambda: _summary_data(hammer))
+            if len(path) == 3 and path[0] == 'projects' and path[2] == 'series':
+                with self._project_lock(path[1]):
+                    return 200, self._project_series(path[1], query)
+        elif method == 'POST':
+            if path == ['update']:
+                self.request_update()
+                return 202, {'status': 'update requested'}
+        raise RequestError(404, 'No such resource /{}'.format('/'.join(path)))
+
+    def start(self, host='127.0.0.1', port=8080):
+        self._http_server = ThreadingHTTPServer((host, port), _RequestHandler)
+        self._http_server.daemon_threads = True
+        self._http_server.hammer_server = self
+        self._update_thread = threading.Thread(target=self._run_updates, daemon=True)
+        self._update_thread.start()
+        return self._http_server.server_address
+
+    def serve_forever(self):
+        self._http_server.serve_forever()
+
+    def shutdown(self):
+        self._stopped.set()
+        self._update_requested.set()
+        self._http_server.shutdown()
+        self._http_server.server_close()
+        self._update_thread.join()
@@ -0,0 +1,86 @@
+# Copyright 2019 Jaakko Kangasharju
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import os
+
+import git
+
+from .config import Configuration
+from .gitreader import is_binary_data, iter_blob_contents, iter_tree_blobs, read_attributes
+
+
+class _SourceRepository:
+
+    def __init__(self, repository_path, configuration_file_path):
+        self.configuration = Configuration(configuration_file_path)
+        self.git_repository = git.Repo(repository_path)
+
+
+def _filter_skipped_blobs(repository, commit, blobs, skipped_paths):
+    configuration = repository.configuration
+    if not configuration.has_skip_rules():
+        return blobs
+    attributes = read_attributes(repository.git_repository, commit.hexsha, [blob.path for blob in blobs],
+                                 configuration.attribute_names())
+    remaining_blobs = []
+    for blob in blobs:
+        reason = configuration.skip_reason(blob.size, attributes.get(blob.path, {}))
+        if reason:
+            skipped_paths.append((blob.path, reason))
+        else:
+            remaining_blobs.append(blob)
+    if not configuration.skip_binary:
+        return remaining_blobs
+    text_blobs = []
+    for blob, data in zip(remaining_blobs, iter_blob_contents(repository.git_repository,
+                                                              [blob.hexsha for blob in remaining_blobs])):
+        if is_binary_data(data):
+            skipped_paths.append((blob.path, 'binary'))
+        else:
+            text_blobs.append(blob)
+    return text_blobs
+
+
+def _source_blobs(repository, commit, skipped_paths):
+    configuration = repository.configuration
+    source_blobs = [entry for entry in iter_tree_blobs(repository.git_repository, commit.hexsha)
+                    if configuration.is_source_file(entry.path)]
+    return _filter_skipped_blobs(repository, commit, source_blobs, skipped_paths)
+
+
+def _iter_blob_lines(repository, blobs):
+    for data in iter_blob_contents(repository.git_repository, [blob.hexsha for blob in blobs]):
+        yield [line.decode('utf-8', 'ignore') for line in io.BytesIO(data).readlines()]
+
+
+def iter_sources_and_tests(repository_path, configuration_file_path=None):
+    if configuration_file_path is None:
+        configuration_file_path = os.path.join(repository_path, 'git-hammer-config.json')
+    repository = _SourceRepository(repository_path, configuration_file_path)
+    configuration = repository.configuration
+    commit = repository.git_repository.head.commit
+    skipped_paths = []
+    source_blobs = _source_blobs(repository, commit, skipped_paths)
+    for path, reason in skipped_paths:
+        yield 'skipped-file', '{} ({})'.format(path, reason)
+    test_blob_lines = _iter_blob_lines(repository, [blob for blob in source_blobs
+                                                    if configuration.is_test_file(blob.path)])
+    for blob in source_blobs:
+        if configuration.is_test_file(blob.path):
+            yield 'test-file', blob.path
+            for line in configuration.iter_test_lines(blob.path, next(test_blob_lines)):
+                yield 'test-line', line.rstrip()
+        else:
+            yield 'source-file', blob.path
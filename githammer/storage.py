@@ -0,0 +1,107 @@
+# Copyright 2019 Jaakko Kangasharju
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+_default_database_url = 'sqlite:///git-hammer.sqlite'
+_busy_timeout_milliseconds = 30000
+_connection_pragmas = [
+    'journal_mode=WAL',
+    'busy_timeout={}'.format(_busy_timeout_milliseconds),
+    'mmap_size=268435456',
+    'temp_store=MEMORY'
+]
+_query_pragmas = [
+    'synchronous=NORMAL',
+    'cache_size=-32768',
+    'wal_autocheckpoint=1000'
+]
+_bulk_load_pragmas = [
+    'synchronous=NORMAL',
+    'cache_size=-262144',
+    'wal_autocheckpoint=16384'
+]
+_bulk_load_finish_pragmas = [
+    'wal_checkpoint(TRUNCATE)',
+    'optimize'
+]
+
+
+def _execute_pragmas(dbapi_connection, pragmas):
+    cursor = dbapi_connection.cursor()
+    for pragma in pragmas:
+        cursor.execute('PRAGMA {}'.format(pragma))
+        cursor.fetchall()
+    cursor.close()
+
+
+class StorageProfile:
+
+    def __init__(self, engine, tuned=True):
+        self.engine = engine
+        self.is_tuned = tuned and engine.dialect.name == 'sqlite'
+        self.is_bulk_loading = False
+        if self.is_tuned:
+            event.listen(engine, 'connect', self._on_connect)
+            event.listen(engine, 'checkout', self._on_checkout)
+
+    def _on_connect(self, dbapi_connection, _):
+        _execute_pragmas(dbapi_connection, _connection_pragmas)
+
+    def _on_checkout(self, dbapi_connection, connection_record, _):
+        if connection_record.info.get('is_bulk_loading') is not self.is_bulk_loading:
+            _execute_pragmas(dbapi_connection, _bulk_load_pragmas if self.is_bulk_loading else _query_pragmas)
+            connection_record.info['is_bulk_loading'] = self.is_bulk_loading
+
+    @contextmanager
+    def without_busy_wait(self, connection):
+        if self.is_tuned:
+            connection.exec_driver_sql('PRAGMA busy_timeout=0')
+        try:
+            yield
+        finally:
+            if self.is_tuned:
+                connection.exec_driver_sql('PRAGMA busy_timeout={}'.format(_busy_timeout_milliseconds))
+
+    @contextmanager
+    def bulk_load(self):
+        was_bulk_loading = self.is_bulk_loading
+        self.is_bulk_loading = True
+        try:
+            yield
+        finally:
+            self.is_bulk_loading = was_bulk_loading
+        if self.is_tuned and not was_bulk_loading:
+            connection = self.engine.raw_connection()
+            try:
+                _execute_pragmas(connection, _bulk_load_finish_pragmas)
+            finally:
+                connection.close()
+
+
+def _is_sqlite_file_url(url):
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def create_storage_engine(database_url, tuned=True):
+    url = make_url(database_url)
+    if tuned and _is_sqlite_file_url(url):
+        engine = create_engine(url, poolclass=QueuePool, connect_args={'check_same_thread': False})
+    else:
+        engine = create_engine(url)
+    return engine, StorageProfile(engine, tuned)
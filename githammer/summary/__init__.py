@@ -1,2 +1,30 @@
-from .graph import total_lines, lines_per_author, total_tests, tests_per_author, commits_per_hour, commits_per_weekday
-from .table import commit_count_table, line_count_table, test_count_table
+import importlib
+
+_lazy_attributes = {
+    'total_lines': '.graph',
+    'lines_per_author': '.graph',
+    'total_tests': '.graph',
+    'tests_per_author': '.graph',
+    'commits_per_hour': '.graph',
+    'commits_per_weekday': '.graph',
+    'commit_count_table': '.table',
+    'line_count_table': '.table',
+    'test_count_table': '.table',
+    'summary_text': '.table',
+    'write_report': '.report'
+}
+
+__all__ = list(_lazy_attributes)
+
+
+def __getattr__(name):
+    module_name = _lazy_attributes.get(name)
+    if module_name is None:
+        raise AttributeError('module {} has no attribute {}'.format(__name__, name))
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -12,94 +12,199 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from operator import attrgetter
+import datetime
 
-import matplotlib.pyplot as mpplot
+from matplotlib import rcParams
+from matplotlib.figure import Figure
 
 from githammer import Frequency
 
+_max_legend_authors = 25
+_author_figure_size = (12, 7)
+_weekday_labels = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
 
 class NoDataForGraphError(Exception):
     pass
 
 
-def _plot_totals(hammer, counts_property):
-    date_array = []
-    line_count_array = []
-    for commit in hammer.iter_commits(frequency=Frequency.daily):
-        date_array.append(commit.commit_time)
-        line_count_array.append(sum(getattr(commit, counts_property).values()))
-    figure = mpplot.figure()
-    plot = figure.add_subplot(111)
-    plot.plot(date_array, line_count_array, ls='-', marker='')
-    figure.autofmt_xdate(rotation=45)
-    figure.tight_layout()
-    return figure
+class _CountSeries:
+
+    def __init__(self):
+        self.dates = []
+        self.line_counts = []
+        self.test_counts = []
+        self.max_line_counts = {}
+        self.max_test_counts = {}
+
+
+def _make_figure(headless, **figure_kwargs):
+    if headless:
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        figure = Figure(**figure_kwargs)
+        FigureCanvasAgg(figure)
+        return figure
+    else:
+        import matplotlib.pyplot as mpplot
+        return mpplot.figure(**figure_kwargs)
+
+
+def _pixel_width(figure_size=None):
+    if figure_size is None:
+        figure_size = rcParams['figure.figsize']
+    return int(figure_size[0] * rcParams['figure.dpi'])
+
+
+def _next_sample_time_function(hammer, max_points, **kwargs):
+    if not max_points:
+        return lambda commit_time: Frequency.daily.next_instance(Frequency.daily.start_of_interval(commit_time))
+    first_commit = next(hammer.iter_commits(**kwargs), None)
+    if first_commit is None:
+        return None
+    last_commit_time = hammer.head_commit(**kwargs).commit_time
+    step = max((last_commit_time - first_commit.commit_time) / max_points, datetime.timedelta(days=1))
+    return lambda commit_time: commit_time + step
+
 
+def _iter_sampled(commits, next_sample_time):
+    next_commit_time = None
+    for commit in commits:
+        is_sampled = next_commit_time is None or commit.commit_time >= next_commit_time
+        if is_sampled:
+            next_commit_time = next_sample_time(commit.commit_time)
+        yield commit, is_sampled
 
-def _plot_totals_per_author(hammer, counts_property, min_count_per_author=0):
-    selected_authors = set()
-    for commit in hammer.iter_commits():
-        for author, count in getattr(commit, counts_property).items():
-            if count >= min_count_per_author:
-                selected_authors.add(author)
+
+def _update_max_counts(max_counts, counts):
+    for author, count in counts.items():
+        if count > max_counts.get(author, -1):
+            max_counts[author] = count
+
+
+def _collect_count_series(hammer, max_points, **kwargs):
+    series = _CountSeries()
+    next_sample_time = _next_sample_time_function(hammer, max_points, **kwargs)
+    if not next_sample_time:
+        return series
+    for commit, is_sampled in _iter_sampled(hammer.iter_commits(**kwargs), next_sample_time):
+        _update_max_counts(series.max_line_counts, commit.line_counts)
+        _update_max_counts(series.max_test_counts, commit.test_counts)
+        if is_sampled:
+            series.dates.append(commit.commit_time)
+            series.line_counts.append(commit.line_counts)
+            series.test_counts.append(commit.test_counts)
+    return series
+
+
+def _total_counts(sampled_counts):
+    return [sum(counts.values()) for counts in sampled_counts]
+
+
+def _author_count_arrays(sampled_counts, max_counts, head_counts, min_count_per_author, fold_tail):
+    selected_authors = [author for author, count in max_counts.items() if count >= min_count_per_author]
     if not selected_authors:
         raise NoDataForGraphError(
             'No authors were found having at least a count of {} in a single commit'.format(min_count_per_author))
-    head_counts = getattr(hammer.head_commit(), counts_property)
-    author_list = sorted(list(selected_authors), key=lambda a: head_counts.get(a, 0), reverse=True)
+    author_list = sorted(selected_authors, key=lambda a: head_counts.get(a, 0), reverse=True)
+    other_authors = set()
+    if fold_tail and len(author_list) > _max_legend_authors:
+        other_authors = set(author_list[_max_legend_authors - 1:])
+        author_list = author_list[:_max_legend_authors - 1]
     author_labels = [author.name for author in author_list]
-    date_array = []
-    count_array = [[] for _ in range(len(author_list))]
-    for commit in hammer.iter_commits(frequency=Frequency.daily):
-        date_array.append(commit.commit_time)
+    if other_authors:
+        author_labels.append('Others')
+    count_array = [[] for _ in range(len(author_labels))]
+    for counts in sampled_counts:
         for index, author in enumerate(author_list):
-            count_array[index].append(getattr(commit, counts_property).get(author, 0))
-    figure = mpplot.figure(figsize=(12,7))
+            count_array[index].append(counts.get(author, 0))
+        if other_authors:
+            count_array[-1].append(sum(count for author, count in counts.items() if author in other_authors))
+    return count_array, author_labels
+
+
+def _render_totals(date_array, count_array, headless=False):
+    figure = _make_figure(headless)
+    plot = figure.add_subplot(111)
+    plot.plot(date_array, count_array, ls='-', marker='')
+    figure.autofmt_xdate(rotation=45)
+    figure.tight_layout()
+    return figure
+
+
+def _render_totals_per_author(date_array, count_array, author_labels, headless=False):
+    figure = _make_figure(headless, figsize=_author_figure_size)
     figure.subplots_adjust(left=0.08, right=0.75, top=0.95, bottom=0.05)
     plot = figure.add_subplot(111)
     plot.stackplot(date_array, count_array, labels=author_labels)
     handles, labels = plot.get_legend_handles_labels()
-    plot.legend(handles[:25], labels[:25], bbox_to_anchor=(1.0, 0.5), loc='center left')
+    plot.legend(handles[:_max_legend_authors], labels[:_max_legend_authors], bbox_to_anchor=(1.0, 0.5),
+                loc='center left')
     figure.autofmt_xdate(rotation=45)
     return figure
 
 
-def total_lines(hammer):
-    return _plot_totals(hammer, 'line_counts')
+def _render_histogram(count_array, labels=None, headless=False):
+    figure = _make_figure(headless)
+    plot = figure.add_subplot(111)
+    plot.bar(range(len(count_array)), count_array)
+    if labels:
+        plot.set_xticks(range(len(count_array)))
+        plot.set_xticklabels(labels)
+    figure.tight_layout()
+    return figure
 
 
-def total_tests(hammer):
-    return _plot_totals(hammer, 'test_counts')
+def _totals_data(hammer, counts_property, max_points, **kwargs):
+    series = _collect_count_series(hammer, max_points, **kwargs)
+    return series.dates, _total_counts(getattr(series, counts_property))
 
 
-def lines_per_author(hammer):
-    return _plot_totals_per_author(hammer, 'line_counts')
+def _totals_per_author_data(hammer, counts_property, max_points, min_count_per_author, fold_tail, **kwargs):
+    series = _collect_count_series(hammer, max_points, **kwargs)
+    count_array, author_labels = _author_count_arrays(
+        getattr(series, counts_property), getattr(series, 'max_' + counts_property),
+        getattr(hammer.head_commit(**kwargs), counts_property), min_count_per_author, fold_tail)
+    return series.dates, count_array, author_labels
 
 
-def tests_per_author(hammer):
-    return _plot_totals_per_author(hammer, 'test_counts')
+def _plot_totals(hammer, graph_type, counts_property, headless=False, **kwargs):
+    max_points = _pixel_width() if headless else None
+    dates, counts = hammer.cached_result(
+        graph_type, lambda: _totals_data(hammer, counts_property, max_points, **kwargs), max_points=max_points,
+        **kwargs)
+    return _render_totals(dates, counts, headless=headless)
 
 
-def commits_per_hour(hammer):
-    count_array = [0] * 24
-    for commit in hammer.iter_individual_commits():
-        count_array[commit.commit_time_tz().hour] += 1
-    figure = mpplot.figure()
-    plot = figure.add_subplot(111)
-    plot.bar(range(len(count_array)), count_array)
-    figure.tight_layout()
-    return figure
+def _plot_totals_per_author(hammer, graph_type, counts_property, min_count_per_author=0, headless=False, **kwargs):
+    max_points = _pixel_width(_author_figure_size) if headless else None
+    dates, count_array, author_labels = hammer.cached_result(
+        graph_type, lambda: _totals_per_author_data(hammer, counts_property, max_points, min_count_per_author,
+                                                    headless, **kwargs),
+        max_points=max_points, min_count_per_author=min_count_per_author, fold_tail=headless, **kwargs)
+    return _render_totals_per_author(dates, count_array, author_labels, headless=headless)
 
 
-def commits_per_weekday(hammer):
-    count_array = [0] * 7
-    for commit in hammer.iter_individual_commits():
-        count_array[commit.commit_time_tz().weekday()] += 1
-    figure = mpplot.figure()
-    plot = figure.add_subplot(111)
-    plot.bar(range(len(count_array)), count_array)
-    figure.tight_layout()
-    mpplot.xticks(range(len(count_array)),
-                  ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'])
-    return figure
+def total_lines(hammer, **kwargs):
+    return _plot_totals(hammer, 'line-count', 'line_counts', **kwargs)
+
+
+def total_tests(hammer, **kwargs):
+    return _plot_totals(hammer, 'test-count', 'test_counts', **kwargs)
+
+
+def lines_per_author(hammer, **kwargs):
+    return _plot_totals_per_author(hammer, 'line-author-count', 'line_counts', **kwargs)
+
+
+def tests_per_author(hammer, **kwargs):
+    return _plot_totals_per_author(hammer, 'test-author-count', 'test_counts', **kwargs)
+
+
+def commits_per_hour(hammer, headless=False, **kwargs):
+    return _render_histogram(hammer.cached_result('time-of-day', lambda: hammer.commit_counts_per_hour(**kwargs),
+                                                  **kwargs), headless=headless)
+
+
+def commits_per_weekday(hammer, headless=False, **kwargs):
+    return _render_histogram(hammer.cached_result('day-of-week', lambda: hammer.commit_counts_per_weekday(**kwargs),
+                                                  **kwargs), labels=_weekday_labels, headless=headless)
@@ -0,0 +1,70 @@
+# Copyright 2019 Jaakko Kangasharju
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .graph import _author_count_arrays, _author_figure_size, _collect_count_series, _pixel_width, \
+    _render_histogram, _render_totals, _render_totals_per_author, _total_counts, _weekday_labels
+from .table import _summary_text
+
+
+def _render_to_file(render_function, args, kwargs, path):
+    figure = render_function(*args, headless=True, **kwargs)
+    figure.savefig(path)
+    return path
+
+
+def _graph_jobs(series, head_commit, hour_counts, weekday_counts):
+    jobs = []
+    if series.max_line_counts:
+        line_count_array, line_labels = _author_count_arrays(series.line_counts, series.max_line_counts,
+                                                             head_commit.line_counts, 0, True)
+        jobs.append(('line-count', _render_totals, (series.dates, _total_counts(series.line_counts)), {}))
+        jobs.append(('line-author-count', _render_totals_per_author, (series.dates, line_count_array, line_labels),
+                     {}))
+    if series.max_test_counts:
+        test_count_array, test_labels = _author_count_arrays(series.test_counts, series.max_test_counts,
+                                                             head_commit.test_counts, 0, True)
+        jobs.append(('test-count', _render_totals, (series.dates, _total_counts(series.test_counts)), {}))
+        jobs.append(('test-author-count', _render_totals_per_author, (series.dates, test_count_array, test_labels),
+                     {}))
+    jobs.append(('day-of-week', _render_histogram, (weekday_counts,), {'labels': _weekday_labels}))
+    jobs.append(('time-of-day', _render_histogram, (hour_counts,), {}))
+    return jobs
+
+
+def write_report(hammer, output_directory, image_format='png', processes=1, **kwargs):
+    os.makedirs(output_directory, exist_ok=True)
+    commit_counts = {}
+    for commit in hammer.iter_individual_commits(**kwargs):
+        commit_counts[commit.author] = commit_counts.get(commit.author, 0) + 1
+    hour_counts = hammer.commit_counts_per_hour(**kwargs)
+    weekday_counts = hammer.commit_counts_per_weekday(**kwargs)
+    series = _collect_count_series(hammer, _pixel_width(_author_figure_size), **kwargs)
+    head_commit = hammer.head_commit(**kwargs)
+    summary_path = os.path.join(output_directory, 'summary.txt')
+    with open(summary_path, 'w') as summary_file:
+        summary_file.write(_summary_text(commit_counts, head_commit.line_counts, head_commit.test_counts))
+    jobs = [(render_function, args, render_kwargs,
+             os.path.join(output_directory, '{}.{}'.format(name, image_format)))
+            for name, render_function, args, render_kwargs in
+            _graph_jobs(series, head_commit, hour_counts, weekday_counts)]
+    if processes > 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [executor.submit(_render_to_file, *job) for job in jobs]
+            graph_paths = [future.result() for future in futures]
+    else:
+        graph_paths = [_render_to_file(*job) for job in jobs]
+    return [summary_path] + graph_paths
@@ -27,32 +27,48 @@ def _make_table(columns):
     return table
 
 
-def commit_count_table(hammer):
+def _count_table(column, counts):
+    table = _make_table(['Author', column])
+    for author, count in counts.items():
+        table.append_row([author.name, count])
+    table.sort(column, reverse=True)
+    return table
+
+
+def _commit_counts(commits):
     commit_counts = {}
-    for commit in hammer.iter_individual_commits():
+    for commit in commits:
         commit_counts[commit.author] = commit_counts.get(commit.author, 0) + 1
-    table = _make_table(['Author', 'Commits'])
-    for author, commit_count in commit_counts.items():
-        table.append_row([author.name, commit_count])
-    table.sort('Commits', reverse=True)
-    return table
+    return commit_counts
 
 
-def line_count_table(hammer):
-    head_commit = hammer.head_commit()
-    table = _make_table(['Author', 'Lines'])
-    for author, line_count in head_commit.line_counts.items():
-        table.append_row([author.name, line_count])
-    table.sort('Lines', reverse=True)
-    return table
+def commit_count_table(hammer, **kwargs):
+    return _count_table('Commits', _commit_counts(hammer.iter_individual_commits(**kwargs)))
+
+
+def line_count_table(hammer, **kwargs):
+    return _count_table('Lines', hammer.head_commit(**kwargs).line_counts)
 
 
-def test_count_table(hammer):
-    head_commit = hammer.head_commit()
+def test_count_table(hammer, **kwargs):
+    head_commit = hammer.head_commit(**kwargs)
     if head_commit.test_counts:
-        table = _make_table(['Author', 'Tests'])
-        for author, test_count in head_commit.test_counts.items():
-            table.append_row([author.name, test_count])
-        table.sort('Tests', reverse=True)
-        return table
+        return _count_table('Tests', head_commit.test_counts)
     return None
+
+
+def _summary_text(commit_counts, line_counts, test_counts):
+    tables = [_count_table('Commits', commit_counts), _count_table('Lines', line_counts)]
+    if test_counts:
+        tables.append(_count_table('Tests', test_counts))
+    return '\n\n'.join(str(table) for table in tables) + '\n'
+
+
+def _compute_summary_text(hammer, **kwargs):
+    head_commit = hammer.head_commit(**kwargs)
+    return _summary_text(_commit_counts(hammer.iter_individual_commits(**kwargs)), head_commit.line_counts,
+                         head_commit.test_counts)
+
+
+def summary_text(hammer, **kwargs):
+    return hammer.cached_result('summary', lambda: _compute_summary_text(hammer, **kwargs), **kwargs)
@@ -0,0 +1,255 @@
+# Copyright 2019 Jaakko Kangasharju
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import sessionmaker
+
+from .commitrecord import _as_utc
+from .dbtypes import Author, AuthorCommitDetail, Commit, ProjectRepository
+from .storage import create_storage_engine
+
+_default_max_loaded_commits = 100000
+_commits_per_bucket = 64
+_prefix_digits_per_level = 2
+_hexsha_length = 40
+_max_buckets_per_query = 500
+_digest_modulus = 1 << 64
+_chunk_size = 10000
+_commit_attributes = ['author_name', 'added_lines', 'deleted_lines', 'commit_time', 'commit_time_utc_offset',
+                      'has_snapshot']
+_count_attributes = ['line_counts', 'test_counts']
+
+
+def _canonical_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _row_digest(row):
+    data = '\x1f'.join(_canonical_value(value) for value in row).encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+
+def _next_prefix(prefix):
+    next_value = int(prefix, 16) + 1
+    return '{:0{}x}'.format(next_value, len(prefix)) if next_value < 16 ** len(prefix) else None
+
+
+def _prefix_ranges(prefixes):
+    ranges = []
+    for prefix in sorted(prefixes):
+        if ranges and ranges[-1][1] == prefix:
+            ranges[-1][1] = _next_prefix(prefix)
+        else:
+            ranges.append([prefix, _next_prefix(prefix)])
+    return ranges
+
+
+def _iter_prefix_chunks(prefixes):
+    if prefixes is None:
+        yield None
+    else:
+        for index in range(0, len(prefixes), _max_buckets_per_query):
+            yield prefixes[index:index + _max_buckets_per_query]
+
+
+class _ProjectDatabase:
+
+    def __init__(self, project_name, database_url):
+        self.project_name = project_name
+        self._engine, _ = create_storage_engine(database_url)
+        self._Session = sessionmaker(bind=self._engine)
+        self._session = None
+
+    def _filter(self, query, prefixes=None):
+        repository_ids = select(ProjectRepository.repository_id).where(
+            ProjectRepository.project_name == self.project_name)
+        query = query.filter(Commit.repository_id.in_(repository_ids))
+        if prefixes is not None:
+            query = query.filter(or_(*[and_(Commit.hexsha >= start, Commit.hexsha < end) if end else
+                                       Commit.hexsha >= start for start, end in _prefix_ranges(prefixes)]))
+        return query
+
+    def _execute(self, query):
+        result = self._session.connection().execution_options(stream_results=True).execute(query.statement)
+        for rows in result.partitions(_chunk_size):
+            yield from rows
+
+    def _iter_commit_rows(self, prefixes=None):
+        query = self._session.query(Commit.hexsha, Author.canonical_name, Commit.added_lines, Commit.deleted_lines,
+                                    Commit.commit_time, Commit.commit_time_utc_offset, Commit.has_snapshot).join(
+            Author, Commit.author_id == Author.id)
+        for row in self._execute(self._filter(query, prefixes)):
+            yield row[:4] + (_as_utc(row[4]),) + tuple(row[5:])
+
+    def _iter_count_rows(self, prefixes=None):
+        query = self._session.query(Commit.hexsha, Author.canonical_name, AuthorCommitDetail.line_count,
+                                    AuthorCommitDetail.test_count).select_from(AuthorCommitDetail).join(
+            Commit, AuthorCommitDetail.commit_id == Commit.id).join(Author, AuthorCommitDetail.author_id == Author.id)
+        for hexsha, author_name, line_count, test_count in self._execute(self._filter(query, prefixes)):
+            yield hexsha, author_name, line_count, test_count or 0
+
+    def open(self):
+        self._session = self._Session()
+
+    def close(self):
+        self._session.close()
+
+    def commit_count(self):
+        return self._filter(self._session.query(func.count(Commit.id))).scalar()
+
+    def bucket_digests(self, prefix_length, parent_prefixes=None):
+        buckets = {}
+        for prefixes in _iter_prefix_chunks(parent_prefixes):
+            bucket_prefix = func.substr(Commit.hexsha, 1, prefix_length)
+            query = self._filter(self._session.query(bucket_prefix, func.count(Commit.id)), prefixes)
+            for prefix, commit_count in query.group_by(bucket_prefix):
+                buckets[prefix] = [commit_count, 0]
+            for row in self._iter_commit_rows(prefixes):
+                bucket = buckets.setdefault(row[0][:prefix_length], [0, 0])
+                bucket[1] = (bucket[1] + _row_digest(('commit',) + row)) % _digest_modulus
+            for row in self._iter_count_rows(prefixes):
+                bucket = buckets.setdefault(row[0][:prefix_length], [0, 0])
+                bucket[1] = (bucket[1] + _row_digest(('count',) + row)) % _digest_modulus
+        return buckets
+
+    def load_commits(self, prefixes):
+        commits = {}
+        for row in self._iter_commit_rows(prefixes):
+            commit = dict(zip(_commit_attributes, row[1:]))
+            commit['line_counts'] = {}
+            commit['test_counts'] = {}
+            commits[row[0]] = commit
+        for hexsha, author_name, line_count, test_count in self._iter_count_rows(prefixes):
+            commit = commits.get(hexsha)
+            if commit is not None:
+                commit['line_counts'][author_name] = line_count
+                if test_count:
+                    commit['test_counts'][author_name] = test_count
+        return commits
+
+
+def _select_counts(counts, authors):
+    return {author: count for author, count in counts.items() if author in authors}
+
+
+def _iter_commit_differences(hexsha, expected_commit, actual_commit):
+    if actual_commit is None:
+        yield hexsha, 'hexsha', hexsha, None
+    elif expected_commit is None:
+        yield hexsha, 'hexsha', None, hexsha
+    else:
+        for attribute in _commit_attributes:
+            if expected_commit[attribute] != actual_commit[attribute]:
+                yield hexsha, attribute, expected_commit[attribute], actual_commit[attribute]
+        for attribute in _count_attributes:
+            expected_counts = expected_commit[attribute]
+            actual_counts = actual_commit[attribute]
+            authors = {author for author in set(expected_counts) | set(actual_counts)
+                       if expected_counts.get(author) != actual_counts.get(author)}
+            if authors:
+                yield (hexsha, attribute, _select_counts(expected_counts, authors),
+                       _select_counts(actual_counts, authors))
+
+
+def _group_buckets(prefixes, bucket_sizes, max_loaded_commits):
+    group = []
+    group_size = 0
+    for prefix in prefixes:
+        is_group_full = group_size + bucket_sizes[prefix] > max_loaded_commits or len(group) >= _max_buckets_per_query
+        if group and is_group_full:
+            yield group
+            group = []
+            group_size = 0
+        group.append(prefix)
+        group_size += bucket_sizes[prefix]
+    if group:
+        yield group
+
+
+class DatabaseVerifier:
+
+    def __init__(self, expected_project, expected_database_url, project, database_url,
+                 max_loaded_commits=_default_max_loaded_commits):
+        self._expected = _ProjectDatabase(expected_project, expected_database_url)
+        self._actual = _ProjectDatabase(project, database_url)
+        self._max_loaded_commits = max_loaded_commits
+        self.commit_count = 0
+        self.bucket_count = 0
+        self.differing_bucket_count = 0
+        self.difference_count = 0
+
+    def _bucket_digests(self, prefix_length, parent_prefixes):
+        start_time = datetime.datetime.now()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            expected_future = executor.submit(self._expected.bucket_digests, prefix_length, parent_prefixes)
+            actual_future = executor.submit(self._actual.bucket_digests, prefix_length, parent_prefixes)
+            expected_buckets = expected_future.result()
+            actual_buckets = actual_future.result()
+        print('Digest time {} (prefix length {})'.format(datetime.datetime.now() - start_time, prefix_length))
+        return expected_buckets, actual_buckets
+
+    def _iter_differing_levels(self):
+        parent_prefixes = None
+        prefix_length = 0
+        while parent_prefixes is None or parent_prefixes:
+            prefix_length = min(prefix_length + _prefix_digits_per_level, _hexsha_length)
+            expected_buckets, actual_buckets = self._bucket_digests(prefix_length, parent_prefixes)
+            prefixes = set(expected_buckets) | set(actual_buckets)
+            self.bucket_count += len(prefixes)
+            differing_prefixes = []
+            bucket_sizes = {}
+            expanded_prefixes = []
+            for prefix in sorted(prefixes):
+                expected_bucket = expected_buckets.get(prefix, [0, 0])
+                actual_bucket = actual_buckets.get(prefix, [0, 0])
+                if expected_bucket == actual_bucket:
+                    continue
+                bucket_size = max(expected_bucket[0], actual_bucket[0])
+                if bucket_size <= _commits_per_bucket or prefix_length == _hexsha_length:
+                    differing_prefixes.append(prefix)
+                    bucket_sizes[prefix] = bucket_size
+                else:
+                    expanded_prefixes.append(prefix)
+            if differing_prefixes:
+                yield prefix_length, differing_prefixes, bucket_sizes
+            parent_prefixes = expanded_prefixes
+
+    def iter_differences(self):
+        self._expected.open()
+        self._actual.open()
+        try:
+            self.commit_count = self._expected.commit_count()
+            for _, differing_prefixes, bucket_sizes in self._iter_differing_levels():
+                self.differing_bucket_count += len(differing_prefixes)
+                for prefixes in _group_buckets(differing_prefixes, bucket_sizes, self._max_loaded_commits):
+                    expected_commits = self._expected.load_commits(prefixes)
+                    actual_commits = self._actual.load_commits(prefixes)
+                    for hexsha in sorted(set(expected_commits) | set(actual_commits)):
+                        for difference in _iter_commit_differences(hexsha, expected_commits.get(hexsha),
+                                                                    actual_commits.get(hexsha)):
+                            self.difference_count += 1
+                            yield difference
+        finally:
+            self._expected.close()
+            self._actual.close()
@@ -28,5 +28,8 @@ setuptools.setup(
         'python-dateutil',
         'globber',
         'beautifultable'
-    ]
+    ],
+    extras_require={
+        'arrow': ['pyarrow']
+    }
 )
@@ -7,3 +7,24 @@ from .test_update import HammerUpdateTest
 from .test_shallow_repository import HammerShallowTest
 from .test_multiple_repositories import HammerMultipleRepositoriesTest
 from .test_limited_repository import HammerLimitedTest
+from .test_sparse_repository import HammerSparseTest
+from .test_pipeline import PipelineTest
+from .test_skipped_files import HammerSkippedFilesTest, HammerSkippedAttributesTest
+from .test_shared_repository import HammerSharedRepositoryTest, HammerSharedUpdateTest
+from .test_server import HammerServerTest
+from .test_query import HammerQueryTest
+from .test_author_timeline import HammerAuthorTimelineTest
+from .test_export import HammerExportTest
+from .test_graph import HammerGraphTest
+from .test_report import HammerReportTest
+from .test_storage import HammerStorageTest
+from .test_verify import HammerVerifyTest
+from .test_plan import HammerPlanTest
+from .test_raw_diff import HammerRawDiffTest
+from .test_tree_listing import HammerTreeListingTest
+from .test_blame import HammerBlameTest
+from .test_bounded_memory import HammerBoundedMemoryTest
+from .test_branches import HammerBranchTest
+from .test_shards import HammerShardTest
+from .test_result_cache import HammerResultCacheTest
+from .test_mailmap import HammerMailmapTest
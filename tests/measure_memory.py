@@ -0,0 +1,21 @@
+import gc
+import sys
+import tracemalloc
+
+from githammer import Hammer
+
+if len(sys.argv) < 3:
+    sys.exit('Usage: {} <project> <database URL>'.format(sys.argv[0]))
+
+gc.collect()
+tracemalloc.start()
+hammer = Hammer(sys.argv[1], database_url=sys.argv[2])
+gc.collect()
+memory_used, memory_peak = tracemalloc.get_traced_memory()
+tracemalloc.stop()
+
+commit_count = len(hammer._shas_to_commits)
+count_entries = sum(len(commit.line_counts) + len(commit.test_counts) for commit in hammer._shas_to_commits.values())
+print('Commits: {}, count entries: {}'.format(commit_count, count_entries))
+print('Memory after load: {} bytes ({:.0f} bytes per commit)'.format(memory_used, memory_used / commit_count))
+print('Peak memory during load: {} bytes ({:.0f} bytes per commit)'.format(memory_peak, memory_peak / commit_count))
@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from githammer import Hammer
+
+repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+package_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+repository_path = os.path.join(package_directory, 'tests', 'data', 'repository')
+configuration_path = os.path.join(package_directory, 'tests', 'data', 'repo-config.json')
+heavy_modules = ['sqlalchemy', 'git', 'dateutil.parser', 'beautifultable', 'matplotlib', 'matplotlib.pyplot',
+                 'http.server', 'pyarrow']
+
+with tempfile.TemporaryDirectory(prefix='git-hammer-') as working_directory:
+    database_url = 'sqlite:///' + os.path.join(working_directory, 'startup.sqlite')
+    Hammer('startup', database_url=database_url).add_repository(repository_path, configuration_path)
+    commands = [
+        ['--help'],
+        ['list-projects'],
+        ['list-sources', repository_path, '-c', configuration_path],
+        ['summary', 'startup'],
+        ['graph', 'startup', 'line-count', '-o', os.path.join(working_directory, 'graph.png')],
+        ['export', 'startup', os.path.join(working_directory, 'export')]
+    ]
+    environment = dict(os.environ, DATABASE_URL=database_url, PYTHONPATH=package_directory)
+    for command in commands:
+        times = []
+        for _ in range(repetitions):
+            start_time = time.perf_counter()
+            process = subprocess.run([sys.executable, '-X', 'importtime', '-m', 'githammer'] + command,
+                                     cwd=working_directory, env=environment, stdout=subprocess.DEVNULL,
+                                     stderr=subprocess.PIPE, universal_newlines=True, check=True)
+            times.append(time.perf_counter() - start_time)
+        imported_modules = {line.split('|')[-1].strip() for line in process.stderr.splitlines()
+                            if line.startswith('import time:')}
+        loaded = [module for module in heavy_modules if module in imported_modules]
+        print('{:<14} {:>7.3f} s  loads: {}'.format(command[0], min(times), ', '.join(loaded) or '-'))
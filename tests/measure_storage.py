@@ -0,0 +1,92 @@
+import datetime
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+
+from githammer.dbtypes import Author, AuthorCommitDetail, Base, Commit, Repository
+from githammer.storage import create_storage_engine
+
+commit_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+commits_per_transaction = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+author_count = 40
+authors_per_commit = 10
+package_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+repository_path = os.path.join(package_directory, 'tests', 'data', 'repository')
+
+
+def write_commits(Session, storage, author_ids, repository_id):
+    start_time = datetime.datetime(2019, 1, 1)
+    with storage.bulk_load():
+        session = Session()
+        for index in range(commit_count):
+            commit = Commit(hexsha='{:040x}'.format(index), author_id=author_ids[index % author_count],
+                            added_lines=index % 100, deleted_lines=index % 10,
+                            commit_time=start_time + datetime.timedelta(hours=index), commit_time_utc_offset=0,
+                            parent_ids=['{:040x}'.format(index - 1)] if index else [], repository_id=repository_id)
+            session.add(commit)
+            for author_offset in range(authors_per_commit):
+                session.add(AuthorCommitDetail(author_id=author_ids[(index + author_offset) % author_count],
+                                               commit=commit, line_count=index + author_offset))
+            if (index + 1) % commits_per_transaction == 0:
+                session.commit()
+        session.commit()
+        session.close()
+
+
+def read_repeatedly(Session, stop, latencies, failures):
+    while not stop.is_set():
+        start_time = time.perf_counter()
+        session = Session()
+        try:
+            session.query(Commit.author_id, func.count(Commit.id)).group_by(Commit.author_id).all()
+            latencies.append(time.perf_counter() - start_time)
+        except Exception:
+            failures.append(time.perf_counter() - start_time)
+        finally:
+            session.close()
+        time.sleep(0.005)
+
+
+def measure(tuned, working_directory):
+    database_url = 'sqlite:///' + os.path.join(working_directory, 'storage-{}.sqlite'.format(tuned))
+    engine, storage = create_storage_engine(database_url, tuned=tuned)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    authors = [Author(canonical_name='Author {} <a{}@example.com>'.format(index, index)) for index in
+               range(author_count)]
+    repository = Repository(repository_path=repository_path,
+                            configuration_file_path=os.path.join(repository_path, 'git-hammer-config.json'))
+    session.add_all(authors + [repository])
+    session.commit()
+    author_ids = [author.id for author in authors]
+    repository_id = repository.id
+    session.close()
+
+    stop = threading.Event()
+    latencies = []
+    failures = []
+    reader = threading.Thread(target=read_repeatedly, args=(Session, stop, latencies, failures))
+    reader.start()
+    start_time = time.perf_counter()
+    write_commits(Session, storage, author_ids, repository_id)
+    write_time = time.perf_counter() - start_time
+    stop.set()
+    reader.join()
+    latencies.sort()
+    print('{:<8} write {:>8.0f} commits/s   read p50 {:>7.2f} ms  p95 {:>7.2f} ms  max {:>8.2f} ms  '
+          'reads {:>5}  failed {}'.format('tuned' if tuned else 'default', commit_count / write_time,
+                                          statistics.median(latencies) * 1000,
+                                          latencies[int(len(latencies) * 0.95)] * 1000, latencies[-1] * 1000,
+                                          len(latencies), len(failures)))
+
+
+with tempfile.TemporaryDirectory(prefix='git-hammer-') as directory:
+    measure(False, directory)
+    measure(True, directory)
@@ -0,0 +1,64 @@
+import datetime
+import os
+
+import git
+
+from .hammer_test import HammerTest
+
+
+class HammerAuthorTimelineTest(HammerTest):
+
+    def _expected_timeline(self, hammer, author_name):
+        timeline = []
+        previous_counts = (0, 0)
+        for commit in hammer.iter_commits():
+            counts = (sum(count for author, count in commit.line_counts.items() if author.name == author_name),
+                      sum(count for author, count in commit.test_counts.items() if author.name == author_name))
+            if counts != previous_counts:
+                timeline.append((commit.commit_time,) + counts)
+                previous_counts = counts
+        return timeline
+
+    def _assert_timelines_match(self, hammer):
+        for author_name in ['Author A', 'Author B', 'Author C']:
+            self.assertEqual(hammer.author_timeline(author_name), self._expected_timeline(hammer, author_name))
+
+    def setUp(self):
+        super().setUp()
+        self.hammer.add_repository(os.path.join(self.current_directory, 'data', 'repository'),
+                                   os.path.join(self.current_directory, 'data', 'repo-config.json'))
+
+    def test_timeline_has_only_changes(self):
+        timeline = self.hammer.author_timeline('Author C')
+        self.assertEqual(timeline, [
+            (datetime.datetime(2018, 1, 5, 11, 22, 33, tzinfo=datetime.timezone.utc), 2, 1)
+        ])
+
+    def test_timeline_matches_full_history(self):
+        self._assert_timelines_match(self.hammer)
+
+    def test_timeline_matches_full_history_for_multiple_repositories(self):
+        self.hammer.add_repository(os.path.join(self.current_directory, 'data', 'subrepository'))
+        self._assert_timelines_match(self.hammer)
+
+    def test_timeline_is_rebuilt_when_loading(self):
+        hammer = self._make_hammer('test')
+        self.assertEqual(hammer._author_history, {})
+        self._assert_timelines_match(hammer)
+
+    def test_timeline_is_extended_by_update(self):
+        other_hammer = self._make_hammer('otherTest',
+                                         database_url='sqlite:///' + self.working_directory.name + '/other.sqlite')
+        git_repository = git.Repo.clone_from(os.path.join(self.current_directory, 'data', 'repository'),
+                                             os.path.join(self.working_directory.name, 'worktree'),
+                                             branch='old-state', single_branch=True)
+        other_hammer.add_repository(git_repository.working_tree_dir)
+        self._assert_timelines_match(other_hammer)
+        git_repository.remote().fetch('+refs/heads/master:refs/remotes/origin/master')
+        git_repository.create_head('master', git_repository.remote().refs.master)
+        git_repository.heads.master.checkout()
+        other_hammer.update_data()
+        self._assert_timelines_match(other_hammer)
+
+    def test_unknown_author_has_empty_timeline(self):
+        self.assertEqual(self.hammer.author_timeline('Nobody'), [])
@@ -0,0 +1,42 @@
+import os
+
+import git
+
+from githammer.gitreader import iter_blame_counts
+
+from .hammer_test import HammerTest
+
+
+class HammerBlameTest(HammerTest):
+
+    def setUp(self):
+        super().setUp()
+        self.git_repository = git.Repo(os.path.join(self.current_directory, 'data', 'repository'))
+        self.commit = self.git_repository.commit(self._main_repo_head_commit_hexsha)
+        self.paths = [item.path for item in self.commit.tree.traverse() if item.type == 'blob']
+
+    def _gitpython_blame(self, path):
+        blame = {}
+        for commit, lines in self.git_repository.blame(self.commit, path, w=True):
+            author_lines = blame.setdefault('{} <{}>'.format(commit.author.name, commit.author.email), [])
+            author_lines.extend(line.strip().decode('utf-8', 'ignore') if type(line) is bytes else line for line in lines)
+        return blame
+
+    def test_line_counts_match_gitpython(self):
+        for path in self.paths:
+            counts = {}
+            for blame in iter_blame_counts(self.git_repository, self.commit.hexsha, path):
+                self.assertIsNone(blame.lines)
+                counts[blame.author] = counts.get(blame.author, 0) + blame.line_count
+            expected = {author: len(lines) for author, lines in self._gitpython_blame(path).items()}
+            self.assertEqual(counts, expected, path)
+
+    def test_kept_lines_match_gitpython(self):
+        for path in self.paths:
+            lines = {}
+            for blame in iter_blame_counts(self.git_repository, self.commit.hexsha, path, keep_lines=True):
+                self.assertEqual(blame.line_count, len(blame.lines))
+                lines.setdefault(blame.author, []).extend(blame.lines)
+            expected = self._gitpython_blame(path)
+            self.assertEqual({author: sorted(author_lines) for author, author_lines in lines.items()},
+                             {author: sorted(author_lines) for author, author_lines in expected.items()}, path)
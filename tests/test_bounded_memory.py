@@ -0,0 +1,83 @@
+import os
+
+import git
+
+from githammer import DatabaseVerifier, Hammer
+from githammer.frontier import CountFrontier
+
+from .hammer_test import HammerTest
+
+
+class _Commit:
+
+    def __init__(self, hexsha, parent_ids, has_snapshot=True):
+        self.hexsha = hexsha
+        self.parent_ids = parent_ids
+        self.has_snapshot = has_snapshot
+
+
+class HammerBoundedMemoryTest(HammerTest):
+
+    def _add_repository(self, hammer, repository_path=None):
+        hammer.add_repository(repository_path or os.path.join(self.current_directory, 'data', 'repository'),
+                              os.path.join(self.current_directory, 'data', 'repo-config.json'))
+
+    def setUp(self):
+        super().setUp()
+        self.bounded_database_url = 'sqlite:///' + self.working_directory.name + '/bounded.sqlite'
+        self.bounded_hammer = Hammer('test', self.bounded_database_url, bounded_memory=True)
+
+    def test_bounded_processing_stores_same_data(self):
+        self._add_repository(self.hammer)
+        self._add_repository(self.bounded_hammer)
+        verifier = DatabaseVerifier('test', self.database_url, 'test', self.bounded_database_url)
+        self.assertEqual(list(verifier.iter_differences()), [])
+        self.assertEqual(verifier.commit_count, 6)
+
+    def test_processed_counts_are_evicted_and_reloaded(self):
+        self._add_repository(self.hammer)
+        self._add_repository(self.bounded_hammer)
+        commit = self.bounded_hammer._shas_to_commits[self._main_repo_second_commit_hexsha]
+        self.assertTrue(commit.has_evicted_counts)
+        expected_commit = self._fetch_commit(self._main_repo_second_commit_hexsha)
+        self.assertEqual({author.canonical_name: count for author, count in commit.line_counts.items()},
+                         {author.canonical_name: count for author, count in expected_commit.line_counts.items()})
+        self.assertFalse(commit.has_evicted_counts)
+
+    def test_queries_match_unbounded_hammer(self):
+        self._add_repository(self.hammer)
+        self._add_repository(self.bounded_hammer)
+        for hammer in [self.bounded_hammer, Hammer('test', self.bounded_database_url, bounded_memory=True)]:
+            self.assertEqual([(commit.commit_time, commit.line_counts, commit.test_counts)
+                              for commit in hammer.iter_commits()],
+                             [(commit.commit_time, commit.line_counts, commit.test_counts)
+                              for commit in self.hammer.iter_commits()])
+            author = self._fetch_commit(self._main_repo_initial_commit_hexsha).author
+            self.assertEqual(hammer.author_timeline(author.canonical_name),
+                             self.hammer.author_timeline(author.canonical_name))
+
+    def test_bounded_update_matches_full_processing(self):
+        repository_path = os.path.join(self.working_directory.name, 'worktree')
+        git_repository = git.Repo.clone_from(os.path.join(self.current_directory, 'data', 'repository'),
+                                             repository_path, branch='old-state', single_branch=True)
+        self._add_repository(self.bounded_hammer, repository_path)
+        git_repository.remote().fetch('+refs/heads/master:refs/remotes/origin/master')
+        git_repository.create_head('master', git_repository.remote().refs.master)
+        git_repository.heads.master.checkout()
+        Hammer('test', self.bounded_database_url, bounded_memory=True).update_data()
+        self._add_repository(self.hammer, repository_path)
+        verifier = DatabaseVerifier('test', self.database_url, 'test', self.bounded_database_url)
+        self.assertEqual(list(verifier.iter_differences()), [])
+
+    def test_frontier_keeps_snapshot_ancestors_of_pending_commits(self):
+        evicted = []
+        commits = {}
+        frontier = CountFrontier(commits, {'a': 1, 'b': 2, 'c': 1}, lambda commit: evicted.append(commit.hexsha))
+        for commit in [_Commit('a', []), _Commit('b', ['a'], has_snapshot=False), _Commit('c', ['b']),
+                       _Commit('d', ['b']), _Commit('e', ['c'])]:
+            commits[commit.hexsha] = commit
+            frontier.add(commit)
+            if commit.hexsha == 'c':
+                self.assertEqual(evicted, [])
+        self.assertEqual(evicted, ['a', 'd', 'c', 'e'])
+        self.assertEqual(frontier.retained_count, 0)
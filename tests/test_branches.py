@@ -0,0 +1,120 @@
+import datetime
+import os
+
+import git
+
+from githammer import BranchNotFoundError, DatabaseVerifier
+
+from .hammer_test import HammerTest
+
+
+class HammerBranchTest(HammerTest):
+
+    def _clone_branch(self, branch):
+        repository_path = os.path.join(self.working_directory.name, branch)
+        git.Repo.clone_from(self.repository_path, repository_path, branch=branch, single_branch=True)
+        return repository_path
+
+    def _counts_by_name(self, counts):
+        return {author.canonical_name: count for author, count in counts.items()}
+
+    def setUp(self):
+        super().setUp()
+        self.repository_path = os.path.join(self.current_directory, 'data', 'repository')
+        self.hammer.add_repository(self.repository_path, branches=['feature'])
+
+    def test_shared_commits_are_processed_once(self):
+        commits = list(self.hammer.iter_individual_commits())
+        self.assertEqual(len(commits), 6)
+        self.assertEqual(len({commit.hexsha for commit in commits}), 6)
+
+    def test_default_chain_follows_checked_out_branch(self):
+        self.assertEqual(len(list(self.hammer.iter_commits())), 5)
+
+    def test_branch_chain_follows_tracked_branch(self):
+        self.assertEqual(len(list(self.hammer.iter_commits(branch='feature'))), 4)
+        self.assertEqual(list(self.hammer.iter_commits(branch='unknown')), [])
+
+    def test_branch_counts_match_processing_branch_alone(self):
+        feature_hammer = self._make_hammer('feature',
+                                           database_url='sqlite:///' + self.working_directory.name + '/feature.sqlite')
+        feature_hammer.add_repository(self._clone_branch('feature'))
+        self.assertEqual([self._counts_by_name(commit.line_counts)
+                          for commit in self.hammer.iter_commits(branch='feature')],
+                         [self._counts_by_name(commit.line_counts) for commit in feature_hammer.iter_commits()])
+        self.assertEqual(self._counts_by_name(self.hammer.head_commit(branch='feature').line_counts),
+                         self._counts_by_name(feature_hammer.head_commit().line_counts))
+        author = feature_hammer.head_commit().line_counts.popitem()[0].canonical_name
+        self.assertEqual(self.hammer.author_timeline(author, branch='feature'),
+                         feature_hammer.author_timeline(author))
+
+    def test_default_chain_matches_processing_without_branches(self):
+        other_database_url = 'sqlite:///' + self.working_directory.name + '/other.sqlite'
+        self._make_hammer('test', database_url=other_database_url).add_repository(self.repository_path)
+        verifier = DatabaseVerifier('test', other_database_url, 'test', self.database_url)
+        self.assertEqual(list(verifier.iter_differences()), [])
+        other_hammer = self._make_hammer('test', database_url=other_database_url)
+        self.assertEqual([self._counts_by_name(commit.line_counts) for commit in self.hammer.iter_commits()],
+                         [self._counts_by_name(commit.line_counts) for commit in other_hammer.iter_commits()])
+
+    def test_branches_are_reloaded(self):
+        reloaded_hammer = self._make_hammer('test')
+        self.assertEqual(len(list(reloaded_hammer.iter_commits(branch='feature'))), 4)
+        self.assertEqual(self._counts_by_name(reloaded_hammer.head_commit(branch='feature').line_counts),
+                         self._counts_by_name(self.hammer.head_commit(branch='feature').line_counts))
+
+    def test_branch_can_be_added_to_existing_repository(self):
+        self.hammer.add_repository(self.repository_path, branches=['old-state'])
+        self.assertEqual(len(list(self.hammer.iter_commits(branch='old-state'))), 1)
+        self.assertEqual(len(list(self.hammer.iter_individual_commits())), 6)
+        self.assertEqual(len(list(self._make_hammer('test').iter_commits(branch='old-state'))), 1)
+
+    def test_update_follows_moved_branch(self):
+        repository_path = os.path.join(self.working_directory.name, 'worktree')
+        git_repository = git.Repo.clone_from(self.repository_path, repository_path, branch='old-state')
+        git_repository.create_head('release', HammerTest._main_repo_second_commit_hexsha)
+        release_database_url = 'sqlite:///' + self.working_directory.name + '/release.sqlite'
+        hammer = self._make_hammer('release', database_url=release_database_url)
+        hammer.add_repository(repository_path, branches=['release'])
+        self.assertEqual(len(list(hammer.iter_commits(branch='release'))), 2)
+        self.assertFalse(hammer.has_unprocessed_commits())
+        git_repository.heads.release.commit = HammerTest._main_repo_test_commit_hexsha
+        self.assertTrue(hammer.has_unprocessed_commits())
+        hammer.update_data()
+        self.assertFalse(hammer.has_unprocessed_commits())
+        self.assertEqual(len(list(hammer.iter_commits(branch='release'))), 4)
+        self.assertEqual(len(list(hammer.iter_commits())), 1)
+        reloaded_hammer = self._make_hammer('release', database_url=release_database_url)
+        self.assertEqual(len(list(reloaded_hammer.iter_commits(branch='release'))), 4)
+
+    def test_branch_moved_to_processed_commit_is_unprocessed(self):
+        repository_path = os.path.join(self.working_directory.name, 'worktree')
+        git_repository = git.Repo.clone_from(self.repository_path, repository_path)
+        git_repository.create_head('release', HammerTest._main_repo_second_commit_hexsha)
+        release_database_url = 'sqlite:///' + self.working_directory.name + '/release.sqlite'
+        hammer = self._make_hammer('release', database_url=release_database_url)
+        hammer.add_repository(repository_path, branches=['release'])
+        git_repository.heads.release.commit = HammerTest._main_repo_test_commit_hexsha
+        self.assertTrue(hammer.has_unprocessed_commits())
+        hammer.update_data()
+        self.assertFalse(hammer.has_unprocessed_commits())
+        self.assertEqual(len(list(hammer.iter_commits(branch='release'))), 4)
+
+    def test_unprocessed_branch_head_is_skipped(self):
+        repository_path = os.path.join(self.working_directory.name, 'worktree')
+        git.Repo.clone_from(self.repository_path, repository_path).create_head(
+            'release', HammerTest._main_repo_initial_commit_hexsha)
+        release_database_url = 'sqlite:///' + self.working_directory.name + '/release.sqlite'
+        hammer = self._make_hammer('release', database_url=release_database_url)
+        hammer.add_repository(repository_path, branches=['release'],
+                              earliest_date=datetime.datetime(2017, 12, 1, tzinfo=datetime.timezone.utc))
+        self.assertFalse(hammer.has_unprocessed_commits())
+        head_commit = hammer.head_commit(branch='release')
+        self.assertIsNone(head_commit.commit_time)
+        self.assertEqual(head_commit.line_counts, {})
+        with self.assertRaises(BranchNotFoundError):
+            hammer.head_commit(branch='unknown')
+
+    def test_unknown_branch_is_rejected(self):
+        with self.assertRaises(BranchNotFoundError):
+            self.hammer.add_repository(self.repository_path, branches=['no-such-branch'])
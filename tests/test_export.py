@@ -0,0 +1,93 @@
+import csv
+import datetime
+import os
+import subprocess
+import sys
+import unittest
+
+from githammer import export_project, Frequency
+from githammer.export import ExportFormatError
+
+from .hammer_test import HammerTest
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+class HammerExportTest(HammerTest):
+
+    def _read_csv(self, name):
+        with open(os.path.join(self.output_directory, name), newline='') as csv_file:
+            return list(csv.DictReader(csv_file))
+
+    def setUp(self):
+        super().setUp()
+        self.hammer.add_repository(os.path.join(self.current_directory, 'data', 'repository'),
+                                   os.path.join(self.current_directory, 'data', 'repo-config.json'))
+        self.output_directory = os.path.join(self.working_directory.name, 'export')
+
+    def test_commits_are_exported_to_csv(self):
+        commit_count, _ = export_project(self.hammer, self.output_directory, chunk_size=4)
+        rows = self._read_csv('commits.csv')
+        self.assertEqual(commit_count, 6)
+        self.assertEqual([row['hexsha'] for row in rows],
+                         [commit.hexsha for commit in self.hammer.iter_individual_commits()])
+        self.assertEqual(rows[0]['author'], 'Author A <a@example.com>')
+        self.assertEqual(rows[0]['commit_time'], '2017-11-22T07:22:33+00:00')
+        self.assertEqual(rows[0]['added_lines'], '14')
+
+    def test_author_counts_are_exported_to_csv(self):
+        _, count_row_count = export_project(self.hammer, self.output_directory, chunk_size=4)
+        rows = self._read_csv('author_counts.csv')
+        self.assertEqual(len(rows), count_row_count)
+        head_rows = [row for row in rows if row['hexsha'] == HammerExportTest._main_repo_head_commit_hexsha]
+        self.assertEqual({row['author']: int(row['line_count']) for row in head_rows},
+                         {author.canonical_name: count
+                          for author, count in self.hammer.head_commit().line_counts.items()})
+
+    def test_sampled_snapshots_are_exported(self):
+        export_project(self.hammer, self.output_directory, frequency=Frequency.yearly)
+        rows = self._read_csv('snapshot_counts.csv')
+        self.assertEqual(sorted({row['commit_time'] for row in rows}),
+                         [commit.commit_time.isoformat()
+                          for commit in self.hammer.iter_commits(frequency=Frequency.yearly)])
+
+    def test_filters_are_applied(self):
+        since = datetime.datetime(2018, 1, 1, tzinfo=datetime.timezone.utc)
+        commit_count, _ = export_project(self.hammer, self.output_directory, since=since, authors=['Author C'])
+        rows = self._read_csv('author_counts.csv')
+        self.assertEqual(commit_count, 1)
+        self.assertTrue(all(row['author'].startswith('Author C') for row in rows))
+
+    @unittest.skipUnless(pyarrow, 'pyarrow is not installed')
+    def test_commits_are_exported_to_parquet(self):
+        import pyarrow.parquet
+        export_project(self.hammer, self.output_directory, file_format='parquet', chunk_size=4)
+        table = pyarrow.parquet.read_table(os.path.join(self.output_directory, 'commits.parquet'))
+        self.assertEqual(table.num_rows, 6)
+        self.assertEqual(table.column('hexsha').to_pylist(),
+                         [commit.hexsha for commit in self.hammer.iter_individual_commits()])
+
+    @unittest.skipUnless(pyarrow, 'pyarrow is not installed')
+    def test_author_counts_are_exported_to_arrow(self):
+        import pyarrow.ipc
+        _, count_row_count = export_project(self.hammer, self.output_directory, file_format='arrow', chunk_size=4)
+        with pyarrow.ipc.open_file(os.path.join(self.output_directory, 'author_counts.arrow')) as reader:
+            table = reader.read_all()
+        self.assertEqual(table.num_rows, count_row_count)
+
+    def test_unknown_format_is_an_error(self):
+        with self.assertRaises(ExportFormatError):
+            export_project(self.hammer, self.output_directory, file_format='xml')
+
+    @unittest.skipIf(pyarrow, 'pyarrow is installed')
+    def test_missing_pyarrow_is_reported_by_command(self):
+        environment = dict(os.environ, DATABASE_URL=self.database_url)
+        process = subprocess.run([sys.executable, '-m', 'githammer', 'export', 'test', self.output_directory,
+                                  '--format', 'parquet'], cwd=os.path.dirname(self.current_directory),
+                                 env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        self.assertEqual(process.returncode, 1)
+        self.assertEqual(process.stderr.decode('utf-8').strip().splitlines()[-1],
+                         'Exporting to parquet requires pyarrow to be installed')
@@ -0,0 +1,51 @@
+import datetime
+import os
+
+import git
+
+from githammer.summary import lines_per_author, total_lines, commits_per_weekday
+from githammer.summary.graph import _collect_count_series
+
+from .hammer_test import HammerTest
+
+
+class HammerGraphTest(HammerTest):
+
+    def _make_many_author_repository(self, author_count):
+        repository_path = os.path.join(self.working_directory.name, 'authors')
+        repository = git.Repo.init(repository_path)
+        for index in range(author_count):
+            file_name = 'file{}.txt'.format(index)
+            with open(os.path.join(repository_path, file_name), 'w') as file:
+                file.write('line\n' * (index + 1))
+            repository.index.add([file_name])
+            actor = git.Actor('Author {}'.format(index), 'author{}@example.com'.format(index))
+            commit_date = datetime.datetime(2018, 1, 1, tzinfo=datetime.timezone.utc) + datetime.timedelta(days=index)
+            repository.index.commit('Commit {}'.format(index), author=actor, committer=actor,
+                                    author_date=commit_date.strftime('%Y-%m-%dT%H:%M:%S'),
+                                    commit_date=commit_date.strftime('%Y-%m-%dT%H:%M:%S'))
+        return repository_path
+
+    def test_headless_graph_is_saved(self):
+        self.hammer.add_repository(os.path.join(self.current_directory, 'data', 'repository'))
+        output_path = os.path.join(self.working_directory.name, 'lines.png')
+        for graph in [total_lines, lines_per_author, commits_per_weekday]:
+            graph(self.hammer, headless=True).savefig(output_path)
+            self.assertGreater(os.path.getsize(output_path), 0)
+
+    def test_commits_are_downsampled(self):
+        self.hammer.add_repository(self._make_many_author_repository(30))
+        series = _collect_count_series(self.hammer, 2)
+        first_date = datetime.datetime(2018, 1, 1, tzinfo=datetime.timezone.utc)
+        self.assertEqual(series.dates, [first_date, first_date + datetime.timedelta(days=15)])
+        self.assertEqual([sum(counts.values()) for counts in series.line_counts], [1, sum(range(1, 17))])
+        self.assertEqual({author.name: count for author, count in series.max_line_counts.items()},
+                         {'Author {}'.format(index): index + 1 for index in range(30)})
+
+    def test_tail_of_authors_is_folded(self):
+        self.hammer.add_repository(self._make_many_author_repository(30))
+        figure = lines_per_author(self.hammer, headless=True)
+        labels = [text.get_text() for text in figure.axes[0].get_legend().get_texts()]
+        self.assertEqual(len(labels), 25)
+        self.assertEqual(labels[0], 'Author 29')
+        self.assertEqual(labels[-1], 'Others')
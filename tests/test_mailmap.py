@@ -0,0 +1,37 @@
+import datetime
+import os
+
+import git
+
+from .hammer_test import HammerTest
+
+
+class HammerMailmapTest(HammerTest):
+
+    def _commit(self, file_name, content, actor, days):
+        with open(os.path.join(self.repository_path, file_name), 'w') as file:
+            file.write(content)
+        self.repository.index.add([file_name])
+        commit_date = (datetime.datetime(2018, 1, 1, tzinfo=datetime.timezone.utc) +
+                       datetime.timedelta(days=days)).strftime('%Y-%m-%dT%H:%M:%S')
+        self.repository.index.commit('Commit {}'.format(days), author=actor, committer=actor,
+                                     author_date=commit_date, commit_date=commit_date)
+
+    def setUp(self):
+        super().setUp()
+        self.repository_path = os.path.join(self.working_directory.name, 'mailmap')
+        self.repository = git.Repo.init(self.repository_path)
+        self._commit('old.txt', 'line\n' * 3, git.Actor('Old Name', 'old@x'), 0)
+        self._commit('.mailmap', 'New Name <new@x> Old Name <old@x>\n', git.Actor('New Name', 'new@x'), 1)
+        self.hammer.add_repository(self.repository_path)
+
+    def test_mailmap_aliases_are_stored(self):
+        hammer = self._make_hammer('test')
+        authors = list(hammer.iter_authors())
+        self.assertEqual([author.canonical_name for author in authors], ['New Name <new@x>'])
+        self.assertEqual(authors[0].aliases, ['Old Name <old@x>'])
+
+    def test_aliased_author_owns_lines(self):
+        line_counts = self._make_hammer('test').head_commit().line_counts
+        self.assertEqual({author.canonical_name: count for author, count in line_counts.items()},
+                         {'New Name <new@x>': 4})
@@ -33,3 +33,12 @@ class HammerMultipleProjectsTest(HammerTest):
         self._create_second_project()
         authors = list(self.otherHammer.iter_authors())
         self.assertEqual(len(authors), 1)
+
+    def test_projects_loaded_before_authors_were_added_share_authors(self):
+        database_url = 'sqlite:///' + self.working_directory.name + '/shared.sqlite'
+        first_hammer = self._make_hammer('first', database_url=database_url)
+        second_hammer = self._make_hammer('second', database_url=database_url)
+        first_hammer.add_repository(os.path.join(self.current_directory, 'data', 'repository'))
+        second_hammer.add_repository(os.path.join(self.current_directory, 'data', 'subrepository'))
+        self.assertEqual([author.id for author in first_hammer.iter_authors() if author.name == 'Author B'],
+                         [author.id for author in second_hammer.iter_authors()])
@@ -0,0 +1,57 @@
+import unittest
+
+from githammer.commitrecord import AuthorTable
+from githammer.dbtypes import Author
+from githammer.pipeline import Pipeline
+
+
+class PipelineTest(unittest.TestCase):
+    def setUp(self):
+        print()
+        print(self.id())
+
+    def test_items_pass_through_stages_in_order(self):
+        pipeline = Pipeline(2)
+        pipeline.add_source('numbers', lambda: range(100))
+        pipeline.add_stage('square', lambda x: x * x)
+        self.assertEqual(list(pipeline.run('collect')), [x * x for x in range(100)])
+
+    def test_statistics_are_collected_for_every_stage(self):
+        pipeline = Pipeline(2)
+        pipeline.add_source('numbers', lambda: range(10))
+        pipeline.add_stage('double', lambda x: 2 * x)
+        list(pipeline.run('collect'))
+        self.assertEqual([stage.name for stage in pipeline.stages], ['numbers', 'double', 'collect'])
+        self.assertEqual([stage.item_count for stage in pipeline.stages], [10, 10, 10])
+        self.assertEqual(pipeline.queue_depths(), [0, 0])
+
+    def test_stage_error_is_raised_in_consumer(self):
+        def fail_on_five(x):
+            if x == 5:
+                raise ValueError('five')
+            return x
+
+        pipeline = Pipeline(2)
+        pipeline.add_source('numbers', lambda: range(1000))
+        pipeline.add_stage('check', fail_on_five)
+        with self.assertRaises(ValueError):
+            list(pipeline.run('collect'))
+
+    def test_closing_consumer_stops_producers(self):
+        pipeline = Pipeline(1)
+        pipeline.add_source('numbers', lambda: iter(int, 1))
+        items = pipeline.run('collect')
+        self.assertEqual(next(items), 0)
+        items.close()
+        self.assertTrue(all(not thread.is_alive() for thread in pipeline._threads))
+
+    def test_author_table_is_shared_between_stages(self):
+        author_table = AuthorTable()
+        authors = [Author(canonical_name='Author {}'.format(index)) for index in range(1000)]
+        pipeline = Pipeline(2)
+        pipeline.add_source('enumerate', lambda: ((author, author_table.index(author)) for author in authors))
+        pipeline.add_stage('stats', lambda item: item + (author_table.index(item[0]),))
+        indices = [(author_index, stats_index) for _, author_index, stats_index in pipeline.run('collect')]
+        self.assertEqual(len(author_table), len(authors))
+        self.assertEqual(indices, [(index, index) for index in range(len(authors))])
+        self.assertTrue(all(author_table[index] is author for index, author in enumerate(authors)))
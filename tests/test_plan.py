@@ -0,0 +1,60 @@
+import datetime
+import os
+
+from sqlalchemy_utils import database_exists
+
+from githammer import Frequency
+from githammer.plan import plan_repository
+
+from .hammer_test import HammerTest
+
+
+class HammerPlanTest(HammerTest):
+
+    def setUp(self):
+        super().setUp()
+        self.repository_path = os.path.join(self.current_directory, 'data', 'repository')
+
+    def test_plan_does_not_create_database(self):
+        plan_repository(self.hammer, self.repository_path)
+        self.assertFalse(database_exists(self.hammer._engine.url))
+
+    def test_plan_counts_unprocessed_commits(self):
+        plan = plan_repository(self.hammer, self.repository_path)
+        self.assertEqual(plan.commit_count, 6)
+        self.assertEqual(plan.snapshot_count, 6)
+        self.assertEqual(plan.full_snapshot_count, 1)
+
+    def test_plan_counts_blames_and_bytes(self):
+        plan = plan_repository(self.hammer, self.repository_path)
+        self.assertEqual(plan.blame_count, 10)
+        self.assertEqual(plan.read_count, 2)
+        self.assertEqual(plan.byte_count, 211)
+
+    def test_plan_matches_processed_commits(self):
+        plan = plan_repository(self.hammer, self.repository_path)
+        self.hammer.add_repository(self.repository_path)
+        stats_stage = next(stage for stage in self.hammer.pipeline_stages if stage.name == 'stats')
+        self.assertEqual(stats_stage.item_count, plan.commit_count)
+
+    def test_plan_of_processed_repository_is_empty(self):
+        self.hammer.add_repository(self.repository_path)
+        plan = plan_repository(self.hammer, self.repository_path)
+        self.assertEqual(plan.commit_count, 0)
+        self.assertEqual(plan.estimated_time(), datetime.timedelta())
+
+    def test_plan_respects_snapshot_frequency(self):
+        plan = plan_repository(self.hammer, self.repository_path, snapshot_frequency=Frequency.monthly)
+        self.assertEqual(plan.commit_count, 6)
+        self.assertLess(plan.snapshot_count, 6)
+
+    def test_most_expensive_commit_has_most_blames(self):
+        plan = plan_repository(self.hammer, self.repository_path)
+        most_expensive_commit = plan.most_expensive_commits(1)[0]
+        self.assertEqual(most_expensive_commit.hexsha, self._main_repo_second_commit_hexsha)
+        self.assertEqual(most_expensive_commit.blame_count, 4)
+
+    def test_estimated_time_decreases_with_processes(self):
+        plan = plan_repository(self.hammer, self.repository_path)
+        self.assertGreater(plan.estimated_time(), datetime.timedelta())
+        self.assertLess(plan.estimated_time(processes=4), plan.estimated_time())
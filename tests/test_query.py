@@ -0,0 +1,87 @@
+import datetime
+import os
+
+from githammer.summary import commit_count_table, line_count_table, summary_text
+
+from .hammer_test import HammerTest
+
+
+class HammerQueryTest(HammerTest):
+
+    _new_year = datetime.datetime(2018, 1, 1, tzinfo=datetime.timezone.utc)
+    _mid_december = datetime.datetime(2017, 12, 10, tzinfo=datetime.timezone.utc)
+
+    def setUp(self):
+        super().setUp()
+        self.repository_path = os.path.join(self.current_directory, 'data', 'repository')
+        self.subrepository_path = os.path.join(self.current_directory, 'data', 'subrepository')
+        self.hammer.add_repository(self.repository_path, os.path.join(self.current_directory, 'data', 'repo-config.json'))
+        self.hammer.add_repository(self.subrepository_path)
+
+    def test_individual_commits_are_filtered_by_time(self):
+        since_commits = list(self.hammer.iter_individual_commits(since=HammerQueryTest._new_year))
+        until_commits = list(self.hammer.iter_individual_commits(until=HammerQueryTest._mid_december))
+        self.assertEqual(len(since_commits), 3)
+        self.assertTrue(all(commit.commit_time >= HammerQueryTest._new_year for commit in since_commits))
+        self.assertEqual([commit.hexsha for commit in until_commits],
+                         [HammerQueryTest._main_repo_initial_commit_hexsha,
+                          HammerQueryTest._main_repo_second_commit_hexsha,
+                          '303804d461da9cdfef86f6053d0ad2d0545adae1'])
+
+    def test_individual_commits_are_filtered_by_author(self):
+        commits = list(self.hammer.iter_individual_commits(authors=['Author B']))
+        self.assertEqual(len(commits), 3)
+        self.assertTrue(all(commit.author.name == 'Author B' for commit in commits))
+
+    def test_individual_commits_are_filtered_by_repository(self):
+        commits = list(self.hammer.iter_individual_commits(repositories=[self.subrepository_path]))
+        self.assertEqual(len(commits), 1)
+
+    def test_authors_are_filtered(self):
+        authors = list(self.hammer.iter_authors(since=HammerQueryTest._new_year, repositories=[self.repository_path]))
+        self.assertEqual(sorted(author.name for author in authors), ['Author A', 'Author B', 'Author C'])
+        authors = list(self.hammer.iter_authors(repositories=[self.subrepository_path]))
+        self.assertEqual([author.name for author in authors], ['Author B'])
+
+    def test_commits_since_include_state_of_other_repositories(self):
+        commits = list(self.hammer.iter_commits(since=HammerQueryTest._new_year))
+        all_commits = list(self.hammer.iter_commits())
+        self.assertEqual(len(commits), 2)
+        self.assertEqual([commit.line_counts for commit in commits],
+                         [commit.line_counts for commit in all_commits[-2:]])
+
+    def test_commits_until_are_cut(self):
+        commits = list(self.hammer.iter_commits(until=HammerQueryTest._mid_december))
+        self.assertEqual(len(commits), 3)
+
+    def test_head_commit_until_is_state_at_that_time(self):
+        head_commit = self.hammer.head_commit(until=HammerQueryTest._new_year)
+        december_commit = list(self.hammer.iter_commits(until=HammerQueryTest._new_year))[-1]
+        self.assertEqual(head_commit.line_counts, december_commit.line_counts)
+
+    def test_counts_are_restricted_to_authors(self):
+        head_commit = self.hammer.head_commit(authors=['Author C'])
+        self.assertEqual([(author.name, count) for author, count in head_commit.line_counts.items()],
+                         [('Author C', 2)])
+        for commit in self.hammer.iter_commits(authors=['Author A']):
+            self.assertTrue(all(author.name == 'Author A' for author in commit.line_counts))
+
+    def test_head_commit_until_before_first_commit_is_empty(self):
+        until = datetime.datetime(2017, 1, 1, tzinfo=datetime.timezone.utc)
+        head_commit = self.hammer.head_commit(until=until)
+        self.assertIsNone(head_commit.commit_time)
+        self.assertEqual(head_commit.line_counts, {})
+        self.assertEqual(head_commit.test_counts, {})
+        self.assertEqual(summary_text(self.hammer, until=until), '{}\n\n{}\n'.format(
+            commit_count_table(self.hammer, until=until), line_count_table(self.hammer, until=until)))
+
+    def test_commit_time_histograms_match_local_commit_times(self):
+        for kwargs in [{}, {'authors': ['Author B']}, {'since': HammerQueryTest._mid_december}]:
+            commits = list(self.hammer.iter_individual_commits(**kwargs))
+            hour_counts = [0] * 24
+            weekday_counts = [0] * 7
+            for commit in commits:
+                hour_counts[commit.commit_time_tz().hour] += 1
+                weekday_counts[commit.commit_time_tz().weekday()] += 1
+            self.assertEqual(self.hammer.commit_counts_per_hour(**kwargs), hour_counts)
+            self.assertEqual(self.hammer.commit_counts_per_weekday(**kwargs), weekday_counts)
@@ -0,0 +1,63 @@
+import os
+
+import git
+
+from githammer.gitreader import iter_raw_diff
+
+from .hammer_test import HammerTest
+
+
+class HammerRawDiffTest(HammerTest):
+
+    def _write(self, path, content):
+        full_path = os.path.join(self.repository_path, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, 'w') as file:
+            file.write(content)
+
+    def _commit(self, message):
+        return self.git_repository.index.commit(message)
+
+    def setUp(self):
+        super().setUp()
+        self.repository_path = os.path.join(self.working_directory.name, 'diffs')
+        self.git_repository = git.Repo.init(self.repository_path)
+        self._write('kept.txt', 'kept\n')
+        self._write('modified.txt', 'one\n')
+        self._write('deleted.txt', 'deleted\n')
+        self._write('moved.txt', 'moved line one\nmoved line two\nmoved line three\n')
+        self.git_repository.index.add(['kept.txt', 'modified.txt', 'deleted.txt', 'moved.txt'])
+        self.first_commit = self._commit('First')
+        self._write('modified.txt', 'one\ntwo\n')
+        self._write('added/ünïcode.txt', 'added\n')
+        self.git_repository.index.add(['modified.txt', 'added/ünïcode.txt'])
+        self.git_repository.index.remove(['deleted.txt'], working_tree=True)
+        self.git_repository.index.move(['moved.txt', 'renamed.txt'])
+        self.second_commit = self._commit('Second')
+
+    def test_change_types_and_paths_are_read(self):
+        entries = sorted(iter_raw_diff(self.git_repository, self.first_commit.hexsha, self.second_commit.hexsha),
+                         key=lambda entry: entry.change_type)
+        self.assertEqual([(entry.change_type, entry.old_path, entry.new_path) for entry in entries],
+                         [('A', None, 'added/ünïcode.txt'), ('D', 'deleted.txt', None),
+                          ('M', 'modified.txt', 'modified.txt'), ('R', 'moved.txt', 'renamed.txt')])
+
+    def test_blob_ids_are_read(self):
+        entries = {entry.change_type: entry for entry in
+                   iter_raw_diff(self.git_repository, self.first_commit.hexsha, self.second_commit.hexsha)}
+        self.assertIsNone(entries['A'].old_blob_id)
+        self.assertEqual(entries['A'].new_blob_id, self.second_commit.tree['added/ünïcode.txt'].hexsha)
+        self.assertIsNone(entries['D'].new_blob_id)
+        self.assertEqual(entries['M'].old_blob_id, self.first_commit.tree['modified.txt'].hexsha)
+        self.assertEqual(entries['R'].old_blob_id, entries['R'].new_blob_id)
+
+    def test_changed_paths_match_diff_index(self):
+        diff_index = self.first_commit.diff(self.second_commit, w=True, ignore_submodules=True)
+        entries = list(iter_raw_diff(self.git_repository, self.first_commit.hexsha, self.second_commit.hexsha))
+        self.assertEqual({(entry.old_path, entry.new_path) for entry in entries},
+                         {(None if diff.new_file else diff.a_path, None if diff.deleted_file else diff.b_path)
+                          for diff in diff_index})
+
+    def test_identical_commits_have_no_entries(self):
+        self.assertEqual(list(iter_raw_diff(self.git_repository, self.first_commit.hexsha, self.first_commit.hexsha)),
+                         [])
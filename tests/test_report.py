@@ -0,0 +1,36 @@
+import os
+
+from githammer.summary import write_report
+
+from .hammer_test import HammerTest
+
+
+class HammerReportTest(HammerTest):
+
+    def setUp(self):
+        super().setUp()
+        self.hammer.add_repository(os.path.join(self.current_directory, 'data', 'repository'),
+                                   os.path.join(self.current_directory, 'data', 'repo-config.json'))
+        self.output_directory = os.path.join(self.working_directory.name, 'report')
+
+    def test_all_outputs_are_written(self):
+        paths = write_report(self.hammer, self.output_directory)
+        self.assertEqual(sorted(os.path.basename(path) for path in paths),
+                         ['day-of-week.png', 'line-author-count.png', 'line-count.png', 'summary.txt',
+                          'test-author-count.png', 'test-count.png', 'time-of-day.png'])
+        self.assertTrue(all(os.path.getsize(path) > 0 for path in paths))
+
+    def test_summary_matches_summary_tables(self):
+        from githammer.summary import commit_count_table, line_count_table, test_count_table
+        write_report(self.hammer, self.output_directory)
+        with open(os.path.join(self.output_directory, 'summary.txt')) as summary_file:
+            summary = summary_file.read()
+        expected = '\n\n'.join(str(table) for table in [commit_count_table(self.hammer),
+                                                         line_count_table(self.hammer),
+                                                         test_count_table(self.hammer)]) + '\n'
+        self.assertEqual(summary, expected)
+
+    def test_graphs_are_rendered_in_parallel(self):
+        paths = write_report(self.hammer, self.output_directory, image_format='svg', processes=2)
+        self.assertEqual(len(paths), 7)
+        self.assertTrue(all(os.path.getsize(path) > 0 for path in paths))
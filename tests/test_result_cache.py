@@ -0,0 +1,117 @@
+import datetime
+import os
+import sqlite3
+
+import git
+
+from githammer import OldDatabaseSchemaError
+from githammer.dbtypes import CachedResult
+from githammer.summary import commit_count_table, line_count_table, lines_per_author, summary_text
+
+from .hammer_test import HammerTest
+
+
+class HammerResultCacheTest(HammerTest):
+
+    def setUp(self):
+        super().setUp()
+        self.git_repository = git.Repo.clone_from(os.path.join(self.current_directory, 'data', 'repository'),
+                                                  os.path.join(self.working_directory.name, 'worktree'),
+                                                  branch='old-state', single_branch=True)
+        self.hammer.add_repository(os.path.join(self.working_directory.name, 'worktree'))
+        self.other_hammer = self._make_hammer('other')
+        self.other_hammer.add_repository(os.path.join(self.current_directory, 'data', 'subrepository'))
+        self.computations = []
+
+    def _compute(self, value):
+        self.computations.append(value)
+        return value
+
+    def _cached_commands(self, project_name):
+        session = self.hammer._Session()
+        commands = sorted(command for command, in session.query(CachedResult.command).filter(
+            CachedResult.project_name == project_name))
+        session.close()
+        return commands
+
+    def test_result_is_computed_once(self):
+        first_value = self.hammer.cached_result('test', lambda: self._compute([1, 2, 3]))
+        second_value = self._make_hammer('test').cached_result('test', lambda: self._compute([4]))
+        self.assertEqual(first_value, [1, 2, 3])
+        self.assertEqual(second_value, [1, 2, 3])
+        self.assertEqual(self.computations, [[1, 2, 3]])
+
+    def test_options_are_part_of_key(self):
+        self.hammer.cached_result('test', lambda: self._compute(1), authors=['Author A'])
+        self.hammer.cached_result('test', lambda: self._compute(2), authors=['Author B'])
+        self.hammer.cached_result('other', lambda: self._compute(3), authors=['Author A'])
+        self.assertEqual(self.hammer.cached_result('test', lambda: self._compute(4), authors=['Author B']), 2)
+        self.assertEqual(self.computations, [1, 2, 3])
+
+    def test_summary_text_matches_tables(self):
+        text = summary_text(self.hammer)
+        self.assertEqual(text, '{}\n\n{}\n'.format(commit_count_table(self.hammer), line_count_table(self.hammer)))
+        self.assertEqual(self.hammer.head_commit().test_counts, {})
+        self.assertEqual(summary_text(self._make_hammer('test')), text)
+        self.assertEqual(self._cached_commands('test'), ['summary'])
+
+    def test_graph_series_are_cached(self):
+        lines_per_author(self.hammer, headless=True)
+        lines_per_author(self.hammer, headless=True)
+        self.assertEqual(self._cached_commands('test'), ['line-author-count'])
+
+    def test_update_invalidates_only_affected_projects(self):
+        old_summary = summary_text(self.hammer)
+        summary_text(self.other_hammer)
+        self.git_repository.remote().fetch('+refs/heads/master:refs/remotes/origin/master')
+        self.git_repository.create_head('master', self.git_repository.remote().refs.master)
+        self.git_repository.heads.master.checkout()
+        self.hammer.update_data()
+        self.assertEqual(self._cached_commands('test'), [])
+        self.assertEqual(self._cached_commands('other'), ['summary'])
+        self.assertNotEqual(summary_text(self.hammer), old_summary)
+
+    def test_update_without_new_commits_keeps_results(self):
+        summary_text(self.hammer)
+        self.hammer.update_data()
+        self.assertEqual(self._cached_commands('test'), ['summary'])
+
+    def test_least_recently_used_results_are_evicted(self):
+        hammer = self._make_hammer('test')
+        hammer._result_cache.max_size = 150
+        for command in ['first', 'second', 'third']:
+            hammer.cached_result(command, lambda: self._compute('x' * 50))
+            if command == 'second':
+                hammer.cached_result('first', lambda: self._compute('y'))
+        self.assertEqual(self._cached_commands('test'), ['first', 'third'])
+        hammer.cached_result('large', lambda: self._compute('x' * 500))
+        self.assertEqual(self._cached_commands('test'), ['first', 'third'])
+        self.assertEqual(len(self.computations), 4)
+
+    def _lock_database(self):
+        connection = sqlite3.connect(os.path.join(self.working_directory.name, 'test.sqlite'), isolation_level=None)
+        connection.execute('BEGIN IMMEDIATE')
+        return connection
+
+    def test_cache_does_not_wait_for_locked_database(self):
+        self.hammer.cached_result('first', lambda: self._compute(1))
+        connection = self._lock_database()
+        start_time = datetime.datetime.now()
+        try:
+            self.assertEqual(self.hammer.cached_result('first', lambda: self._compute(2)), 1)
+            self.assertEqual(self.hammer.cached_result('second', lambda: self._compute(3)), 3)
+        finally:
+            connection.rollback()
+            connection.close()
+        self.assertLess(datetime.datetime.now() - start_time, datetime.timedelta(seconds=5))
+        self.assertEqual(self.computations, [1, 3])
+        self.assertEqual(self._cached_commands('test'), ['first'])
+
+    def test_missing_cache_table_is_old_schema(self):
+        session = self.hammer._Session()
+        session.execute('DROP TABLE resultcache')
+        session.commit()
+        session.close()
+        with self.assertRaises(OldDatabaseSchemaError):
+            self.hammer.cached_result('test', lambda: self._compute(1))
+        self.assertEqual(self.computations, [])
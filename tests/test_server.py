@@ -0,0 +1,107 @@
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+from unittest import mock
+
+import git
+
+from githammer import Hammer
+from githammer.server import HammerServer
+
+from .hammer_test import HammerTest
+
+
+class HammerServerTest(HammerTest):
+
+    def _request(self, path, method='GET'):
+        request = urllib.request.Request('http://{}:{}{}'.format(self.host, self.port, path), method=method)
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.load(response)
+
+    def setUp(self):
+        super().setUp()
+        self.repository_path = os.path.join(self.working_directory.name, 'worktree')
+        self.git_repository = git.Repo.clone_from(os.path.join(self.current_directory, 'data', 'repository'),
+                                                  self.repository_path, branch='old-state', single_branch=True)
+        self.hammer.add_repository(self.repository_path)
+        self.server = HammerServer(['test'], database_url=self.database_url)
+        self.host, self.port = self.server.start(port=0)
+        self.server_thread = threading.Thread(target=self.server.serve_forever)
+        self.server_thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server_thread.join()
+        super().tearDown()
+
+    def test_projects_are_listed(self):
+        status, data = self._request('/projects')
+        self.assertEqual(status, 200)
+        self.assertEqual(data['projects'], ['test'])
+
+    def test_summary_is_returned(self):
+        _, data = self._request('/projects/test/summary')
+        self.assertEqual(data['lines'], [{'author': 'Author A', 'count': 14}])
+        self.assertEqual(data['commits'], [{'author': 'Author A', 'count': 1}])
+
+    def test_series_is_returned(self):
+        _, data = self._request('/projects/test/series?type=line-author-count&frequency=weekly')
+        self.assertEqual(data['points'], [{'time': '2017-11-22T07:22:33+00:00', 'counts': {'Author A': 14}}])
+
+    def test_unknown_project_is_not_found(self):
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            self._request('/projects/missing/summary')
+        self.assertEqual(context.exception.code, 404)
+
+    def _check_out_master(self):
+        self.git_repository.remote().fetch('+refs/heads/master:refs/remotes/origin/master')
+        self.git_repository.create_head('master', self.git_repository.remote().refs.master)
+        self.git_repository.heads.master.checkout()
+
+    def test_update_brings_in_new_commits(self):
+        self._check_out_master()
+        _, old_data = self._request('/projects/test/summary')
+        self.server.update_projects()
+        _, data = self._request('/projects/test/summary')
+        self.assertEqual(old_data['lines'], [{'author': 'Author A', 'count': 14}])
+        self.assertEqual(sum(item['count'] for item in data['commits']), 6)
+
+    def test_queries_are_answered_during_update(self):
+        self._check_out_master()
+        update_started = threading.Event()
+        update_allowed = threading.Event()
+        update_data = Hammer.update_data
+
+        def wait_and_update_data(hammer):
+            update_started.set()
+            update_allowed.wait(30)
+            update_data(hammer)
+
+        with mock.patch.object(Hammer, 'update_data', wait_and_update_data):
+            update_thread = threading.Thread(target=self.server.update_projects)
+            update_thread.start()
+            try:
+                self.assertTrue(update_started.wait(30))
+                _, data = self._request('/projects/test/summary')
+                _, status = self._request('/projects/test')
+            finally:
+                update_allowed.set()
+                update_thread.join()
+        self.assertEqual(data['commits'], [{'author': 'Author A', 'count': 1}])
+        self.assertEqual(status['last_update_time'], None)
+        _, data = self._request('/projects/test/summary')
+        self.assertEqual(sum(item['count'] for item in data['commits']), 6)
+
+    def test_empty_project_has_no_head_commit_time(self):
+        server = HammerServer(['empty'], database_url=self.database_url)
+        _, data = server.handle_request('GET', ['projects', 'empty'], {})
+        self.assertEqual(data['head_commit_time'], None)
+        _, data = server.handle_request('GET', ['projects', 'empty', 'summary'], {})
+        self.assertEqual(data['head_commit_time'], None)
+        self.assertEqual(data['lines'], [])
+
+    def test_update_can_be_requested(self):
+        status, data = self._request('/update', method='POST')
+        self.assertEqual(status, 202)
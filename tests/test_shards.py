@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+
+from githammer import DatabaseVerifier, merge_databases
+
+from .hammer_test import HammerTest
+
+
+class HammerShardTest(HammerTest):
+
+    _shard_count = 3
+
+    def setUp(self):
+        super().setUp()
+        self.repository_path = os.path.join(self.current_directory, 'data', 'repository')
+        self.shard_database_urls = ['sqlite:///{}/shard{}.sqlite'.format(self.working_directory.name, index)
+                                    for index in range(1, self._shard_count + 1)]
+        self.merged_database_url = 'sqlite:///' + self.working_directory.name + '/merged.sqlite'
+
+    def _start_shard(self, index, *args):
+        environment = dict(os.environ, DATABASE_URL=self.shard_database_urls[index - 1],
+                           PYTHONPATH=os.path.dirname(self.current_directory))
+        return subprocess.Popen([sys.executable, '-m', 'githammer', 'init-project', 'test', self.repository_path,
+                                 '--shard', '{}/{}'.format(index, self._shard_count)] + list(args),
+                                env=environment, stdout=subprocess.DEVNULL)
+
+    def _process_shards(self, *args):
+        processes = [self._start_shard(index, *args) for index in range(1, self._shard_count + 1)]
+        for process in processes:
+            self.assertEqual(process.wait(), 0)
+
+    def _verify(self):
+        verifier = DatabaseVerifier('test', self.database_url, 'test', self.merged_database_url)
+        return verifier, list(verifier.iter_differences())
+
+    def test_shards_split_commits(self):
+        self._process_shards()
+        shard_commits = [{commit.hexsha for commit in self._make_hammer('test', url).iter_individual_commits()}
+                         for url in self.shard_database_urls]
+        self.assertTrue(all(shard_commits))
+        self.assertEqual(sum(len(commits) for commits in shard_commits), len(set().union(*shard_commits)))
+
+    def test_merged_shards_match_single_run(self):
+        self.hammer.add_repository(self.repository_path)
+        self._process_shards()
+        merged_hammer = merge_databases('test', self.merged_database_url, self.shard_database_urls)
+        verifier, differences = self._verify()
+        self.assertEqual(differences, [])
+        self.assertEqual(verifier.commit_count, 6)
+        self.assertEqual(merged_hammer.head_commit().line_counts, self.hammer.head_commit().line_counts)
+        self.assertEqual([commit.commit_time for commit in merged_hammer.iter_commits()],
+                         [commit.commit_time for commit in self.hammer.iter_commits()])
+
+    def test_merged_shards_track_branches(self):
+        self.hammer.add_repository(self.repository_path, branches=['feature'])
+        self._process_shards('--branch', 'feature')
+        merged_hammer = merge_databases('test', self.merged_database_url, self.shard_database_urls)
+        _, differences = self._verify()
+        self.assertEqual(differences, [])
+        self.assertEqual(merged_hammer.head_commit(branch='feature').commit_time,
+                         self.hammer.head_commit(branch='feature').commit_time)
+
+    def test_merge_skips_already_merged_commits(self):
+        self._process_shards()
+        merge_databases('test', self.merged_database_url, self.shard_database_urls)
+        merged_hammer = merge_databases('test', self.merged_database_url, self.shard_database_urls[:1])
+        self.assertEqual(len(list(merged_hammer.iter_individual_commits())), 6)
+
+    def test_invalid_shard_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.hammer.add_repository(self.repository_path, shard=(4, 3))
@@ -0,0 +1,62 @@
+import os
+import git
+
+from githammer import RepositoryConfigurationConflictError
+
+from .hammer_test import HammerTest
+
+
+class HammerSharedRepositoryTest(HammerTest):
+
+    def setUp(self):
+        super().setUp()
+        self.repository_path = os.path.join(self.current_directory, 'data', 'repository')
+        self.hammer.add_repository(self.repository_path)
+        self.other_hammer = self._make_hammer('otherTest')
+
+    def test_shared_repository_is_not_processed_again(self):
+        self.other_hammer.add_repository(self.repository_path)
+        stats_stage = next(stage for stage in self.other_hammer.pipeline_stages if stage.name == 'stats')
+        self.assertEqual(stats_stage.item_count, 0)
+
+    def test_shared_repository_has_same_statistics(self):
+        self.other_hammer.add_repository(self.repository_path)
+        self.assertEqual(len(list(self.other_hammer.iter_individual_commits())), 6)
+        self.assertEqual(self.other_hammer.head_commit().line_counts, self.hammer.head_commit().line_counts)
+
+    def test_shared_repository_is_reloaded_in_both_projects(self):
+        self.other_hammer.add_repository(self.repository_path)
+        reloaded_hammer = self._make_hammer('otherTest')
+        self.assertEqual(reloaded_hammer.head_commit().line_counts, self.hammer.head_commit().line_counts)
+
+    def test_repository_with_different_configuration_is_rejected(self):
+        with self.assertRaises(RepositoryConfigurationConflictError):
+            self.other_hammer.add_repository(self.repository_path,
+                                             os.path.join(self.current_directory, 'data', 'repo-config.json'))
+
+
+class HammerSharedUpdateTest(HammerTest):
+
+    def setUp(self):
+        super().setUp()
+        self.repository_path = os.path.join(self.working_directory.name, 'worktree')
+        self.git_repository = git.Repo.clone_from(os.path.join(self.current_directory, 'data', 'repository'),
+                                                  self.repository_path, branch='old-state', single_branch=True)
+        self.hammer.add_repository(self.repository_path)
+        self.other_hammer = self._make_hammer('otherTest')
+        self.other_hammer.add_repository(self.repository_path)
+        self.git_repository.remote().fetch('+refs/heads/master:refs/remotes/origin/master')
+        self.git_repository.create_head('master', self.git_repository.remote().refs.master)
+        self.git_repository.heads.master.checkout()
+
+    def test_shared_repository_is_advanced_only_once(self):
+        self.hammer.update_data()
+        self.other_hammer.update_data()
+        stats_stage = next(stage for stage in self.other_hammer.pipeline_stages if stage.name == 'stats')
+        self.assertEqual(stats_stage.item_count, 0)
+
+    def test_other_project_sees_update(self):
+        self.hammer.update_data()
+        self.other_hammer.update_data()
+        self.assertEqual(self.other_hammer.head_commit().line_counts, self.hammer.head_commit().line_counts)
+        self.assertEqual(len(list(self.other_hammer.iter_commits())), len(list(self.hammer.iter_commits())))
@@ -0,0 +1,97 @@
+import json
+import os
+
+import git
+
+from githammer import iter_sources_and_tests
+
+from .hammer_test import HammerTest
+
+
+class HammerSkippedFilesTest(HammerTest):
+    def setUp(self):
+        super().setUp()
+        self.repository_path = os.path.join(self.current_directory, 'data', 'repository')
+        with open(os.path.join(self.current_directory, 'data', 'repo-config.json')) as configuration_file:
+            configuration = json.load(configuration_file)
+        configuration['maxFileSizeBytes'] = 16
+        self.configuration_path = os.path.join(self.working_directory.name, 'skip-config.json')
+        with open(self.configuration_path, 'w') as configuration_file:
+            json.dump(configuration, configuration_file)
+        self.full_hammer = self._make_hammer('full', 'sqlite:///' + self.working_directory.name + '/full.sqlite')
+        self.full_hammer.add_repository(self.repository_path,
+                                        os.path.join(self.current_directory, 'data', 'repo-config.json'))
+        self.hammer.add_repository(self.repository_path, self.configuration_path)
+
+    def test_oversized_file_is_listed_as_skipped(self):
+        skipped = [item for item_type, item in iter_sources_and_tests(self.repository_path, self.configuration_path)
+                   if item_type == 'skipped-file']
+        self.assertEqual(skipped, ['file1.txt (size 21 bytes)'])
+
+    def test_oversized_file_is_not_counted(self):
+        full_counts = {author.name: count for author, count in self.full_hammer.head_commit().line_counts.items()}
+        skipped_counts = {author.name: count for author, count in self.hammer.head_commit().line_counts.items()}
+        self.assertLess(sum(skipped_counts.values()), sum(full_counts.values()))
+
+    def test_small_files_are_counted_identically(self):
+        full_test_counts = {author.name: count
+                            for author, count in self.full_hammer.head_commit().test_counts.items()}
+        skipped_test_counts = {author.name: count for author, count in self.hammer.head_commit().test_counts.items()}
+        self.assertEqual(skipped_test_counts, full_test_counts)
+
+
+class HammerSkippedAttributesTest(HammerTest):
+
+    def _write_configuration(self, name, **skip_rules):
+        configuration = {'sourceFiles': ['*.txt', '*.bin']}
+        configuration.update(skip_rules)
+        configuration_path = os.path.join(self.working_directory.name, name)
+        with open(configuration_path, 'w') as configuration_file:
+            json.dump(configuration, configuration_file)
+        return configuration_path
+
+    def _skipped_files(self, repository_path, configuration_path):
+        return [item for item_type, item in iter_sources_and_tests(repository_path, configuration_path)
+                if item_type == 'skipped-file']
+
+    def _line_count(self, repository_path, configuration_path):
+        hammer = self._make_hammer('test', 'sqlite:///' + configuration_path + '.sqlite')
+        hammer.add_repository(repository_path, configuration_path)
+        return sum(hammer.head_commit().line_counts.values())
+
+    def setUp(self):
+        super().setUp()
+        self.repository_path = os.path.join(self.working_directory.name, 'attributes')
+        repository = git.Repo.init(self.repository_path)
+        files = {
+            '.gitattributes': b'generated.txt linguist-generated\n',
+            'code.txt': b'one\ntwo\nthree\n',
+            'generated.txt': b'one\ntwo\n',
+            'data.bin': b'one\0\ntwo\n'
+        }
+        for file_name, content in files.items():
+            with open(os.path.join(self.repository_path, file_name), 'wb') as file:
+                file.write(content)
+        repository.index.add(list(files))
+        actor = git.Actor('Author A', 'a@example.com')
+        repository.index.commit('Add files', author=actor, committer=actor)
+        with open(os.path.join(self.repository_path, '.gitattributes'), 'w') as file:
+            file.write('code.txt linguist-generated\n')
+
+    def test_binary_file_is_skipped(self):
+        configuration_path = self._write_configuration('binary.json', skipBinary=True)
+        self.assertEqual(self._skipped_files(self.repository_path, configuration_path), ['data.bin (binary)'])
+        self.assertEqual(self._line_count(self.repository_path, configuration_path), 5)
+
+    def test_generated_file_is_skipped_by_committed_attributes(self):
+        configuration_path = self._write_configuration('generated.json', honorGitattributesGenerated=True)
+        self.assertEqual(self._skipped_files(self.repository_path, configuration_path),
+                         ['generated.txt (generated)'])
+        self.assertEqual(self._line_count(self.repository_path, configuration_path), 5)
+
+    def test_bare_repository_reads_committed_attributes(self):
+        bare_repository_path = os.path.join(self.working_directory.name, 'bare.git')
+        git.Repo.clone_from(self.repository_path, bare_repository_path, bare=True)
+        configuration_path = self._write_configuration('bare.json', honorGitattributesGenerated=True,
+                                                        skipBinary=True)
+        self.assertEqual(self._line_count(bare_repository_path, configuration_path), 3)
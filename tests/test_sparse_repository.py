@@ -0,0 +1,42 @@
+import os
+
+from githammer import Frequency
+
+from .hammer_test import HammerTest
+
+
+class HammerSparseTest(HammerTest):
+    def setUp(self):
+        super().setUp()
+        self.hammer.add_repository(os.path.join(self.current_directory, 'data', 'repository'),
+                                   os.path.join(self.current_directory, 'data', 'repo-config.json'),
+                                   snapshot_frequency=Frequency.yearly)
+
+    def test_all_commits_are_stored_with_metadata(self):
+        commits = list(self.hammer.iter_individual_commits())
+        self.assertEqual(len(commits), 6)
+        self.assertTrue(all(commit.added_lines is not None for commit in commits if len(commit.parent_ids) <= 1))
+
+    def test_only_last_commit_of_each_interval_has_line_counts(self):
+        second_commit = self._fetch_commit(HammerSparseTest._main_repo_second_commit_hexsha)
+        test_commit = self._fetch_commit(HammerSparseTest._main_repo_test_commit_hexsha)
+        self.assertEqual(second_commit.line_counts, {})
+        self.assertNotEqual(test_commit.line_counts, {})
+
+    def test_commits_are_iterated_over_snapshots(self):
+        commits = list(self.hammer.iter_commits())
+        self.assertEqual(len(commits), 3)
+
+    def test_line_counts_are_correct_with_sparse_snapshots(self):
+        authors = {author.name: author for author in self.hammer.iter_authors()}
+        self.assertEqual(self.hammer.head_commit().line_counts, {
+            authors['Author A']: 7,
+            authors['Author B']: 9,
+            authors['Author C']: 2
+        })
+        self.assertEqual(self.hammer.head_commit().test_counts, {authors['Author C']: 1})
+
+    def test_snapshots_are_preserved_when_reloading(self):
+        reloaded_hammer = self._make_hammer('test')
+        self.assertEqual(len(list(reloaded_hammer.iter_commits())), 3)
+        self.assertEqual(reloaded_hammer.head_commit().line_counts, self.hammer.head_commit().line_counts)
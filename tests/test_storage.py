@@ -0,0 +1,51 @@
+import os
+import threading
+
+from sqlalchemy import text
+
+from .hammer_test import HammerTest
+
+
+class HammerStorageTest(HammerTest):
+
+    def setUp(self):
+        super().setUp()
+        self.hammer.add_repository(os.path.join(self.current_directory, 'data', 'repository'))
+
+    def _pragma(self, name):
+        with self.hammer._engine.connect() as connection:
+            return connection.execute(text('PRAGMA {}'.format(name))).scalar()
+
+    def test_database_uses_write_ahead_log(self):
+        self.assertEqual(self._pragma('journal_mode'), 'wal')
+
+    def test_connections_wait_for_locks(self):
+        self.assertEqual(self._pragma('busy_timeout'), 30000)
+
+    def test_bulk_load_uses_larger_cache(self):
+        query_cache_size = self._pragma('cache_size')
+        with self.hammer._storage.bulk_load():
+            self.assertLess(self._pragma('cache_size'), query_cache_size)
+        self.assertEqual(self._pragma('cache_size'), query_cache_size)
+
+    def test_reader_is_not_blocked_by_writer(self):
+        reader_hammer = self._make_hammer('test')
+        writer_started = threading.Event()
+        reader_finished = threading.Event()
+        commits = []
+
+        def write():
+            with self.hammer._engine.begin() as connection:
+                connection.execute(text('UPDATE commits SET added_lines = added_lines'))
+                writer_started.set()
+                reader_finished.wait(10)
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        writer_started.wait(10)
+        try:
+            commits = list(reader_hammer.iter_individual_commits())
+        finally:
+            reader_finished.set()
+            writer.join()
+        self.assertEqual(len(commits), 6)
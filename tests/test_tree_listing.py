@@ -0,0 +1,46 @@
+import os
+
+import git
+from globber import globber
+
+from githammer.config import _matches_file_pattern
+from githammer.gitreader import iter_blob_contents, iter_tree_blobs
+
+from .hammer_test import HammerTest
+
+
+class HammerTreeListingTest(HammerTest):
+
+    def setUp(self):
+        super().setUp()
+        self.git_repository = git.Repo(os.path.join(self.current_directory, 'data', 'repository'))
+        self.commit = self.git_repository.commit(self._main_repo_head_commit_hexsha)
+
+    def test_tree_blobs_match_traversal(self):
+        entries = list(iter_tree_blobs(self.git_repository, self.commit.hexsha))
+        traversed = [item for item in self.commit.tree.traverse() if item.type == 'blob']
+        self.assertEqual({(entry.path, entry.hexsha, entry.size) for entry in entries},
+                         {(blob.path, blob.hexsha, blob.size) for blob in traversed})
+        self.assertEqual([entry.path for entry in entries], sorted(entry.path for entry in entries))
+
+    def test_blob_contents_are_read_in_order(self):
+        blobs = list(reversed(list(iter_tree_blobs(self.git_repository, self.commit.hexsha))))
+        contents = list(iter_blob_contents(self.git_repository, [blob.hexsha for blob in blobs]))
+        self.assertEqual(contents, [self.git_repository.odb.stream(bytes.fromhex(blob.hexsha)).read()
+                                    for blob in blobs])
+
+    def test_unfinished_blob_reading_is_closed(self):
+        blobs = list(iter_tree_blobs(self.git_repository, self.commit.hexsha))
+        contents = iter_blob_contents(self.git_repository, [blob.hexsha for blob in blobs])
+        next(contents)
+        contents.close()
+        self.assertEqual(list(iter_blob_contents(self.git_repository, [])), [])
+
+    def test_compiled_patterns_match_globber(self):
+        patterns = ['*.py', '**/*.py', 'src/**', 'src/**/test_*.py', '**/a?c/**', 'lib/*', '\\*.txt', '**']
+        paths = ['a.py', 'src/a.py', 'src/sub/test_a.py', 'x/abc/y.c', 'abc/y', 'lib/x', 'lib/x/y', '*.txt',
+                 'a.txt', 'src']
+        for pattern in patterns:
+            for path in paths:
+                self.assertEqual(_matches_file_pattern(path, pattern), globber.match(pattern, path),
+                                 '{} {}'.format(pattern, path))
@@ -44,3 +44,27 @@ class HammerUpdateTest(HammerTest):
         second_commit = self._fetch_commit(HammerUpdateTest._main_repo_second_commit_hexsha)
         self.assertEqual(second_commit.line_counts[initial_commit.author], 10)
         self.assertEqual(second_commit.line_counts[second_commit.author], 4)
+
+    def test_first_parent_chain_is_extended_by_update(self):
+        self._update_from_old_state()
+        chain = [commit.commit_time for commit in self.hammer.iter_commits()]
+        reloaded_chain = [commit.commit_time for commit in self._make_hammer('test').iter_commits()]
+        self.assertEqual(len(chain), 5)
+        self.assertEqual(chain, reloaded_chain)
+
+    def test_first_parent_chain_is_rebuilt_when_head_leaves_it(self):
+        other_hammer = self._make_hammer('otherTest',
+                                         database_url='sqlite:///' + self.working_directory.name + '/other.sqlite')
+        git_repository = git.Repo.clone_from(os.path.join(self.current_directory, 'data', 'repository'),
+                                             os.path.join(self.working_directory.name, 'feature'),
+                                             branch='feature', single_branch=True)
+        other_hammer.add_repository(os.path.join(self.working_directory.name, 'feature'))
+        self.assertEqual(len(list(other_hammer.iter_commits())), 4)
+        git_repository.remote().fetch('+refs/heads/master:refs/remotes/origin/master')
+        git_repository.create_head('master', git_repository.remote().refs.master)
+        git_repository.heads.master.checkout()
+        other_hammer.update_data()
+        reloaded_hammer = self._make_hammer('otherTest',
+                                            database_url='sqlite:///' + self.working_directory.name + '/other.sqlite')
+        self.assertEqual(len(list(other_hammer.iter_commits())), 5)
+        self.assertEqual(len(list(reloaded_hammer.iter_commits())), 5)
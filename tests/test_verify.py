@@ -0,0 +1,80 @@
+import datetime
+import os
+from unittest import mock
+
+from sqlalchemy import text
+
+from githammer import DatabaseVerifier
+from githammer.verify import _prefix_ranges, _row_digest
+
+from .hammer_test import HammerTest
+
+
+class HammerVerifyTest(HammerTest):
+
+    def setUp(self):
+        super().setUp()
+        repository_path = os.path.join(self.current_directory, 'data', 'repository')
+        self.hammer.add_repository(repository_path)
+        self.other_database_url = 'sqlite:///' + self.working_directory.name + '/other.sqlite'
+        self.other_hammer = self._make_hammer('other', database_url=self.other_database_url)
+        self.other_hammer.add_repository(repository_path)
+
+    def _execute(self, statement):
+        with self.other_hammer._engine.begin() as connection:
+            connection.execute(text(statement))
+
+    def _verify(self, **kwargs):
+        verifier = DatabaseVerifier('test', self.database_url, 'other', self.other_database_url, **kwargs)
+        return verifier, list(verifier.iter_differences())
+
+    def test_identical_databases_have_no_differences(self):
+        verifier, differences = self._verify()
+        self.assertEqual(differences, [])
+        self.assertEqual(verifier.commit_count, 6)
+        self.assertEqual(verifier.differing_bucket_count, 0)
+
+    def test_all_differences_are_reported(self):
+        self._execute("UPDATE commits SET added_lines = 100 WHERE hexsha = '{}'".format(
+            self._main_repo_second_commit_hexsha))
+        self._execute("UPDATE authorcommit SET line_count = line_count + 1 WHERE commit_id = "
+                      "(SELECT id FROM commits WHERE hexsha = '{}')".format(self._main_repo_head_commit_hexsha))
+        _, differences = self._verify()
+        self.assertEqual([(hexsha, attribute) for hexsha, attribute, _, _ in differences],
+                         [(self._main_repo_second_commit_hexsha, 'added_lines'),
+                          (self._main_repo_head_commit_hexsha, 'line_counts')])
+        self.assertEqual(differences[0][2:], (self._fetch_commit(self._main_repo_second_commit_hexsha).added_lines,
+                                              100))
+
+    def test_missing_commit_is_reported(self):
+        self._execute("DELETE FROM authorcommit WHERE commit_id = (SELECT id FROM commits WHERE hexsha = '{}')".format(
+            self._main_repo_initial_commit_hexsha))
+        self._execute("DELETE FROM commits WHERE hexsha = '{}'".format(self._main_repo_initial_commit_hexsha))
+        _, differences = self._verify()
+        self.assertEqual(differences, [(self._main_repo_initial_commit_hexsha, 'hexsha',
+                                        self._main_repo_initial_commit_hexsha, None)])
+
+    def test_differences_are_found_when_loading_one_commit_at_a_time(self):
+        self._execute("UPDATE commits SET deleted_lines = 100")
+        _, differences = self._verify(max_loaded_commits=1)
+        self.assertEqual(len(differences), 6)
+
+    def test_differing_ranges_are_expanded_to_single_commits(self):
+        self._execute("UPDATE commits SET added_lines = 100 WHERE hexsha = '{}'".format(
+            self._main_repo_second_commit_hexsha))
+        with mock.patch('githammer.verify._commits_per_bucket', 0):
+            verifier, differences = self._verify()
+        self.assertEqual([(hexsha, attribute) for hexsha, attribute, _, _ in differences],
+                         [(self._main_repo_second_commit_hexsha, 'added_lines')])
+        self.assertEqual(verifier.differing_bucket_count, 1)
+        self.assertEqual(verifier.bucket_count, 6 + 19)
+
+    def test_row_digest_is_stable(self):
+        commit_time = datetime.datetime(2019, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc)
+        self.assertEqual(_row_digest(('commit', 'abc', 1, True, None, commit_time)), 14144881374279106061)
+        self.assertEqual(_row_digest(('commit', 'abc', 1, True, None, commit_time)),
+                         _row_digest(('commit', 'abc', '1', 1, '', commit_time)))
+
+    def test_adjacent_prefixes_are_merged_into_ranges(self):
+        self.assertEqual(_prefix_ranges(['aa', '0a', 'ff', 'a9', '9f']),
+                         [['0a', '0b'], ['9f', 'a0'], ['a9', 'ab'], ['ff', None]])